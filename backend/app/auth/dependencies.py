@@ -10,7 +10,7 @@ from app.auth.schemas import *
 from jwt.exceptions import InvalidTokenError
 
 from app.users.crud import get_user_by_username
-from app.db import db_dependency
+from app.db import read_db_dependency
 from app.logger import logger
 
 
@@ -24,14 +24,14 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)], 
-    db: db_dependency
+    db: read_db_dependency
 ): 
     """
     Validates JWT token and return current user
 
     Args:
         token (str): The JWT token from request header
-        db (db_dependency): The database dependency
+        db (read_db_dependency): The read-only database dependency
         
     Returns:
         UserOut: The user model with user details if token is valid
@@ -52,17 +52,17 @@ async def get_current_user(
         if username is None:
             logger.warning("JWT payload missing 'sub' field")
             raise credentials_exception
-        logger.debug(f"Token subject (username): {username}")
+        logger.debug("Token subject (username): %s", username)
         token_data = TokenData(username=username)
     except InvalidTokenError as e:
-        logger.warning(f"JWT decode failed: {e}")
+        logger.warning("JWT decode failed: %s", e)
         raise credentials_exception
     
-    user = get_user_by_username(token_data.username, db)
+    user = await get_user_by_username(token_data.username, db)
     if not user:
-        logger.warning(f"No user found for token subject: {token_data.username}")
+        logger.warning("No user found for token subject: %s", token_data.username)
         raise credentials_exception
-    logger.info(f"Token valid — authenticated user '{user.username}'")
+    logger.info("Token valid \u2014 authenticated user '%s'", user.username)
     return UserOut.model_validate(user)
 
 async def get_current_active_user(
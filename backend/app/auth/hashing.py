@@ -0,0 +1,117 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from app.logger import logger
+
+load_dotenv()
+
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(os.cpu_count() or 1)))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(HASH_POOL_WORKERS * 8)))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_executor: ProcessPoolExecutor | None = None
+_pending = 0
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(input_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(input_password, hashed_password)
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Return the shared bcrypt process pool, creating it on first use.
+
+    Workers are started from a forkserver rather than forked, as by then this process runs
+    the event loop and the logging thread, and forking a multi-threaded process is unsafe.
+
+    Returns:
+        ProcessPoolExecutor: The process pool used for password hashing.
+    """
+    global _executor
+    if _executor is None:
+        logger.info("Starting password hashing pool with %s workers", HASH_POOL_WORKERS)
+        context = multiprocessing.get_context("forkserver")
+        # Imported once by the forkserver instead of by every worker
+        context.set_forkserver_preload([__name__])
+        _executor = ProcessPoolExecutor(max_workers=HASH_POOL_WORKERS, mp_context=context)
+    return _executor
+
+def shutdown_hashing_pool():
+    """
+    Shut down the bcrypt process pool. Called from the app lifespan on shutdown.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def _submit(fn, *args):
+    """
+    Run a bcrypt call in the process pool, rejecting it when too many calls are queued.
+
+    Args:
+        fn: The module-level worker function to run.
+        *args: Arguments passed to the worker function.
+
+    Returns:
+        The worker function's result.
+
+    Raises:
+        HTTPException: 503 if the pool is saturated or its workers have died.
+    """
+    global _pending, _executor
+    if _pending >= HASH_MAX_PENDING:
+        logger.warning("Password hashing pool saturated (%s pending)", _pending)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service busy. Try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+    _pending += 1
+    executor = get_executor()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        # Concurrent failing calls share the broken pool; only the first replaces it
+        if _executor is executor:
+            logger.error("Password hashing pool broken, recreating on next call")
+            _executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service busy. Try again shortly.")
+    finally:
+        _pending -= 1
+
+async def hash_password(password: str) -> str:
+    """
+    Hash the password with bcrypt without blocking the event loop.
+
+    Args:
+        password (str): The password to hash.
+
+    Returns:
+        str: The hashed password.
+    """
+    return await _submit(_hash, password)
+
+async def verify_password(input_password: str, hashed_password: str) -> bool:
+    """
+    Verify the input password against the hashed password without blocking the event loop.
+
+    Args:
+        input_password (str): The password to verify.
+        hashed_password (str): The hashed password to compare against.
+
+    Returns:
+        bool: True if the passwords match, False otherwise.
+    """
+    return await _submit(_verify, input_password, hashed_password)
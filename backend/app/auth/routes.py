@@ -1,13 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, Path
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi_limiter.depends import RateLimiter
 from typing import Annotated
 from app.auth.schemas import Token, PasswordUpdateRequest, PasswordUpdateResponse
 
-from app.auth.utils import authenticate_user, create_access_token, verify_pw, password_hash
+from app.auth.utils import authenticate_user, create_access_token
+from app.auth.hashing import hash_password, verify_password
 from app.auth.social_login import google_sign_in, apple_sign_in
 from app.sessions.routes import check_session
-from app.users.crud import get_user_by_username
+from app.users.crud import get_user_by_username, get_user_hashed_pw, update_user_pw
+from app.ratelimit import RateLimit
 from app.db import db_dependency
 from app.logger import logger
 
@@ -17,11 +18,14 @@ router = APIRouter(
     tags=['auth']
 )
 
-@router.post("/token/{provider}", dependencies=[Depends(RateLimiter(times=3, minutes=1))])
+login_limit = RateLimit("login", times=3, seconds=60)
+update_pw_limit = RateLimit("update_password", times=1, seconds=3600)
+
+@router.post("/token/{provider}", dependencies=[Depends(login_limit)])
 async def login(
     db: db_dependency,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    provider: Annotated[str, Path()] = "email"
+    provider: Annotated[str, Path()]
 ):
     """
     Endpoint to authenticate user and return access token.
@@ -42,7 +46,7 @@ async def login(
         logger.warning("Invalid authentication provider")
 
     if provider == "email":
-        user = authenticate_user(db, form_data.username, form_data.password)
+        user = await authenticate_user(db, form_data.username, form_data.password)
         
         if not user:
             logger.warning("Incorrect username or password")
@@ -67,7 +71,7 @@ async def login(
 
     return Token(access_token=access_token, token_type="bearer")
 
-@router.post("/update_password", dependencies=[Depends(RateLimiter(times=1, hours=1))])
+@router.post("/update_password")
 async def update_pw(
     db: db_dependency,
     password_data: PasswordUpdateRequest,
@@ -89,22 +93,25 @@ async def update_pw(
     """
     try:
         username = user_data.get("username")
-        logger.info(f"Password update requested for user {username}")
-        user = get_user_by_username(username, db) # type: ignore
-        if not verify_pw(password_data.current_pw, user.hashed_password):  # type: ignore
-            logger.warning(f"Failed password update attempt for user {username} - incorrect current password")
+        await update_pw_limit.hit(f"user:{username}")
+        logger.info("Password update requested for user %s", username)
+        user = await get_user_by_username(username, db) # type: ignore
+        hashed_pw = await get_user_hashed_pw(user.id, db)
+        if not await verify_password(password_data.current_pw, hashed_pw):
+            logger.warning("Failed password update attempt for user %s - incorrect current password", username)
             raise HTTPException(status_code=401, detail="Current password is incorrect")
 
-        new_hashed_pw = password_hash(password_data.new_pw)
-        user.hashed_password = new_hashed_pw # type: ignore
-        db.commit()
+        new_hashed_pw = await hash_password(password_data.new_pw)
+        await update_user_pw(user.id, new_hashed_pw, db)
 
-        logger.info(f"Password successfully updated for user {username}")
+        logger.info("Password successfully updated for user %s", username)
         res = PasswordUpdateResponse(message="Password updated successfully", success=True)
         return res
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error updating password: {str(e)}")
+        logger.error("Error updating password: %s", str(e))
         raise HTTPException(status_code=500, detail="Failed to update password")
\ No newline at end of file
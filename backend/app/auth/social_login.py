@@ -1,10 +1,11 @@
-from app.users.crud import get_user_by_email
+from app.users.crud import get_user_by_email, resolve_identity
 from app.db import db_dependency
 
 def google_sign_in(
     db: db_dependency,
 ):
-    # TODO if user_email in DB, add google oauth2 info to account. else create new account with fetched data
+    # TODO resolve_identity(sub, db, provider="google") finds an already linked account.
+    # else if user_email in DB, add google oauth2 info to account. else create new account with fetched data
     return 
 
 def apple_sign_in(
@@ -6,13 +6,12 @@ import hashlib
 from dotenv import load_dotenv
 
 from pydantic import EmailStr
-from app.users.schemas import UserOut
 
 from datetime import datetime, timedelta, timezone
 from cryptography.fernet import Fernet
-from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 
-from app.users.crud import get_user_by_query
+from app.auth.hashing import verify_password
 from app.db import db_dependency
 
 load_dotenv()
@@ -26,9 +25,11 @@ FERNET_KEY = os.getenv("FERNET_KEY")
 if not all([SECRET_KEY, HMAC_KEY, FERNET_KEY]):
     raise RuntimeError("Missing critical security environment variables.")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 cipher = Fernet(FERNET_KEY)
 
+# Batches at least this large are decrypted in the threadpool instead of on the event loop
+DECRYPT_BATCH_THREAD_MIN = 64
+
 def sanitize_pw(password: str) -> bool:
     """
     Validate password strength. Criteria: 8 chars long, at least one uppercase, one lowercase, one digit, and one special character.
@@ -64,7 +65,7 @@ def email_hash(email: EmailStr) -> str:
     Returns:
         str: The SHA256 hash of the email.
     """
-    return hmac.new(HMAC_KEY, email.lower().encode(), hashlib.sha256).hexdigest()
+    return hmac.new(HMAC_KEY.encode(), email.lower().encode(), hashlib.sha256).hexdigest()
 
 def encrypt_email(email: str) -> str:
     """
@@ -90,29 +91,20 @@ def decrypt_email(token: str) -> str:
     """
     return cipher.decrypt(token.encode()).decode()
 
-def password_hash(password: str) -> str:
+async def decrypt_emails(tokens: list[str]) -> list[str]:
     """
-    Hash the password using bcrypt.
-    
-    Args:
-        password (str): The password to hash.
-    
-    Returns:
-        str: The hashed password."""
-    return pwd_context.hash(password)
+    Decrypt many emails in one pass, for responses listing many users. Large batches run in
+    the threadpool in a single hop, so they do not hold up the event loop.
 
-def verify_pw(input_password: str, hashed_password: str) -> bool:
-    """
-    Verify the input password against the hashed password.
-    
     Args:
-        input_password (str): The password to verify.
-        hashed_password (str): The hashed password to compare against.
-    
+        tokens (list[str]): The encrypted email tokens.
+
     Returns:
-        bool: True if the passwords match, False otherwise.
+        list[str]: The decrypted emails, in the same order.
     """
-    return pwd_context.verify(input_password, hashed_password)
+    if len(tokens) < DECRYPT_BATCH_THREAD_MIN:
+        return [decrypt_email(token) for token in tokens]
+    return await run_in_threadpool(lambda: [decrypt_email(token) for token in tokens])
 
 def create_access_token(data: dict):
     """
@@ -131,13 +123,14 @@ def create_access_token(data: dict):
 
     return encoded_jwt
 
-def authenticate_user(
+async def authenticate_user(
     db: db_dependency, 
     query: str, 
     password: str
 ):
     """
-    Authenticate a user by querying the database and verifying the password.
+    Authenticate a user by resolving the username or email to its row in one query and
+    verifying the password in the hashing pool.
     
     Args:
         db (db_dependency): The database dependency.
@@ -145,11 +138,12 @@ def authenticate_user(
         password (str): The password to verify.
     
     Returns:
-        UserOut: The authenticated user object if credentials are valid, otherwise None.
+        UserOut: The authenticated user object if credentials are valid, otherwise False.
     """
-    user = get_user_by_query(query = query, db = db)
+    from app.users.crud import resolve_identity, user_to_userout
+    user = await resolve_identity(query, db)
     if not user:
         return False
-    if not verify_pw(password, user.hashed_password): # type: ignore
+    if not await verify_password(password, user.hashed_password):
         return False
-    return UserOut.model_validate(user)
\ No newline at end of file
+    return user_to_userout(user)
\ No newline at end of file
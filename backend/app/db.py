@@ -1,27 +1,277 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
 from fastapi import Depends
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
 from typing import Annotated
 from dotenv import load_dotenv
 from app.logger import logger
+from app.metrics import instrument_engine, timed_pool
 
+import itertools
+import math
 import os
+import time
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL) 
+# Async mode (default) talks to Postgres through asyncpg so queries never block the event loop.
+# Set DB_ASYNC=false to fall back to psycopg2 sessions driven from the threadpool.
+DB_ASYNC = os.getenv("DB_ASYNC", "true").lower() == "true"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or make_url(SQLALCHEMY_DATABASE_URL).set(drivername="postgresql+asyncpg")
+
+# Comma separated URLs of read replicas. Sessions of read_db_dependency are spread over them
+# round robin, and use the primary when none are set.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+DB_REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_REPLICA_MAX_OVERFLOW = int(os.getenv("DB_REPLICA_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
+DB_REPLICA_POOL_PRE_PING = os.getenv("DB_REPLICA_POOL_PRE_PING", "true").lower() == "true"
+
+# After a client writes, its reads stay on the primary this long, so replication lag never
+# hides its own write from it
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+PRIMARY_COOKIE = "db_primary_until"
+
+def create_engines(url, async_url, pool_size: int, max_overflow: int, pre_ping: bool):
+    """
+    Create the engines of one database: the sync engine, and the async engine in async mode.
+
+    Both have their pool checkouts and queries timed for /metrics.
+
+    Args:
+        url: The database URL.
+        async_url: The asyncpg URL of the same database.
+        pool_size (int): Connections kept open in each engine's pool.
+        max_overflow (int): Connections opened beyond pool_size under load.
+        pre_ping (bool): Test connections on checkout, replacing ones the server dropped.
+
+    Returns:
+        tuple[Engine, AsyncEngine | None]: The sync engine, and the async engine or None.
+    """
+    options = {"pool_size": pool_size, "max_overflow": max_overflow, "pool_pre_ping": pre_ping}
+    sync_engine = create_engine(url, poolclass=timed_pool(QueuePool), **options)
+    instrument_engine(sync_engine)
+    async_engine = create_async_engine(async_url, poolclass=timed_pool(AsyncAdaptedQueuePool), **options) if DB_ASYNC else None
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine)
+    return sync_engine, async_engine
+
+class RoutingSession(Session):
+    """
+    Session of read-only routes that reads from a replica and writes to the primary.
+
+    The engines are passed in Session.info. Once the session writes it stays on the primary,
+    so its later reads see the write.
+    """
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.info["replica"] is not None and not self._flushing and not isinstance(clause, UpdateBase):
+            return self.info["replica"]
+        self.info["replica"] = None
+        return self.info["primary"]
+
+engine, async_engine = create_engines(
+    SQLALCHEMY_DATABASE_URL, ASYNC_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_PRE_PING
+)
+replica_engines = [
+    create_engines(
+        url, make_url(url).set(drivername="postgresql+asyncpg"),
+        DB_REPLICA_POOL_SIZE, DB_REPLICA_MAX_OVERFLOW, DB_REPLICA_POOL_PRE_PING
+    ) for url in DATABASE_REPLICA_URLS
+]
+_next_replica = itertools.cycle(range(len(replica_engines)))
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 Base = declarative_base()
 
-def get_db():
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False)
+
+@dataclass
+class RequestWrites:
+    """
+    Read-your-writes state of the current request.
+
+    Attributes:
+        pinned (bool): The client wrote within READ_YOUR_WRITES_SECONDS, so reads use the primary.
+        wrote (bool): The request itself wrote to the primary.
+    """
+    pinned: bool = False
+    wrote: bool = False
+
+_request_writes: ContextVar[RequestWrites | None] = ContextVar("request_writes", default=None)
+
+def _mark_write(conn, cursor, statement, parameters, context, executemany):
+    if context.isinsert or context.isupdate or context.isdelete:
+        state = _request_writes.get()
+        if state is not None:
+            state.wrote = True
+
+if replica_engines:
+    for primary in (engine, async_engine.sync_engine if async_engine is not None else None):
+        if primary is not None:
+            event.listen(primary, "before_cursor_execute", _mark_write)
+
+class ReadYourWritesMiddleware:
+    """
+    Keep a client's reads on the primary for READ_YOUR_WRITES_SECONDS after it writes.
+
+    A request that writes to the primary is answered with a cookie holding the end of the
+    window, and read sessions of requests that carry an unexpired cookie use the primary.
+    Does nothing when no replicas are configured.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_engines:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            pinned = float(HTTPConnection(scope).cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+        except ValueError:
+            pinned = False
+        state = RequestWrites(pinned=pinned)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and state.wrote:
+                until = math.ceil(time.time() + READ_YOUR_WRITES_SECONDS)
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{PRIMARY_COOKIE}={until}; Max-Age={math.ceil(READ_YOUR_WRITES_SECONDS)}; "
+                    "Path=/; HttpOnly; Secure; SameSite=strict"
+                )
+            await send(message)
+
+        token = _request_writes.set(state)
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _request_writes.reset(token)
+
+class ThreadedSession:
+    """
+    Awaitable wrapper around a synchronous Session, used when DB_ASYNC is disabled.
+
+    Exposes the subset of the AsyncSession API used by the CRUD modules and runs every
+    blocking call in the threadpool, so the same CRUD code works in both modes.
+
+    Attributes:
+        sync_session (Session): The wrapped synchronous session.
+    """
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, *args, **kwargs)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance):
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def stream(self, statement, *args, **kwargs):
+        result = await run_in_threadpool(
+            self.sync_session.execute, statement.execution_options(stream_results=True), *args, **kwargs
+        )
+        return ThreadedResult(result)
+
+class ThreadedResult:
+    """
+    Async iteration over a server-side cursor result of a ThreadedSession.
+
+    Attributes:
+        result: The wrapped synchronous result.
+    """
+    def __init__(self, result):
+        self.result = result
+
+    async def partitions(self, size: int):
+        while True:
+            rows = await run_in_threadpool(self.result.fetchmany, size)
+            if not rows:
+                break
+            yield rows
+
+def _primary_session():
+    return AsyncSessionLocal() if DB_ASYNC else ThreadedSession(SessionLocal())
+
+def _read_session():
+    """
+    Open a routing session on the next replica, or a primary session if the request has to
+    read its own writes or no replicas are configured.
+    """
+    state = _request_writes.get()
+    if not replica_engines or (state is not None and (state.pinned or state.wrote)):
+        return _primary_session()
+    sync_replica, async_replica = replica_engines[next(_next_replica)]
+    if DB_ASYNC:
+        return AsyncReadSessionLocal(info={"primary": async_engine.sync_engine, "replica": async_replica.sync_engine})
+    return ThreadedSession(ReadSessionLocal(info={"primary": engine, "replica": sync_replica}))
+
+@asynccontextmanager
+async def session_scope(read_only: bool = False):
+    """
+    Open a session outside of request dependencies, e.g. for streaming response bodies and CLI jobs.
+
+    Args:
+        read_only (bool): Read from a replica when one is configured. Writes still go to the primary.
+    """
     logger.debug("Opening new DB session")
-    db = SessionLocal()
+    db = _read_session() if read_only else _primary_session()
     try:
         yield db
     finally:
         logger.debug("Closing DB session")
-        db.close()
+        await db.close()
+
+async def get_db():
+    async with session_scope() as db:
+        yield db
+
+async def get_read_db():
+    async with session_scope(read_only=True) as db:
+        yield db
 
-db_dependency = Annotated[Session, Depends(get_db)]
\ No newline at end of file
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
+read_db_dependency = Annotated[AsyncSession, Depends(get_read_db)]
@@ -1,27 +1,54 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_FILE = os.getenv("LOG_FILE", "module.log")
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line for log shippers.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
 
 # Module Level logger
 logger = logging.getLogger("rfol")
-logger.setLevel(logging.DEBUG)
+logger.setLevel(LOG_LEVEL)
 
 # Set up formatter
-formatter = logging.Formatter('%(asctime)s %(levelname)s: %(message)s')
+formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter('%(asctime)s %(levelname)s: %(message)s')
 
-# Set up FileHandler
-file_handler = logging.FileHandler('module.log')
-file_handler.setFormatter(formatter)
+# File and console output run on the listener's thread, so the event loop only enqueues records
+handlers = [logging.StreamHandler()]
+if LOG_FILE:
+    handlers.append(logging.FileHandler(LOG_FILE))
+for handler in handlers:
+    handler.setFormatter(formatter)
 
-# console
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
+log_queue = queue.SimpleQueue()
+listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
 
 # Avoid duplicate handlers
 if not logger.hasHandlers():
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-
-logger.debug('Debug message')
-logger.info('Info message')
-logger.warning('Warning message')
-logger.error('Error message')
-logger.critical('Critical message')
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.propagate = False
+    listener.start()
+    atexit.register(listener.stop)
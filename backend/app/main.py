@@ -1,58 +1,41 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from fastapi_limiter import FastAPILimiter
 
-import app.models as models
-from app.db import engine
+from app import models # Registers every model before the mappers are configured
 from app.logger import logger
+from app.metrics import MetricsMiddleware, metrics_response
+from app.db import ReadYourWritesMiddleware
 from app.redis import redis_client
+from app.auth.hashing import shutdown_hashing_pool
+from app.users.cache import user_cache
+from app.plaid.gateway import plaid_gateway
 
 from app.users.routes import router as user_router
 from app.auth.routes import router as auth_router
 from app.sessions.routes import router as session_router
-
-async def custom_callback(request, response, pexpire):
-    """
-    Custom callback for rate limiting.
-
-    Args:
-        request: The incoming request.
-        response: The response to be sent.
-        pexpire: The expiration time for the rate limit.
-    """
-    logger.warning("Rate limit exceeded")
-    response.status_code = 429
-    response.body = b'{"detail":"Too many requests. Try again later."}'
-    response.headers["Content-Type"] = "application/json"
-
-async def identifier(request):
-    """
-    Custom identifier function for rate limiting.
-
-    Args:
-        request: The incoming request.
-
-    Returns:
-        str: The identifier for the request, typically the client's host.
-    """
-    return request.client.host
+from app.plaid.routes import router as plaid_router
+from app.transactions.routes import router as transactions_router
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     """
-    Lifespan event handler for FastAPI to initialize and close the rate limiter.
+    Lifespan event handler for FastAPI to start and stop the user cache invalidation listener,
+    and to close the hashing pool, Plaid gateway and Redis connection.
+    The schema is managed by migrations (alembic upgrade head), never at startup.
     
     Args:
         _: The FastAPI application instance.
     """
-    await FastAPILimiter.init(
-        redis=redis_client,
-        identifier=identifier,
-        http_callback=custom_callback,
-    )
+    cache_listener = asyncio.create_task(user_cache.listen_for_invalidations())
+    plaid_gateway.preload()
     yield
-    await FastAPILimiter.close()
+    cache_listener.cancel()
+    shutdown_hashing_pool()
+    plaid_gateway.shutdown()
+    await redis_client.aclose()
 
 # Create FastAPI app with lifespan context
 app = FastAPI(lifespan=lifespan)
@@ -71,14 +54,17 @@ app.add_middleware(
     allow_headers = ['*']
 )
 
-# Initialize the database
-models.Base.metadata.drop_all(bind=engine) # CLEAR DB WHILE DEVELOPING TODO REMOVE DURING PRODUCTION
-models.Base.metadata.create_all(bind=engine) 
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Outermost, so rejected CORS preflights are counted too
+app.add_middleware(MetricsMiddleware)
 
 # Include routers for different modules
 app.include_router(user_router)
 app.include_router(auth_router)
 app.include_router(session_router)
+app.include_router(plaid_router)
+app.include_router(transactions_router)
 
 # Root endpoint
 @app.get("/")
@@ -93,6 +79,14 @@ async def health_check():
     Health check endpoint to verify the service is running.
     
     Returns:
-        dict: A message indicating the service is healthy.
+        dict: A message indicating the service is healthy, plus user cache counters and Plaid latency stats.
+    """
+    return {"message": "Service is healthy", "user_cache": user_cache.get_stats(), "plaid": plaid_gateway.get_stats()}
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Request, database, Redis and Plaid metrics in the Prometheus text format.
     """
-    return {"message": "Service is healthy"}
\ No newline at end of file
+    return metrics_response()
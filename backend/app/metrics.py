@@ -0,0 +1,159 @@
+import os
+import time
+from contextvars import ContextVar
+from dotenv import load_dotenv
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+# With several uvicorn workers every process writes its samples to files in this directory and
+# /metrics merges them, so any worker can answer a scrape. The directory must be emptied before
+# the server starts. prometheus_client reads the variable on import, so set it in the environment.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+HTTP_REQUESTS = Counter(
+    "rfol_http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "rfol_http_request_duration_seconds", "HTTP request latency by route.", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "rfol_db_queries_per_request", "SQL statements executed per HTTP request.", ["route"], buckets=QUERY_COUNT_BUCKETS
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "rfol_db_time_per_request_seconds", "Time spent executing SQL per HTTP request.", ["route"], buckets=LATENCY_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram(
+    "rfol_db_query_duration_seconds", "Latency of single SQL statements.", buckets=DB_BUCKETS
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "rfol_db_pool_checkout_seconds", "Time to get a connection from the pool, including opening new ones.", buckets=DB_BUCKETS
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "rfol_redis_command_duration_seconds", "Redis command latency by command.", ["command"], buckets=DB_BUCKETS
+)
+PLAID_CALL_SECONDS = Histogram(
+    "rfol_plaid_call_duration_seconds", "Plaid API call latency by operation and outcome.", ["operation", "outcome"], buckets=LATENCY_BUCKETS
+)
+
+# [statement count, seconds] of the request being handled. Set per request by the middleware, so
+# queries from CLI jobs and workers only feed the per-statement histogram.
+_request_db: ContextVar[list | None] = ContextVar("request_db", default=None)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and database use of every HTTP request.
+
+    Requests are labelled by their route template, e.g. /transactions/{id}, so the number of
+    series stays bounded. Requests that match no route share one label.
+
+    Attributes:
+        app: The wrapped ASGI application.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        db_stats = [0, 0.0]
+        token = _request_db.set(db_stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_db.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, path, str(status)).inc()
+            HTTP_REQUEST_SECONDS.labels(method, path).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(path).observe(db_stats[0])
+            DB_SECONDS_PER_REQUEST.labels(path).observe(db_stats[1])
+
+def instrument_engine(engine: Engine):
+    """
+    Time every statement of an engine, adding it to the current request's totals.
+
+    Args:
+        engine (Engine): A sync engine, or the sync_engine of an AsyncEngine.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_start
+        DB_QUERY_SECONDS.observe(elapsed)
+        db_stats = _request_db.get()
+        if db_stats is not None:
+            db_stats[0] += 1
+            db_stats[1] += elapsed
+
+def timed_pool(pool_class: type) -> type:
+    """
+    Subclass a queue pool so every checkout is timed, pass the result as poolclass.
+
+    Args:
+        pool_class (type): QueuePool or AsyncAdaptedQueuePool.
+
+    Returns:
+        type: The timed pool class.
+    """
+    class TimedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+def observe_redis(command: str, elapsed: float):
+    REDIS_COMMAND_SECONDS.labels(command).observe(elapsed)
+
+def observe_plaid(operation: str, elapsed: float, outcome: str):
+    PLAID_CALL_SECONDS.labels(operation, outcome).observe(elapsed)
+
+def metrics_response() -> Response:
+    """
+    Render all metrics in the Prometheus text format, merged across worker processes when
+    PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,2 +1,7 @@
 from .user_model import Base
-from .transactions_model import Base
\ No newline at end of file
+from .transactions_model import Base
+from .plaid_item_model import PlaidItem
+from .plaid_account_model import PlaidAccount
+from .institution_model import Institution
+from .rollup_model import MonthlyRollup
+from .social_identity_model import SocialIdentity
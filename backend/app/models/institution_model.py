@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime
+from app.db import Base
+from datetime import datetime, timezone
+
+class Institution(Base):
+    """
+    SQLAlchemy model for institution metadata fetched from Plaid, shared by all users.
+
+    Attributes:
+        id (int): Primary key, auto-incremented.
+        institution_id (str): Unique Plaid institution ID.
+        name (str): Name of the financial institution.
+        url (str): Institution website, if provided.
+        primary_color (str): Hex brand color, if provided.
+        logo (str): Base64 encoded PNG logo, if provided.
+        updated_at (DateTime): Timestamp when the metadata was last fetched from Plaid.
+    """
+    __tablename__ = "institutions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    institution_id = Column(String, unique=True, nullable=False, index=True)
+    name = Column(String, nullable=False)
+    url = Column(String, nullable=True)
+    primary_color = Column(String, nullable=True)
+    logo = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
@@ -34,7 +34,7 @@ class PlaidAccount(Base):
     subtype = Column(String, nullable=True)
     mask = Column(String, nullable=True)
     last_balance = Column(Float, nullable=True)
-    last_sync = Column(DateTime, nullable=True)
+    last_sync = Column(DateTime(timezone=True), nullable=True)
 
     plaid_item_uuid = Column(UUID(as_uuid=True), ForeignKey('plaid_items.uuid'), nullable=False)
     plaid_item = relationship("PlaidItem", back_populates="accounts")
\ No newline at end of file
@@ -20,6 +20,7 @@ class PlaidItem(Base):
         needs_reauth (bool): Indicates if the item needs re-authentication.
         last_error (str): Last error message from Plaid, if any.
         last_successful_sync (DateTime): Timestamp of the last successful sync with Plaid.
+        transactions_cursor (str): Plaid /transactions/sync cursor to resume from, None before the first sync.
         user_uuid (UUID): Foreign key linking to the associated user.
         created_at (DateTime): Timestamp when the item was created.
         updated_at (DateTime): Timestamp when the item was last updated.
@@ -35,10 +36,11 @@ class PlaidItem(Base):
     is_active = Column(Boolean, default=True)
     needs_reauth = Column(Boolean, default=False)  
     last_error = Column(String, nullable=True)
-    last_successful_sync = Column(DateTime, nullable=True)
+    last_successful_sync = Column(DateTime(timezone=True), nullable=True)
+    transactions_cursor = Column(String, nullable=True)
     user_uuid = Column(UUID(as_uuid=True), ForeignKey('users.uuid'), nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     user = relationship("User", back_populates="plaid_items")
     accounts = relationship("PlaidAccount", back_populates="plaid_item", cascade="all, delete-orphan")
\ No newline at end of file
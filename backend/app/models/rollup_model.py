@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, Integer, Numeric, Date, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.db import Base
+
+class MonthlyRollup(Base):
+    """
+    SQLAlchemy model for per-month transaction totals, maintained incrementally by the
+    transaction sync (see app/transactions/rollups.py).
+
+    Attributes:
+        user_uuid (UUID): Foreign key linking to the associated user.
+        plaid_account_uuid (UUID): Foreign key linking to the associated Plaid account.
+        month (Date): First day of the month.
+        category (str): Primary personal finance category, or UNCATEGORIZED.
+        income (Numeric): Total money entering the account.
+        spend (Numeric): Total money leaving the account.
+        transaction_count (int): Number of transactions in the bucket.
+    """
+    __tablename__ = "monthly_rollups"
+
+    user_uuid = Column(UUID(as_uuid=True), ForeignKey('users.uuid'), primary_key=True)
+    plaid_account_uuid = Column(UUID(as_uuid=True), ForeignKey('plaid_accounts.uuid'), primary_key=True)
+    month = Column(Date, primary_key=True)
+    category = Column(String, primary_key=True)
+    income = Column(Numeric(14, 2), nullable=False, default=0)
+    spend = Column(Numeric(14, 2), nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import UUID
+from app.db import Base
+
+class SocialIdentity(Base):
+    """
+    SQLAlchemy model linking a user to their account at a social sign in provider.
+
+    Attributes:
+        id (int): Primary key, auto-incremented.
+        provider (str): The sign in provider, e.g. google or apple.
+        subject (str): The provider's stable ID of the account (the sub claim).
+        user_uuid (UUID): Foreign key to the linked User.
+        user (relationship): Relationship to the User model.
+    """
+    __tablename__ = "social_identities"
+    __table_args__ = (
+        UniqueConstraint("provider", "subject", name="uq_social_identities_provider_subject"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    provider = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    user_uuid = Column(UUID(as_uuid=True), ForeignKey("users.uuid"), nullable=False, index=True)
+    user = relationship("User", back_populates="social_identities")
@@ -1,14 +1,49 @@
-from sqlalchemy import Column, String, Boolean, Integer, ForeignKey
+from sqlalchemy import Column, String, Boolean, Integer, Numeric, Date, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from uuid import uuid4
 from app.db import Base
 
 class Transaction(Base):
+    """
+    SQLAlchemy model for storing transactions ingested from Plaid.
+
+    The table is range-partitioned by month on date (see app/transactions/partitions.py),
+    so the partition key is part of the primary key and of every unique constraint.
+
+    Attributes:
+        id (int): Auto-incremented ID, unique together with date.
+        uuid (UUID): Identifier for the transaction.
+        plaid_transaction_id (str): Plaid transaction ID, used as the upsert key together with date.
+        description (str): Plaid's transaction name.
+        merchant_name (str): Cleaned merchant name, if Plaid could determine one.
+        category (str): Primary personal finance category.
+        amount (Numeric): Amount in account currency. Positive values are money leaving the account.
+        iso_currency_code (str): ISO currency code of the amount.
+        date (Date): Posted date, or authorized date for pending transactions. Partition key.
+        pending (bool): Indicates if the transaction has not posted yet.
+        plaid_account_uuid (UUID): Foreign key linking to the associated Plaid account.
+        user_uuid (UUID): Foreign key linking to the associated user.
+    """
     __tablename__ = "Transactions"
 
-    id = Column(Integer, primary_key= True, unique=True, autoincrement=True)
-    uuid = Column(UUID(as_uuid=True), unique=True, nullable=False, default=uuid4)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    date = Column(Date, primary_key=True)
+    uuid = Column(UUID(as_uuid=True), nullable=False, default=uuid4)
+    plaid_transaction_id = Column(String, nullable=False)
     description = Column(String)
+    merchant_name = Column(String, nullable=True)
+    category = Column(String, nullable=True)
+    amount = Column(Numeric(14, 2), nullable=False)
+    iso_currency_code = Column(String, nullable=True)
+    pending = Column(Boolean, nullable=False, default=False)
+    plaid_account_uuid = Column(UUID(as_uuid=True), ForeignKey('plaid_accounts.uuid'), nullable=False)
     user_uuid = Column(UUID(as_uuid=True), ForeignKey('users.uuid'), nullable=False)
-    user = relationship("User", back_populates="transactions")
\ No newline at end of file
+    user = relationship("User", back_populates="transactions")
+
+    __table_args__ = (
+        UniqueConstraint("plaid_transaction_id", "date", name="uq_transactions_plaid_transaction_id_date"),
+        Index("ix_transactions_user_uuid_date", user_uuid, date.desc()),
+        Index("ix_transactions_plaid_account_uuid_date", plaid_account_uuid, date),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
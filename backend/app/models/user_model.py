@@ -21,6 +21,7 @@ class User(Base):
         is_active (bool): Indicates if the user account is active.
         transactions (relationship): Relationship to the Transaction model.
         plaid_items (relationship): Relationship to the PlaidItem model.
+        social_identities (relationship): Relationship to the SocialIdentity model.
     """
     __tablename__ = "users"
 
@@ -35,6 +36,7 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     transactions = relationship("Transaction", back_populates="user", cascade="all, delete-orphan")
     plaid_items = relationship("PlaidItem", back_populates="user", cascade="all, delete-orphan")
+    social_identities = relationship("SocialIdentity", back_populates="user", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<User(username={self.username}, uuid={self.uuid})>"
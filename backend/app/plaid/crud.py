@@ -1,134 +1,127 @@
 import datetime
+from uuid import uuid4
 
 from fastapi import HTTPException
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from app.users.schemas import UserOut
 from app.plaid.schemas import ItemOut, AccountOut
 
 from app.models.user_model import User
 from app.models.plaid_account_model import PlaidAccount
 from app.models.plaid_item_model import PlaidItem
-from app.plaid.plaid import client
 from app.db import db_dependency
 from app.logger import logger
 
 
-def create_plaid_item(
+async def create_plaid_item_with_accounts(
     item_id: str,
     access_token: str,
+    institution_id: str,
+    institution_name: str,
+    accounts: list[dict],
     current_user: UserOut,
-    db: db_dependency   
-):
+    db: db_dependency
+) -> tuple[ItemOut, list[AccountOut]]:
     """
-    Creates a new Plaid item and associates it with the current user.
+    Creates a Plaid item and upserts all of its accounts in a single database transaction.
+
+    The item is upserted on plaid_item_id and the accounts in one multi-row
+    INSERT ... ON CONFLICT (plaid_account_id) statement, so relinking an item refreshes
+    it in place and a failure leaves neither the item nor any account behind.
 
     Args:
         item_id (str): The unique Plaid item ID.
         access_token (str): The Plaid access token for the item.
+        institution_id (str): The Plaid institution ID.
+        institution_name (str): The name of the financial institution.
+        accounts (list[dict]): The accounts returned by Plaid /accounts/get.
         current_user (UserOut): The currently authenticated user.
         db (db_dependency): The database dependency.
 
     Returns:
-        ItemOut: The created Plaid item object.
-    
+        tuple[ItemOut, list[AccountOut]]: The linked item and its accounts.
+
     Raises:
-        HTTPException: If there is an error creating the Plaid item or if the item already
-                      exists for the user.
+        HTTPException: If the item or its accounts could not be stored.
     """
-    item_res = client.item_get({"access_token": access_token})
-    institution_id = item_res["item"]["institution_id"]
-    institution_res = client.institutions_get_by_id({"institution_id": institution_id})
-    institution_name = institution_res["institution"]["name"]
-    new_item = PlaidItem(
+    now = datetime.datetime.now(datetime.timezone.utc)
+    item_stmt = insert(PlaidItem).values(
+        uuid = uuid4(),
         plaid_item_id = item_id,
         plaid_access_token = access_token,
         institution_id = institution_id,
         institution_name = institution_name,
-        user_uuid = str(current_user.uuid),
+        user_uuid = current_user.uuid,
     )
-
-    db.add(new_item)
-    logger.debug(f"Attempting to add a connection from {institution_name} to the plaid account belonging to {current_user.username}")
+    item_stmt = item_stmt.on_conflict_do_update(
+        index_elements=[PlaidItem.plaid_item_id],
+        set_={
+            "plaid_access_token": item_stmt.excluded.plaid_access_token,
+            "institution_id": item_stmt.excluded.institution_id,
+            "institution_name": item_stmt.excluded.institution_name,
+            "is_active": True,
+            "needs_reauth": False,
+            "updated_at": now,
+        },
+        where=PlaidItem.user_uuid == current_user.uuid
+    ).returning(PlaidItem.uuid)
+
+    logger.debug("Attempting to link %s accounts from %s to %s", len(accounts), institution_name, current_user.username)
     try:
-        db.commit()
-        db.refresh(new_item)
-        logger.info(f"Successfully added connection from {institution_name} to {current_user.username}")
-        return ItemOut(plaid_item_id=item_id, institution_name = institution_name, uuid=new_item.uuid) # type: ignore
-    except IntegrityError as e:
-        logger.warning(f"Unable to create connection to item due to: {e}")
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error: {e}")
+        item_uuid = await db.scalar(item_stmt)
+        if item_uuid is None:
+            raise HTTPException(status_code=409, detail="Item is already linked to another user")
+
+        account_rows = []
+        for account in accounts:
+            balances = account.get("balances") or {}
+            account_rows.append({
+                "uuid": uuid4(),
+                "plaid_account_id": account["account_id"],
+                "name": account["name"],
+                "official_name": account.get("official_name"),
+                "type": account["type"],
+                "subtype": account.get("subtype"),
+                "mask": account.get("mask"),
+                "last_balance": balances.get("current"),
+                "last_sync": now,
+                "plaid_item_uuid": item_uuid,
+            })
+
+        saved_accounts = []
+        if account_rows:
+            account_stmt = insert(PlaidAccount).values(account_rows)
+            account_stmt = account_stmt.on_conflict_do_update(
+                index_elements=[PlaidAccount.plaid_account_id],
+                set_={
+                    column: account_stmt.excluded[column]
+                    for column in ("name", "official_name", "type", "subtype", "mask", "last_balance", "last_sync", "plaid_item_uuid")
+                }
+            ).returning(
+                PlaidAccount.name,
+                PlaidAccount.uuid,
+                PlaidAccount.type,
+                PlaidAccount.plaid_item_uuid,
+                PlaidAccount.last_balance,
+                PlaidAccount.mask
+            )
+            saved_accounts = (await db.execute(account_stmt)).mappings().all()
+
+        await db.commit()
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        logger.warning(f"Unable to create connection to item due to: {e}")
-        db.rollback()
+        logger.warning("Unable to link item from %s due to: %s", institution_name, e)
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error: {e}")
 
-def create_plaid_account(
-    plaid_account_id: str,
-    name: str,
-    item: ItemOut,
-    type: str,
-    last_balance: float,
-    subtype: str | None = None,
-    mask: str | None = None,
-    db: db_dependency,
-):
-    """
-    Creates a new Plaid account and associates it with the specified Plaid item.
-
-    Args:
-        plaid_account_id (str): The unique Plaid account ID.
-        name (str): The name of the account.
-        item (ItemOut): The Plaid item to associate with the account.
-        type (str): The type of the account (e.g., depository, credit).
-        last_balance (float): The last known balance of the account.
-        subtype (str | None): The subtype of the account (e.g., checking, savings). Defaults to None.
-        mask (str | None): The last four digits of the account number. Defaults to None.
-        db (db_dependency): The database dependency.
+    logger.info("Successfully linked %s accounts from %s to %s", len(saved_accounts), institution_name, current_user.username)
+    item = ItemOut(uuid=item_uuid, plaid_item_id=item_id, institution_name=institution_name)
+    return item, [AccountOut(**account) for account in saved_accounts]
 
-    Returns:
-        AccountOut: The created Plaid account object.
-
-    Raises:
-        HTTPException: If there is an error creating the Plaid account or if the account already
-                      exists for the item.
-    """
-    new_account = PlaidAccount(
-        plaid_account_id = plaid_account_id,
-        name = name,
-        plaid_item_uuid = item.uuid,
-        last_balance = last_balance,
-        last_sync = datetime.datetime.now(datetime.timezone.utc).isoformat(),
-        type = type,
-        subtype = subtype
-        mask = mask
-    )
-
-    db.add(new_account)
-    logger.debug(f"Attempting to add a connection to {name} at {item.institution_name}")
-    try:
-        db.commit()
-        db.refresh(new_account)
-        logger.info(f"Successfully added account {name} at {item.institution_name}")
-        return AccountOut(
-            name=new_account.name,  # type: ignore
-            uuid=new_account.uuid, # type: ignore
-            type=new_account.type, # type: ignore
-            plaid_item_uuid=item.uuid,
-            last_balance = new_account.last_balance # type: ignore
-            mask = new_account.mask # type: ignore
-        )
-    except IntegrityError as e:
-        logger.warning(f"Unable to create connection to account due to: {e}")
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error: {e}")
-    except Exception as e:
-        logger.warning(f"Unable to create connection to account due to: {e}")
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error: {e}")
-
-def get_plaid_accounts(
+async def get_plaid_accounts(
     user: UserOut,
     db: db_dependency
 ):
@@ -143,13 +136,12 @@ def get_plaid_accounts(
         List[AccountOut]: A list of Plaid account objects associated with the user.
     """
     target_user_uuid = user.uuid
-    results = (
-        db.query(PlaidAccount)
+    results = (await db.scalars(
+        select(PlaidAccount)
         .join(PlaidItem, PlaidAccount.plaid_item_uuid == PlaidItem.uuid)
         .join(User, PlaidItem.user_uuid == User.uuid)
-        .filter(User.uuid == target_user_uuid)
-        .all()
-    )
+        .where(User.uuid == target_user_uuid)
+    )).all()
 
     return [
         AccountOut(
@@ -157,6 +149,7 @@ def get_plaid_accounts(
             uuid=account.uuid, # type: ignore
             type=account.type, # type: ignore
             plaid_item_uuid=account.plaid_item_uuid, # type: ignore
-            last_balance=account.last_balance # type: ignore
+            last_balance=account.last_balance, # type: ignore
+            mask=account.mask # type: ignore
         ) for account in results
     ]
\ No newline at end of file
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dotenv import load_dotenv
+
+from fastapi import HTTPException, status
+from app.logger import logger
+from app.metrics import observe_plaid
+
+load_dotenv()
+
+PLAID_MAX_CONCURRENCY = int(os.getenv("PLAID_MAX_CONCURRENCY", "16"))
+PLAID_TIMEOUT_SECONDS = float(os.getenv("PLAID_TIMEOUT_SECONDS", "10"))
+PLAID_CONNECT_TIMEOUT_SECONDS = float(os.getenv("PLAID_CONNECT_TIMEOUT_SECONDS", "3"))
+
+class PlaidGateway:
+    """
+    Async front for the synchronous Plaid SDK client.
+
+    Calls run on a dedicated thread pool, so slow Plaid responses tie up only Plaid
+    threads. The app threadpool and the event loop stay free. A semaphore caps in-flight
+    calls, and every call gets an HTTP timeout plus an overall deadline.
+    Latency is recorded per operation.
+
+    Without a client given, the SDK client from app.plaid.plaid is created on first use,
+    keeping the slow SDK import out of startup.
+
+    Attributes:
+        client: The Plaid client (the SDK's PlaidApi, or a fake with the same methods).
+        timeout (float): Seconds a call may take, including waiting for a free slot.
+        stats (dict): Per-operation call counts, errors, timeouts and latencies.
+    """
+    def __init__(self, plaid_client=None, max_concurrency: int = PLAID_MAX_CONCURRENCY, timeout: float = PLAID_TIMEOUT_SECONDS):
+        self._client = plaid_client
+        self.timeout = timeout
+        self.stats: dict[str, dict] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="plaid")
+
+    @property
+    def client(self):
+        if self._client is None:
+            from app.plaid.plaid import client
+            self._client = client
+        return self._client
+
+    def _record(self, operation: str, elapsed: float, outcome: str):
+        observe_plaid(operation, elapsed, outcome)
+        entry = self.stats.setdefault(operation, {"count": 0, "errors": 0, "timeouts": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        entry["count"] += 1
+        entry["total_seconds"] += elapsed
+        entry["max_seconds"] = max(entry["max_seconds"], elapsed)
+        if outcome == "error":
+            entry["errors"] += 1
+        elif outcome == "timeout":
+            entry["timeouts"] += 1
+
+    async def call(self, operation: str, *args, **kwargs):
+        """
+        Call a Plaid client method without blocking the event loop.
+
+        Args:
+            operation (str): The client method name, e.g. "accounts_get".
+            *args: Positional arguments for the method.
+            **kwargs: Keyword arguments for the method.
+
+        Returns:
+            The method's response.
+
+        Raises:
+            HTTPException: 503 if no slot frees up in time, 504 if Plaid does not answer in time.
+            ApiException: Errors returned by Plaid are passed through unchanged.
+        """
+        if hasattr(self.client, "api_client"):
+            kwargs.setdefault("_request_timeout", (PLAID_CONNECT_TIMEOUT_SECONDS, self.timeout))
+        fn = partial(getattr(self.client, operation), *args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Plaid concurrency limit reached, rejecting %s", operation)
+            self._record(operation, time.perf_counter() - start, "timeout")
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Bank connection service busy")
+
+        outcome = "ok"
+        try:
+            remaining = max(self.timeout - (time.perf_counter() - start), 0.1)
+            loop = asyncio.get_running_loop()
+            return await asyncio.wait_for(loop.run_in_executor(self._executor, fn), timeout=remaining)
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            logger.warning("Plaid %s timed out after %ss", operation, self.timeout)
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Bank connection timed out")
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self._semaphore.release()
+            elapsed = time.perf_counter() - start
+            self._record(operation, elapsed, outcome)
+            logger.debug("Plaid %s finished in %.1fms (%s)", operation, elapsed * 1000, outcome)
+
+    def get_stats(self) -> dict:
+        """
+        Return per-operation latency stats, including the mean latency.
+
+        Returns:
+            dict: Stats keyed by operation name.
+        """
+        return {
+            operation: {**entry, "avg_seconds": entry["total_seconds"] / entry["count"]}
+            for operation, entry in self.stats.items()
+        }
+
+    def preload(self):
+        """
+        Create the SDK client on a Plaid thread, so the first call does not block the event loop on the SDK import.
+        """
+        self._executor.submit(lambda: self.client)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+plaid_gateway = PlaidGateway()
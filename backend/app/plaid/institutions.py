@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import json
+import os
+from dotenv import load_dotenv
+
+from redis.exceptions import RedisError
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.institution_model import Institution
+from app.models.plaid_item_model import PlaidItem
+from app.plaid.gateway import plaid_gateway
+from app.db import db_dependency, session_scope
+from app.logger import logger
+from app.redis import redis_client as redis
+
+load_dotenv()
+
+INSTITUTION_CACHE_TTL = int(os.getenv("INSTITUTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+INSTITUTION_NEGATIVE_TTL = int(os.getenv("INSTITUTION_NEGATIVE_TTL_SECONDS", "600"))
+INSTITUTION_PERSIST = os.getenv("INSTITUTION_PERSIST", "true").lower() == "true"
+INSTITUTION_PREFIX = "institution:"
+MISSING = "__missing__"
+
+# Plaid lookups currently in flight in this worker, so concurrent links to the same bank share one call
+_inflight: dict[str, asyncio.Future] = {}
+
+def _institution_to_dict(institution) -> dict:
+    if hasattr(institution, "to_dict"):
+        institution = institution.to_dict()
+    return {
+        "institution_id": institution["institution_id"],
+        "name": institution["name"],
+        "url": institution.get("url"),
+        "primary_color": institution.get("primary_color"),
+        "logo": institution.get("logo"),
+    }
+
+async def _cache_set(institution_id: str, value: str, ttl: int):
+    try:
+        await redis.setex(f"{INSTITUTION_PREFIX}{institution_id}", ttl, value)
+    except RedisError as e:
+        logger.warning("Institution cache write failed: %s", e)
+
+async def _fetch_from_plaid(institution_id: str) -> dict | None:
+    """
+    Fetch institution metadata from Plaid, negatively caching unknown IDs.
+
+    Args:
+        institution_id (str): The Plaid institution ID.
+
+    Returns:
+        dict | None: The institution metadata, or None if Plaid does not know the institution.
+    """
+    from plaid import ApiException
+    from plaid.model.country_code import CountryCode
+    from plaid.model.institutions_get_by_id_request import InstitutionsGetByIdRequest
+    from plaid.model.institutions_get_by_id_request_options import InstitutionsGetByIdRequestOptions
+
+    request = InstitutionsGetByIdRequest(
+        institution_id=institution_id,
+        country_codes=[CountryCode("US")],
+        options=InstitutionsGetByIdRequestOptions(include_optional_metadata=True)
+    )
+    try:
+        res = await plaid_gateway.call("institutions_get_by_id", request)
+    except ApiException as e:
+        if "INVALID_INSTITUTION" not in str(e.body):
+            raise
+        logger.warning("Plaid does not know institution %s", institution_id)
+        await _cache_set(institution_id, MISSING, INSTITUTION_NEGATIVE_TTL)
+        return None
+
+    data = _institution_to_dict(res["institution"])
+    await _cache_set(institution_id, json.dumps(data), INSTITUTION_CACHE_TTL)
+    return data
+
+async def _save_institution(data: dict, db: db_dependency):
+    stmt = insert(Institution).values(**data)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Institution.institution_id],
+        set_={column: stmt.excluded[column] for column in ("name", "url", "primary_color", "logo", "updated_at")}
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+async def get_institution(
+    institution_id: str,
+    db: db_dependency | None = None
+) -> dict | None:
+    """
+    Get institution metadata, consulting Redis, then Postgres, before calling Plaid.
+
+    Unknown institutions are cached as missing for a short time so repeated lookups do not
+    hit Plaid. Concurrent lookups of the same institution in this worker share one Plaid call.
+
+    Args:
+        institution_id (str): The Plaid institution ID.
+        db (db_dependency | None): The database dependency. Without it, the Postgres tier is skipped.
+
+    Returns:
+        dict | None: The institution's ID, name, url, primary color and logo, or None if unknown.
+    """
+    try:
+        cached = await redis.get(f"{INSTITUTION_PREFIX}{institution_id}")
+    except RedisError as e:
+        logger.warning("Institution cache read failed: %s", e)
+        cached = None
+
+    if cached == MISSING:
+        return None
+    if cached is not None:
+        return json.loads(cached)
+
+    persist = INSTITUTION_PERSIST and db is not None
+    if persist:
+        row = await db.scalar(select(Institution).where(Institution.institution_id == institution_id))
+        if row is not None:
+            data = {
+                "institution_id": row.institution_id,
+                "name": row.name,
+                "url": row.url,
+                "primary_color": row.primary_color,
+                "logo": row.logo,
+            }
+            await _cache_set(institution_id, json.dumps(data), INSTITUTION_CACHE_TTL)
+            return data
+
+    task = _inflight.get(institution_id)
+    if task is None:
+        logger.debug("Institution %s not cached, fetching from Plaid", institution_id)
+        task = asyncio.ensure_future(_fetch_from_plaid(institution_id))
+        _inflight[institution_id] = task
+        task.add_done_callback(lambda _: _inflight.pop(institution_id, None))
+    data = await asyncio.shield(task)
+
+    if data is not None and persist:
+        await _save_institution(data, db)
+    return data
+
+async def warm_institution_cache(
+    limit: int,
+    db: db_dependency
+) -> int:
+    """
+    Preload the institutions our users link most often into the cache.
+
+    Args:
+        limit (int): How many of the most linked institutions to load.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        int: The number of institutions loaded.
+    """
+    top_ids = (await db.scalars(
+        select(PlaidItem.institution_id)
+        .group_by(PlaidItem.institution_id)
+        .order_by(func.count().desc())
+        .limit(limit)
+    )).all()
+
+    loaded = 0
+    for institution_id in top_ids:
+        if await get_institution(institution_id, db) is not None:
+            loaded += 1
+    logger.info("Warmed institution cache with %s of %s institutions", loaded, len(top_ids))
+    return loaded
+
+async def _main(limit: int):
+    async with session_scope() as db:
+        await warm_institution_cache(limit, db)
+    plaid_gateway.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preload the most linked institutions into the institution cache.")
+    parser.add_argument("--top", type=int, default=100, help="Number of institutions to load")
+    args = parser.parse_args()
+    asyncio.run(_main(args.top))
@@ -9,15 +9,21 @@ load_dotenv()
 client_id= os.getenv("PLAID_CLIENT_ID")
 plaid_secret_id= os.getenv("PLAID_SANDBOX_ID") # Sandbox secret for testing
 
-# Configure Plaid to use the Sandbox environment for development/testing
+# Configure Plaid to use the Sandbox environment for development/testing.
+# PLAID_HOST can point at a local fake Plaid server instead.
+PLAID_HOST = os.getenv("PLAID_HOST", plaid.Environment.Sandbox)
+
 configuration = plaid.Configuration(
-    host=plaid.Environment.Sandbox,
+    host=PLAID_HOST,
     api_key={
         'clientId': client_id,
         'secret': plaid_secret_id,
     }
 )
 
+# Keep-alive pool shared by all Plaid calls; sized to the gateway's concurrency limit
+configuration.connection_pool_maxsize = int(os.getenv("PLAID_MAX_CONCURRENCY", "16"))
+
 # Create the API client configuration
 api_client = plaid.ApiClient(configuration)
 
@@ -1,16 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
 from typing import Annotated
+import json
 from app.users.schemas import UserOut
-from app.plaid.schemas import LinkTokenRequest, LinkTokenResponse, ExchangePublicTokenRequest, ExchangePublicTokenResponse
+from app.plaid.schemas import LinkTokenRequest, LinkTokenResponse, ExchangePublicTokenRequest, ExchangePublicTokenResponse, WebhookResponse
 
-from app.plaid.crud import create_plaid_item, create_plaid_account, get_plaid_accounts
-from app.plaid.utils import create_link_token
+from app.plaid.crud import create_plaid_item_with_accounts, get_plaid_accounts
+from app.plaid.utils import create_link_token, get_item_details
+from app.plaid.webhooks import PLAID_WEBHOOK_VERIFY, verify_webhook, handle_webhook
 from app.sessions.dependencies import get_current_session
-from app.db import db_dependency
+from app.db import db_dependency, read_db_dependency
 from app.logger import logger
-from app.plaid.plaid import client
+from app.plaid.gateway import plaid_gateway
 
-# Plaid routes (plaid link token, exchange public token, and get accounts.)
+# Plaid routes (plaid link token, exchange public token, get accounts, and webhooks.)
 router = APIRouter(
     prefix='/plaid',
     tags=['plaid']
@@ -33,7 +35,7 @@ async def create_plaid_link_token(
         HTTPException: If there is an error creating the link token.
     """
     try:
-        link_token = create_link_token(current_user.uuid)
+        link_token = await create_link_token(current_user.uuid)
         return LinkTokenResponse(link_token=link_token)
     except Exception as e:
         logger.warning(str(e))
@@ -59,55 +61,42 @@ async def exchange_public_token(
     Raises:
         HTTPException: If there is an error exchanging the public token or creating the Plaid item"""
     try: 
-        exchange_res = client.item_public_token_exchange(
+        exchange_res = await plaid_gateway.call(
+            "item_public_token_exchange",
             item_public_token_exchange_request={"public_token": req.public_token}
         )
         access_token = exchange_res.access_token
         item_id = exchange_res.item_id
 
-        item = create_plaid_item(
-            item_id= item_id, 
-            access_token=access_token, 
-            current_user=current_user, 
+        institution_id, institution_name, accounts = await get_item_details(access_token, db)
+
+        await create_plaid_item_with_accounts(
+            item_id=item_id,
+            access_token=access_token,
+            institution_id=institution_id,
+            institution_name=institution_name,
+            accounts=accounts,
+            current_user=current_user,
             db=db
         )
-
-        accounts_response = client.accounts_get({
-            "access_token": access_token
-        })
-        accounts = accounts_response['accounts']
-
-        plaid_accounts = []
-        for account in accounts:
-            balances = account.get("balances", {})
-            current_balance = balances.get("current")
-            plaid_account = create_plaid_account(
-                plaid_account_id=account.get('account_id'),
-                name=account.get('name'),
-                item=item,
-                type=account.get('type'),
-                subtype=account.get('subtype'),
-                last_balance=current_balance,
-                mask=account.get('mask'),
-                db=db
-            )
-            plaid_accounts.append(plaid_account)
             
         return ExchangePublicTokenResponse(message="Accounts linked successfully")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/get_accounts")
 async def get_accounts(
     current_user: Annotated[UserOut, Depends(get_current_session)],
-    db: db_dependency
+    db: read_db_dependency
 ):
     """
     Endpoint to retrieve all Plaid accounts for the current user.
     
     Args:
         current_user (UserOut): The authenticated user from current session.
-        db (db_dependency): The database dependency.
+        db (read_db_dependency): The read-only database dependency.
     
     Returns:
         List[ItemOut]: A list of Plaid accounts associated with the user.
@@ -116,7 +105,40 @@ async def get_accounts(
         HTTPException: If there is an error retrieving the accounts.
     """
     try:
-        res = get_plaid_accounts(current_user, db)
+        res = await get_plaid_accounts(current_user, db)
         return res
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/webhook")
+async def plaid_webhook(
+    request: Request,
+    db: db_dependency,
+    plaid_verification: Annotated[str | None, Header()] = None
+):
+    """
+    Endpoint for Plaid webhooks. Transaction updates are queued for the sync workers and item
+    errors recorded on the item, so the request is acknowledged without waiting on Plaid.
+
+    Args:
+        request (Request): The raw request, whose body is checked against the signature.
+        db (db_dependency): The database dependency.
+        plaid_verification (str | None): The Plaid-Verification JWT header.
+
+    Returns:
+        WebhookResponse: The response indicating what was done with the webhook.
+
+    Raises:
+        HTTPException: If the signature is invalid or the body is not JSON.
+    """
+    body = await request.body()
+    if PLAID_WEBHOOK_VERIFY:
+        await verify_webhook(body, plaid_verification)
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid webhook body")
+
+    result = await handle_webhook(payload, db)
+    logger.debug("Plaid webhook %s/%s for item %s: %s", payload.get('webhook_type'), payload.get('webhook_code'), payload.get('item_id'), result)
+    return WebhookResponse(message=result)
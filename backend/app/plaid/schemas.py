@@ -36,6 +36,15 @@ class ExchangePublicTokenResponse(BaseModel):
         message (str): A message indicating the result of the exchange."""
     message: str
 
+class WebhookResponse(BaseModel):
+    """
+    Model for the acknowledgement of a Plaid webhook.
+
+    Attributes:
+        message (str): What was done with the webhook (queued, deduplicated, updated or ignored).
+    """
+    message: str
+
 class ItemOut(BaseModel):
     """
     Model for that reveals the details of a Plaid item.
@@ -52,5 +61,5 @@ class AccountOut(BaseModel):
     uuid: UUID
     type: str
     plaid_item_uuid: UUID
-    last_balance: float
-    mask: str
\ No newline at end of file
+    last_balance: float | None = None
+    mask: str | None = None
\ No newline at end of file
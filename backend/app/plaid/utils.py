@@ -1,17 +1,11 @@
+import asyncio
 from uuid import UUID
-from app.plaid.plaid import client
-from plaid.model.link_token_create_request import LinkTokenCreateRequest
-from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
-from plaid.model.link_token_transactions import LinkTokenTransactions
-from plaid.model.link_token_account_filters import LinkTokenAccountFilters
-from plaid.model.depository_filter import DepositoryFilter
-from plaid.model.depository_account_subtypes import DepositoryAccountSubtypes
-from plaid.model.depository_account_subtype import DepositoryAccountSubtype
-from plaid.model.credit_filter import CreditFilter
-from plaid.model.credit_account_subtypes import CreditAccountSubtypes
-from plaid.model.credit_account_subtype import CreditAccountSubtype
-
-def create_link_token(user_uuid: UUID):
+from app.plaid.gateway import plaid_gateway
+from app.plaid.institutions import get_institution
+from app.plaid.webhooks import PLAID_WEBHOOK_URL
+from app.db import db_dependency
+
+async def create_link_token(user_uuid: UUID):
     """
     Creates a Plaid link token for the specified user.
     
@@ -21,6 +15,18 @@ def create_link_token(user_uuid: UUID):
     Returns:
         str: The generated Plaid link token.
     """
+    # The Plaid SDK models are slow to import, so they load on first use rather than at startup
+    from plaid.model.link_token_create_request import LinkTokenCreateRequest
+    from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
+    from plaid.model.link_token_transactions import LinkTokenTransactions
+    from plaid.model.link_token_account_filters import LinkTokenAccountFilters
+    from plaid.model.depository_filter import DepositoryFilter
+    from plaid.model.depository_account_subtypes import DepositoryAccountSubtypes
+    from plaid.model.depository_account_subtype import DepositoryAccountSubtype
+    from plaid.model.credit_filter import CreditFilter
+    from plaid.model.credit_account_subtypes import CreditAccountSubtypes
+    from plaid.model.credit_account_subtype import CreditAccountSubtype
+
     req = LinkTokenCreateRequest(
         user = LinkTokenCreateRequestUser(
             client_user_id=str(user_uuid)
@@ -46,5 +52,43 @@ def create_link_token(user_uuid: UUID):
             )
         )
     )
-    res = client.link_token_create(req)
-    return res.link_token
\ No newline at end of file
+    if PLAID_WEBHOOK_URL:
+        req.webhook = PLAID_WEBHOOK_URL
+    res = await plaid_gateway.call("link_token_create", req)
+    return res.link_token
+
+async def get_item_institution(access_token: str, db: db_dependency) -> tuple[str, str]:
+    """
+    Looks up the institution an item belongs to, using the shared institution cache.
+
+    Args:
+        access_token (str): The Plaid access token for the item.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        tuple[str, str]: The institution ID and name.
+    """
+    item_res = await plaid_gateway.call("item_get", {"access_token": access_token})
+    institution_id = item_res["item"]["institution_id"]
+    institution = await get_institution(institution_id, db)
+    return institution_id, institution["name"] if institution else "Unknown institution"
+
+async def get_item_details(access_token: str, db: db_dependency) -> tuple[str, str, list[dict]]:
+    """
+    Fetches everything needed to link a new item, running independent Plaid calls concurrently.
+
+    The institution lookup (item_get, then institutions_get_by_id) runs alongside accounts_get,
+    so linking takes as long as the slower of the two instead of all three calls in sequence.
+
+    Args:
+        access_token (str): The Plaid access token for the item.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        tuple[str, str, list[dict]]: The institution ID, institution name and the item's accounts.
+    """
+    (institution_id, institution_name), accounts_res = await asyncio.gather(
+        get_item_institution(access_token, db),
+        plaid_gateway.call("accounts_get", {"access_token": access_token})
+    )
+    return institution_id, institution_name, accounts_res.to_dict()["accounts"]
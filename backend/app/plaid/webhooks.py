@@ -0,0 +1,195 @@
+import hashlib
+import hmac
+import os
+import time
+from dotenv import load_dotenv
+
+import jwt
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy import update
+
+from app.models.plaid_item_model import PlaidItem
+from app.plaid.gateway import plaid_gateway
+from app.worker.queue import enqueue
+from app.db import db_dependency
+from app.logger import logger
+from app.redis import redis_client as redis
+
+load_dotenv()
+
+PLAID_WEBHOOK_URL = os.getenv("PLAID_WEBHOOK_URL")
+PLAID_WEBHOOK_VERIFY = os.getenv("PLAID_WEBHOOK_VERIFY", "true").lower() == "true"
+PLAID_WEBHOOK_MAX_AGE = 5 * 60
+# Safety net only: the pending marker is normally cleared when a worker picks the job up
+WEBHOOK_PENDING_TTL = int(os.getenv("PLAID_WEBHOOK_PENDING_TTL_SECONDS", "3600"))
+# How long a key ID Plaid rejected is refused without asking Plaid again
+UNKNOWN_KEY_TTL = int(os.getenv("PLAID_WEBHOOK_UNKNOWN_KEY_TTL_SECONDS", "300"))
+
+# Webhook codes that mean new transaction data is ready to pull with /transactions/sync
+SYNC_CODES = {
+    ("TRANSACTIONS", "SYNC_UPDATES_AVAILABLE"),
+    ("TRANSACTIONS", "INITIAL_UPDATE"),
+    ("TRANSACTIONS", "HISTORICAL_UPDATE"),
+    ("TRANSACTIONS", "DEFAULT_UPDATE"),
+    ("TRANSACTIONS", "TRANSACTIONS_REMOVED"),
+}
+# Item webhook codes after which the user has to go through Link update mode
+REAUTH_CODES = {"PENDING_EXPIRATION", "PENDING_DISCONNECT", "USER_PERMISSION_REVOKED", "USER_ACCOUNT_REVOKED"}
+REAUTH_ERRORS = {"ITEM_LOGIN_REQUIRED", "PENDING_EXPIRATION", "ACCESS_NOT_GRANTED", "INVALID_CREDENTIALS"}
+
+# Plaid's webhook signing keys by key ID. Keys rotate rarely, so they are fetched once per worker.
+_verification_keys: dict[str, jwt.PyJWK] = {}
+# Key IDs Plaid did not return a key for, with the monotonic time until which they are refused
+_unknown_key_ids: dict[str, float] = {}
+
+def pending_key(item_id: str, webhook_code: str) -> str:
+    return f"plaid_webhook:pending:{item_id}:{webhook_code}"
+
+def _remember_unknown_key(key_id: str):
+    now = time.monotonic()
+    for stale in [kid for kid, until in _unknown_key_ids.items() if until <= now]:
+        del _unknown_key_ids[stale]
+    _unknown_key_ids[key_id] = now + UNKNOWN_KEY_TTL
+
+async def _verification_key(key_id: str) -> jwt.PyJWK:
+    """
+    Look up Plaid's webhook signing key for a key ID, fetching it from Plaid on first use.
+
+    The key ID comes from an unauthenticated request, so IDs Plaid rejects are refused
+    without another Plaid call until UNKNOWN_KEY_TTL passes.
+
+    Args:
+        key_id (str): The kid from the Plaid-Verification header.
+
+    Returns:
+        jwt.PyJWK: The signing key.
+
+    Raises:
+        HTTPException: 401 if Plaid does not know the key or the key has expired.
+    """
+    key = _verification_keys.get(key_id)
+    if key is not None:
+        return key
+    if _unknown_key_ids.get(key_id, 0) > time.monotonic():
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    from plaid import ApiException
+    from plaid.model.webhook_verification_key_get_request import WebhookVerificationKeyGetRequest
+    try:
+        res = await plaid_gateway.call(
+            "webhook_verification_key_get",
+            WebhookVerificationKeyGetRequest(key_id=key_id)
+        )
+    except ApiException as e:
+        logger.warning("Plaid returned no webhook key for kid %s: %s", key_id, e.status)
+        _remember_unknown_key(key_id)
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    jwk = res["key"].to_dict() if hasattr(res["key"], "to_dict") else res["key"]
+    if jwk.get("expired_at"):
+        _remember_unknown_key(key_id)
+        raise HTTPException(status_code=401, detail="Webhook signed with an expired key")
+    key = jwt.PyJWK({field: jwk[field] for field in ("kty", "crv", "x", "y", "alg", "use", "kid")})
+    _verification_keys[key_id] = key
+    return key
+
+async def verify_webhook(body: bytes, token: str | None):
+    """
+    Check the Plaid-Verification JWT of a webhook against Plaid's signing key and the raw body.
+
+    Args:
+        body (bytes): The raw request body.
+        token (str | None): The Plaid-Verification header.
+
+    Raises:
+        HTTPException: If the signature is missing, invalid, stale or does not match the body.
+    """
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing webhook signature")
+    try:
+        header = jwt.get_unverified_header(token)
+        if header.get("alg") != "ES256" or "kid" not in header:
+            raise HTTPException(status_code=401, detail="Invalid webhook signature")
+        key = await _verification_key(header["kid"])
+        claims = jwt.decode(token, key, algorithms=["ES256"])
+    except jwt.PyJWTError as e:
+        logger.warning("Rejected Plaid webhook: %s", e)
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    if time.time() - claims.get("iat", 0) > PLAID_WEBHOOK_MAX_AGE:
+        raise HTTPException(status_code=401, detail="Stale webhook")
+    if not hmac.compare_digest(hashlib.sha256(body).hexdigest(), claims.get("request_body_sha256", "")):
+        raise HTTPException(status_code=401, detail="Webhook body does not match signature")
+
+async def enqueue_item_sync(item_id: str, webhook_code: str) -> bool:
+    """
+    Queue a transactions sync for an item unless one for the same webhook code is already waiting.
+
+    The pending marker is removed when a sync worker picks the job up, so a webhook that
+    arrives while a sync is running still queues another pass.
+
+    Args:
+        item_id (str): The Plaid item ID.
+        webhook_code (str): The webhook code that triggered the sync.
+
+    Returns:
+        bool: True if a job was queued, False if it was deduplicated.
+    """
+    key = pending_key(item_id, webhook_code)
+    if not await redis.set(key, "1", nx=True, ex=WEBHOOK_PENDING_TTL):
+        logger.debug("Sync for item %s already queued by %s", item_id, webhook_code)
+        return False
+    try:
+        await enqueue("plaid_sync", {"item_id": item_id, "webhook_code": webhook_code})
+    except RedisError:
+        await redis.delete(key)
+        raise
+    return True
+
+async def handle_webhook(
+    payload: dict,
+    db: db_dependency
+) -> str:
+    """
+    Act on a Plaid webhook. Syncs are queued for the workers; item status changes are written directly.
+
+    Args:
+        payload (dict): The webhook body.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        str: What was done with the webhook, for logging.
+    """
+    webhook_type = payload.get("webhook_type")
+    webhook_code = payload.get("webhook_code")
+    item_id = payload.get("item_id")
+    if not item_id:
+        return "ignored"
+
+    if (webhook_type, webhook_code) in SYNC_CODES:
+        return "queued" if await enqueue_item_sync(item_id, webhook_code) else "deduplicated"
+
+    if webhook_type != "ITEM":
+        return "ignored"
+
+    error = payload.get("error") or {}
+    if webhook_code == "ERROR":
+        error_code = error.get("error_code")
+        values = {"last_error": error.get("error_message") or error_code}
+        if error_code in REAUTH_ERRORS:
+            values["needs_reauth"] = True
+    elif webhook_code in REAUTH_CODES:
+        values = {"needs_reauth": True, "last_error": webhook_code}
+    elif webhook_code == "LOGIN_REPAIRED":
+        values = {"needs_reauth": False, "last_error": None}
+    else:
+        return "ignored"
+
+    await db.execute(update(PlaidItem).where(PlaidItem.plaid_item_id == item_id).values(**values))
+    await db.commit()
+    logger.info("Updated Plaid item %s after %s webhook", item_id, webhook_code)
+
+    if webhook_code == "LOGIN_REPAIRED":
+        await enqueue_item_sync(item_id, "LOGIN_REPAIRED")
+    return "updated"
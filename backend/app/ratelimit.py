@@ -0,0 +1,133 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+from dotenv import load_dotenv
+
+import jwt
+from fastapi import HTTPException, Request
+from redis.exceptions import RedisError
+
+from app.logger import logger
+from app.redis import redis_client as redis
+
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_SHADOW_SIZE = int(os.getenv("RATE_LIMIT_SHADOW_SIZE", "10000"))
+RATE_LIMIT_PREFIX = "rate:"
+SECRET_KEY = os.getenv("SECRET_KEY")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+
+# GCRA: the key holds the theoretical arrival time (TAT) in ms. A request is allowed if
+# the TAT, advanced by one emission interval, is at most one period ahead of now.
+# Uses the Redis clock so every API worker agrees on the time.
+# KEYS[1] = limiter key, ARGV[1] = emission interval ms, ARGV[2] = period ms
+# Returns {allowed, retry after ms}
+_GCRA = redis.register_script("""
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+local new_tat = tat + interval
+if new_tat - period > now then
+    return {0, new_tat - period - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0}
+""")
+
+async def client_ip(request: Request) -> str:
+    return f"ip:{request.client.host}"
+
+async def bearer_user(request: Request) -> str:
+    """
+    Key by the username in the bearer token, falling back to the client IP without a valid token.
+    The token is only decoded, never looked up, so keying costs no round trip.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"user:{jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])['sub']}"
+        except (jwt.PyJWTError, KeyError):
+            pass
+    return await client_ip(request)
+
+class RateLimit:
+    """
+    Rate limit of times requests per seconds, enforced with one atomic GCRA script call per check.
+
+    Used as a route dependency keyed by a key function, or called directly with hit() for
+    keys only known inside the route, such as an email hash. Rejections are remembered in
+    a bounded in-process shadow table until the client may retry, so clients hammering a
+    limit are turned away without touching Redis. The shadow table can only reject early
+    requests that Redis would reject too, since the allowed time never moves earlier.
+
+    Attributes:
+        name (str): Limiter name, part of the Redis key.
+        times (int): Requests allowed per period.
+        seconds (float): The period.
+        key (Callable): Async function mapping a request to the identity being limited.
+    """
+    def __init__(
+        self,
+        name: str,
+        times: int,
+        seconds: float,
+        key: Callable[[Request], Awaitable[str]] = client_ip
+    ):
+        self.name = name
+        self.times = times
+        self.seconds = seconds
+        self.key = key
+        self.interval_ms = int(seconds * 1000 / times)
+        self.period_ms = int(seconds * 1000)
+        self._blocked: OrderedDict[str, float] = OrderedDict()
+
+    async def __call__(self, request: Request):
+        await self.hit(await self.key(request))
+
+    def _reject(self, identity: str, retry_after: float):
+        logger.warning("Rate limit %s exceeded for %s", self.name, identity)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests. Try again later.",
+            headers={"Retry-After": str(max(1, round(retry_after)))}
+        )
+
+    async def hit(self, identity: str):
+        """
+        Count one request for an identity.
+
+        Args:
+            identity (str): Who the request is attributed to, e.g. ip:1.2.3.4 or user:alice.
+
+        Raises:
+            HTTPException: 429 with Retry-After if the identity is over the limit.
+        """
+        if not RATE_LIMIT_ENABLED:
+            return
+
+        blocked_until = self._blocked.get(identity)
+        if blocked_until is not None:
+            remaining = blocked_until - time.monotonic()
+            if remaining > 0:
+                self._reject(identity, remaining)
+            del self._blocked[identity]
+
+        try:
+            allowed, retry_after_ms = await _GCRA(
+                keys=[f"{RATE_LIMIT_PREFIX}{self.name}:{identity}"],
+                args=[self.interval_ms, self.period_ms]
+            )
+        except RedisError as e:
+            # Fail open: an unavailable Redis should not lock everyone out of login
+            logger.warning("Rate limit %s check failed: %s", self.name, e)
+            return
+
+        if not allowed:
+            self._blocked[identity] = time.monotonic() + retry_after_ms / 1000
+            while len(self._blocked) > RATE_LIMIT_SHADOW_SIZE:
+                self._blocked.popitem(last=False)
+            self._reject(identity, retry_after_ms / 1000)
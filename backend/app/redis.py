@@ -1,15 +1,41 @@
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
 import os
+import time
 from dotenv import load_dotenv
 
+from app.metrics import observe_redis
+
 load_dotenv()
 
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
 
+class InstrumentedRedis(Redis):
+    """
+    Redis client that times every command for /metrics. Pipelines are timed as one PIPELINE call.
+    """
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            observe_redis(str(args[0]).upper(), time.perf_counter() - start)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> "InstrumentedPipeline":
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            observe_redis("PIPELINE", time.perf_counter() - start)
+
 # Create a Redis client instance
-redis_client = Redis.from_url(
+redis_client = InstrumentedRedis.from_url(
     os.getenv("REDIS_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"),
     decode_responses = True # Ensure strings are returned instead of bytes
 )
\ No newline at end of file
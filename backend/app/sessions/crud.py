@@ -0,0 +1,124 @@
+import uuid
+import os
+from dotenv import load_dotenv
+
+from app.logger import logger
+from app.redis import redis_client as redis
+
+load_dotenv()
+
+SESSION_TTL = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+
+# Every session lives at session:{id} -> username, and each user has a set
+# user_sessions:{username} of their session ids. The index shares the session TTL
+# and is refreshed on every new session, so it expires with the user's last session.
+SESSION_PREFIX = "session:"
+USER_SESSIONS_PREFIX = "user_sessions:"
+
+# KEYS[1] = session key, ARGV[1] = user index prefix, ARGV[2] = session id
+_DELETE_SESSION = redis.register_script("""
+local username = redis.call('GET', KEYS[1])
+if username then
+    redis.call('DEL', KEYS[1])
+    redis.call('SREM', ARGV[1] .. username, ARGV[2])
+end
+return username
+""")
+
+# KEYS[1] = user index key, ARGV[1] = session prefix
+_LIST_SESSIONS = redis.register_script("""
+local live = {}
+for _, id in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+    if redis.call('EXISTS', ARGV[1] .. id) == 1 then
+        table.insert(live, id)
+    else
+        redis.call('SREM', KEYS[1], id)
+    end
+end
+return live
+""")
+
+# KEYS[1] = user index key, ARGV[1] = session prefix
+_REVOKE_SESSIONS = redis.register_script("""
+local ids = redis.call('SMEMBERS', KEYS[1])
+for _, id in ipairs(ids) do
+    redis.call('DEL', ARGV[1] .. id)
+end
+redis.call('DEL', KEYS[1])
+return #ids
+""")
+
+def session_key(session_id: str) -> str:
+    return f"{SESSION_PREFIX}{session_id}"
+
+def user_sessions_key(username: str) -> str:
+    return f"{USER_SESSIONS_PREFIX}{username}"
+
+async def create_session_record(username: str) -> str:
+    """
+    Create a new session for the user and add it to the user's session index.
+
+    Args:
+        username (str): The username the session belongs to.
+
+    Returns:
+        str: The new session ID.
+    """
+    session_id = str(uuid.uuid4())
+    index_key = user_sessions_key(username)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.setex(session_key(session_id), SESSION_TTL, username)
+        pipe.sadd(index_key, session_id)
+        pipe.expire(index_key, SESSION_TTL)
+        await pipe.execute()
+    return session_id
+
+async def delete_session_record(session_id: str) -> str | None:
+    """
+    Delete a single session and remove it from its user's session index.
+
+    Args:
+        session_id (str): The session ID to delete.
+
+    Returns:
+        str | None: The username the session belonged to, or None if it did not exist.
+    """
+    return await _DELETE_SESSION(keys=[session_key(session_id)], args=[USER_SESSIONS_PREFIX, session_id])
+
+async def list_user_sessions(username: str) -> list[str]:
+    """
+    List the live session IDs of a user, pruning expired entries from the index.
+
+    Args:
+        username (str): The username whose sessions to list.
+
+    Returns:
+        list[str]: The IDs of the user's live sessions.
+    """
+    return await _LIST_SESSIONS(keys=[user_sessions_key(username)], args=[SESSION_PREFIX])
+
+async def count_user_sessions(username: str) -> int:
+    """
+    Count the live sessions of a user.
+
+    Args:
+        username (str): The username whose sessions to count.
+
+    Returns:
+        int: The number of live sessions.
+    """
+    return len(await list_user_sessions(username))
+
+async def revoke_user_sessions(username: str) -> int:
+    """
+    Delete every session belonging to a user along with the user's session index.
+
+    Args:
+        username (str): The username whose sessions to revoke.
+
+    Returns:
+        int: The number of index entries removed.
+    """
+    revoked = await _REVOKE_SESSIONS(keys=[user_sessions_key(username)], args=[SESSION_PREFIX])
+    logger.info("Revoked %s sessions for user %s", revoked, username)
+    return revoked
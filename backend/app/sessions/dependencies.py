@@ -5,30 +5,31 @@ from app.auth.schemas import *
 
 from app.users.crud import get_user_by_username
 from app.logger import logger
-from app.db import db_dependency
+from app.db import read_db_dependency
 from app.redis import redis_client as redis
+from app.sessions.crud import session_key
 
 async def get_current_session(
-    db: db_dependency,
+    db: read_db_dependency,
     session_id: Annotated[str | None, Cookie()] = None
 ) -> UserOut:
     if session_id is None:
         logger.warning("Session cookie missing")
         raise HTTPException(status_code=401, detail="Session cookie missing")
     
-    logger.debug(f"Attempting to retrieve session for ID: {session_id}")
-    username = await redis.get(f"session:{session_id}")
+    logger.debug("Attempting to retrieve session for ID: %s", session_id)
+    username = await redis.get(session_key(session_id))
     
     if not username:
-        logger.warning(f"No active session found for session ID: {session_id}")
+        logger.warning("No active session found for session ID: %s", session_id)
         raise HTTPException(status_code=401, detail="Session expired/invalid")
     
-    logger.debug(f"Session ID {session_id} mapped to username: {username}")
-    user = get_user_by_username(username, db)
+    logger.debug("Session ID %s mapped to username: %s", session_id, username)
+    user = await get_user_by_username(username, db)
 
     if not user:
-        logger.warning(f"User not found for username: {username}")
+        logger.warning("User not found for username: %s", username)
         raise HTTPException(status_code=404, detail="User not found")
 
-    logger.info(f"Valid session session found for user {user.username}")
+    logger.info("Valid session session found for user %s", user.username)
     return UserOut.model_validate(user)
\ No newline at end of file
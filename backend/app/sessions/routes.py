@@ -1,17 +1,18 @@
-import uuid
 import os
 from dotenv import load_dotenv
 
 from fastapi import APIRouter, HTTPException, Depends, Response, Cookie
-from fastapi_limiter.depends import RateLimiter
 from typing import Annotated
 from app.sessions.schemas import *
 from app.users.schemas import UserOut
 
 from app.auth.dependencies import get_current_active_user
+from app.sessions.dependencies import get_current_session
+from app.sessions.crud import SESSION_TTL, session_key, create_session_record, delete_session_record, revoke_user_sessions
 from app.users.crud import get_user_by_username
 
-from app.db import db_dependency
+from app.ratelimit import RateLimit, bearer_user
+from app.db import read_db_dependency
 from app.logger import logger
 from app.redis import redis_client as redis
 
@@ -27,15 +28,17 @@ router = APIRouter(
     tags=['session']
 )
 
-@router.post("/create", dependencies=[Depends(RateLimiter(times=3, minutes=1))])
+create_session_limit = RateLimit("session_create", times=3, seconds=60, key=bearer_user)
+check_session_limit = RateLimit("session_check", times=3, seconds=60)
+
+@router.post("/create", dependencies=[Depends(create_session_limit)])
 async def create_session(
     response: Response,
     current_user: Annotated[UserOut, Depends(get_current_active_user)]
 ):
-    logger.debug(f"Creating session for user: {current_user.username}")
+    logger.debug("Creating session for user: %s", current_user.username)
 
-    session_id = str(uuid.uuid4())
-    await redis.setex(f"session:{session_id}", 3600, str(current_user.username))
+    session_id = await create_session_record(str(current_user.username))
 
     response.set_cookie(
         key="session_id",
@@ -43,15 +46,15 @@ async def create_session(
         httponly=True,
         secure=True,
         samesite="strict",
-        max_age=3600 
+        max_age=SESSION_TTL
     )
 
-    logger.info(f"Session created for user {current_user.username}")
+    logger.info("Session created for user %s", current_user.username)
     return SessionResponse(message= "Session created", success=True)
 
-@router.get("", dependencies=[Depends(RateLimiter(times=3, minutes=1))])
+@router.get("", dependencies=[Depends(check_session_limit)])
 async def check_session(
-    db: db_dependency, 
+    db: read_db_dependency, 
     session_id: str | None = Cookie(default=None)
 ):
     logger.debug("Checking session id")
@@ -60,14 +63,14 @@ async def check_session(
         raise HTTPException(status_code=401, detail="Missing session cookie")
     
     logger.debug("Checking Redis for session id")
-    username = await redis.get(f"session:{session_id}")
+    username = await redis.get(session_key(session_id))
     if not username: 
         logger.warning("invalid or expired session")
         raise HTTPException(status_code=401, detail="Invalid or expired session")
     
     logger.debug("Searching for userdata")
-    user = get_user_by_username(username, db)
-    logger.info(f"Session verified for user {user.username}")
+    user = await get_user_by_username(username, db)
+    logger.info("Session verified for user %s", user.username)
 
     return {
         "uuid": str(user.uuid),
@@ -83,6 +86,27 @@ async def logout(
 ):
     logger.debug("logging out")
     response.delete_cookie(key="session_id")
-    await redis.delete(f"session:{session_id}")
+    await delete_session_record(session_id)
     logger.info("Successfully logged out")
-    return SessionResponse(message= "Logged Out", success=True)
\ No newline at end of file
+    return SessionResponse(message= "Logged Out", success=True)
+
+@router.post("/logout_all")
+async def logout_all(
+    response: Response,
+    current_user: Annotated[UserOut, Depends(get_current_session)]
+):
+    """
+    Log the current user out of every device by revoking all of their sessions.
+
+    Args:
+        response (Response): The response used to clear the session cookie.
+        current_user (UserOut): The authenticated user from current session.
+
+    Returns:
+        SessionResponse: A response indicating how many sessions were revoked.
+    """
+    logger.debug("Logging out all sessions for user %s", current_user.username)
+    response.delete_cookie(key="session_id")
+    revoked = await revoke_user_sessions(current_user.username)
+    logger.info("Logged out %s sessions for user %s", revoked, current_user.username)
+    return SessionResponse(message= f"Logged out of {revoked} sessions", success=True)
\ No newline at end of file
@@ -0,0 +1,312 @@
+import datetime
+from dataclasses import dataclass
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, func, cast, literal, BigInteger, Integer
+
+from app.models.plaid_account_model import PlaidAccount
+from app.models.transactions_model import Transaction
+from app.transactions.rollups import UNCATEGORIZED
+from app.transactions.schemas import CashFlowAnalytics, CategoryTotals, AccountBalances
+from app.db import db_dependency
+from app.logger import logger
+
+EPOCH = datetime.date(1970, 1, 1)
+
+@dataclass(frozen=True)
+class TransactionArrays:
+    """
+    A user's transactions as columns, sorted by date.
+
+    Amounts are integer cents with Plaid's sign, so positive values are money leaving the
+    account. Categories and accounts are stored as codes into the labels arrays.
+
+    Attributes:
+        dates (np.ndarray): datetime64[D] dates.
+        amounts (np.ndarray): int64 amounts in cents.
+        category_codes (np.ndarray): intp indexes into categories.
+        categories (np.ndarray): Category labels.
+        account_codes (np.ndarray): intp indexes into accounts.
+        accounts (np.ndarray): Plaid account UUIDs.
+    """
+    dates: np.ndarray
+    amounts: np.ndarray
+    category_codes: np.ndarray
+    categories: np.ndarray
+    account_codes: np.ndarray
+    accounts: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+def factorize(values: list) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Encode values as integer codes in order of first appearance.
+
+    A dict lookup per value is much faster than np.unique on object arrays such as UUIDs,
+    which has to sort Python objects.
+
+    Args:
+        values (list): The values to encode.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The distinct labels and the intp code of each value.
+    """
+    index: dict = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.intp, count=len(values))
+    labels = np.empty(len(index), dtype=object)
+    labels[:] = list(index)
+    return labels, codes
+
+def arrays_from_columns(
+    days: list[int],
+    cents: list[int],
+    categories: list[str],
+    accounts: list
+) -> TransactionArrays:
+    """
+    Build TransactionArrays from plain columns already sorted by date.
+
+    Args:
+        days (list[int]): Dates as days since 1970-01-01.
+        cents (list[int]): Amounts in cents.
+        categories (list[str]): Category of each transaction.
+        accounts (list): Plaid account UUID of each transaction.
+
+    Returns:
+        TransactionArrays: The columnar transactions.
+    """
+    category_labels, category_codes = factorize(categories)
+    account_labels, account_codes = factorize(accounts)
+    return TransactionArrays(
+        dates=np.asarray(days, dtype=np.int64).view("datetime64[D]"),
+        amounts=np.asarray(cents, dtype=np.int64),
+        category_codes=category_codes,
+        categories=category_labels,
+        account_codes=account_codes,
+        accounts=account_labels,
+    )
+
+async def load_transaction_arrays(
+    user_uuid: UUID,
+    db: db_dependency,
+    start_date: datetime.date | None = None,
+    end_date: datetime.date | None = None
+) -> TransactionArrays:
+    """
+    Load a user's transactions as columnar arrays.
+
+    Dates and amounts are converted to integers by Postgres, so no date or Decimal objects
+    are created per row and the columns go straight into NumPy arrays.
+
+    Args:
+        user_uuid (UUID): The UUID of the user.
+        db (db_dependency): The database dependency.
+        start_date (datetime.date | None): Only transactions on or after this date.
+        end_date (datetime.date | None): Only transactions on or before this date.
+
+    Returns:
+        TransactionArrays: The user's transactions, sorted by date.
+    """
+    stmt = (
+        select(
+            cast(Transaction.date - literal(EPOCH), Integer),
+            cast(func.round(Transaction.amount * 100), BigInteger),
+            func.coalesce(Transaction.category, literal(UNCATEGORIZED)),
+            Transaction.plaid_account_uuid,
+        )
+        .where(Transaction.user_uuid == user_uuid)
+        .order_by(Transaction.date, Transaction.id)
+    )
+    if start_date is not None:
+        stmt = stmt.where(Transaction.date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(Transaction.date <= end_date)
+
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        return arrays_from_columns([], [], [], [])
+    arrays = arrays_from_columns(*zip(*rows))
+    logger.debug("Loaded %s transactions for analytics of user %s", len(arrays), user_uuid)
+    return arrays
+
+def running_balances(
+    arrays: TransactionArrays,
+    current_balances: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Compute each account's balance after every transaction.
+
+    Without current balances the result is the cumulative net flow of each account since
+    its first transaction. With them, the series is anchored so each account's last value
+    equals its current balance.
+
+    Args:
+        arrays (TransactionArrays): The columnar transactions.
+        current_balances (np.ndarray | None): int64 cents per account, aligned with arrays.accounts.
+
+    Returns:
+        np.ndarray: int64 cents, aligned with the transactions.
+    """
+    if not len(arrays):
+        return np.array([], dtype=np.int64)
+    flow = -arrays.amounts
+    # Stable sort by account keeps each account's transactions in date order
+    order = np.argsort(arrays.account_codes, kind="stable")
+    sorted_flow = np.cumsum(flow[order])
+    sorted_accounts = arrays.account_codes[order]
+
+    starts = np.flatnonzero(np.r_[True, sorted_accounts[1:] != sorted_accounts[:-1]])
+    offsets = np.r_[0, sorted_flow[starts[1:] - 1]]
+    group_sizes = np.diff(np.r_[starts, len(arrays)])
+    sorted_flow -= np.repeat(offsets, group_sizes)
+
+    if current_balances is not None:
+        ends = np.r_[starts[1:], len(arrays)] - 1
+        totals = sorted_flow[ends]
+        shift = current_balances[sorted_accounts[ends]] - totals
+        sorted_flow += np.repeat(shift, group_sizes)
+
+    balances = np.empty_like(sorted_flow)
+    balances[order] = sorted_flow
+    return balances
+
+def account_daily_balances(
+    arrays: TransactionArrays,
+    current_balances: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute each account's balance at the end of every day it has transactions.
+
+    Args:
+        arrays (TransactionArrays): The columnar transactions.
+        current_balances (np.ndarray | None): int64 cents per account, aligned with arrays.accounts.
+            See running_balances.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The intp account codes, datetime64[D] days and
+            int64 balances in cents, ordered by account, then day.
+    """
+    if not len(arrays):
+        return np.array([], dtype=np.intp), np.array([], dtype="datetime64[D]"), np.array([], dtype=np.int64)
+    balances = running_balances(arrays, current_balances)
+    order = np.argsort(arrays.account_codes, kind="stable")
+    accounts = arrays.account_codes[order]
+    days = arrays.dates[order]
+    # The last transaction of an account on a day carries its end of day balance
+    last = np.r_[(accounts[1:] != accounts[:-1]) | (days[1:] != days[:-1]), True]
+    return accounts[last], days[last], balances[order][last]
+
+def daily_net_flow(arrays: TransactionArrays) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sum the net flow of every calendar day between the first and last transaction.
+
+    Args:
+        arrays (TransactionArrays): The columnar transactions.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The datetime64[D] days and their int64 net flow in cents.
+    """
+    if not len(arrays):
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.int64)
+    first = arrays.dates[0]
+    offsets = (arrays.dates - first).astype(np.int64)
+    # bincount sums in float64, which is exact for cent totals below 2**53
+    flow = np.rint(np.bincount(offsets, weights=-arrays.amounts)).astype(np.int64)
+    return first + np.arange(len(flow)), flow
+
+def category_breakdown(arrays: TransactionArrays) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Total income and spend per category.
+
+    Args:
+        arrays (TransactionArrays): The columnar transactions.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The category labels, and int64 income and spend in cents.
+    """
+    size = len(arrays.categories)
+    outgoing = np.where(arrays.amounts > 0, arrays.amounts, 0)
+    incoming = outgoing - arrays.amounts
+    spend = np.rint(np.bincount(arrays.category_codes, weights=outgoing, minlength=size)).astype(np.int64)
+    income = np.rint(np.bincount(arrays.category_codes, weights=incoming, minlength=size)).astype(np.int64)
+    return arrays.categories, income, spend
+
+def rolling_average(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean over a fixed window. The first window - 1 values average what is available.
+
+    Args:
+        values (np.ndarray): The series, e.g. daily net flow.
+        window (int): The window length in samples.
+
+    Returns:
+        np.ndarray: float64 averages, aligned with values.
+    """
+    cumulative = np.cumsum(values, dtype=np.float64)
+    totals = cumulative.copy()
+    totals[window:] -= cumulative[:-window]
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    return totals / counts
+
+async def get_cash_flow_analytics(
+    user_uuid: UUID,
+    window_days: int,
+    db: db_dependency
+) -> CashFlowAnalytics:
+    """
+    Compute the dashboard's balance, cash flow and category series over a user's full history.
+
+    The combined balance sums all linked accounts, and both it and the per-account balances
+    are anchored to the accounts' last known balances. An account without a known balance
+    is shown as its net flow since its first transaction.
+
+    Args:
+        user_uuid (UUID): The UUID of the user.
+        window_days (int): Window of the rolling average of daily net flow.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        CashFlowAnalytics: The daily series and category totals.
+    """
+    arrays = await load_transaction_arrays(user_uuid, db)
+    days, flow = daily_net_flow(arrays)
+
+    balances = dict((await db.execute(
+        select(PlaidAccount.uuid, PlaidAccount.last_balance)
+        .where(PlaidAccount.uuid.in_(arrays.accounts.tolist()))
+    )).all()) if len(arrays) else {}
+    # The combined balance at the end of the history is the sum of the last known balances
+    end_balance = round(sum(balance or 0 for balance in balances.values()) * 100)
+    balance = np.cumsum(flow) + (end_balance - flow.sum())
+
+    # Accounts without a known balance end at their total net flow, i.e. are not shifted
+    current_balances = np.rint(np.bincount(arrays.account_codes, weights=-arrays.amounts, minlength=len(arrays.accounts))).astype(np.int64)
+    for code, account in enumerate(arrays.accounts.tolist()):
+        if balances.get(account) is not None:
+            current_balances[code] = round(balances[account] * 100)
+    account_codes, account_days, account_balances = account_daily_balances(arrays, current_balances)
+    starts = np.flatnonzero(np.r_[True, account_codes[1:] != account_codes[:-1]]) if len(account_codes) else []
+
+    categories, income, spend = category_breakdown(arrays)
+    return CashFlowAnalytics(
+        days=days.tolist(),
+        net_flow=(flow / 100).tolist(),
+        balance=(balance / 100).tolist(),
+        rolling_net_flow=(rolling_average(flow, window_days) / 100).tolist(),
+        accounts=[
+            AccountBalances(
+                account_uuid=arrays.accounts[account_codes[start]],
+                days=days_of_account.tolist(),
+                balance=(balances_of_account / 100).tolist()
+            )
+            for start, days_of_account, balances_of_account in zip(
+                starts, np.split(account_days, starts[1:]), np.split(account_balances, starts[1:])
+            )
+        ],
+        categories=[
+            CategoryTotals(category=category, income=category_income / 100, spend=category_spend / 100)
+            for category, category_income, category_spend in zip(categories.tolist(), income.tolist(), spend.tolist())
+        ]
+    )
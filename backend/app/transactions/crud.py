@@ -0,0 +1,218 @@
+import base64
+import datetime
+import json
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select, tuple_, Select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.transactions_model import Transaction
+from app.transactions.schemas import TransactionFilters, TransactionOut, TransactionPage
+from app.db import db_dependency
+from app.logger import logger
+
+# Columns refreshed when Plaid reports a transaction we already store
+UPSERT_COLUMNS = (
+    "description",
+    "merchant_name",
+    "category",
+    "amount",
+    "iso_currency_code",
+    "pending",
+    "plaid_account_uuid",
+)
+
+async def upsert_transactions(
+    rows: list[dict],
+    db: db_dependency
+) -> int:
+    """
+    Insert or update transactions in bulk, keyed on (plaid_transaction_id, date).
+
+    Rows are sent as one executemany, which SQLAlchemy batches into multi-row
+    INSERT ... ON CONFLICT DO UPDATE statements. The partitions for the rows' months must
+    already exist (see app.transactions.partitions.ensure_partitions). Does not commit.
+
+    Args:
+        rows (list[dict]): Transaction column values, one dict per transaction.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        int: The number of rows written.
+    """
+    if not rows:
+        return 0
+    stmt = insert(Transaction)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Transaction.plaid_transaction_id, Transaction.date],
+        set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS}
+    )
+    await db.execute(stmt, rows)
+    logger.debug("Upserted %s transactions", len(rows))
+    return len(rows)
+
+async def delete_transactions(
+    plaid_transaction_ids: list[str],
+    db: db_dependency
+) -> list:
+    """
+    Delete transactions by Plaid transaction ID in a single statement. Does not commit.
+
+    Args:
+        plaid_transaction_ids (list[str]): The Plaid IDs of the transactions to delete.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        list: The deleted rows' user_uuid, plaid_account_uuid, date, category and amount,
+            so callers can reverse their contribution to the rollups.
+    """
+    if not plaid_transaction_ids:
+        return []
+    deleted = (await db.execute(
+        delete(Transaction)
+        .where(Transaction.plaid_transaction_id.in_(plaid_transaction_ids))
+        .returning(
+            Transaction.user_uuid,
+            Transaction.plaid_account_uuid,
+            Transaction.date,
+            Transaction.category,
+            Transaction.amount
+        )
+    )).all()
+    logger.debug("Deleted %s transactions", len(deleted))
+    return deleted
+
+
+# Columns returned by the listing, plus id as the keyset tiebreaker
+LISTING_COLUMNS = (
+    Transaction.id,
+    Transaction.uuid,
+    Transaction.plaid_account_uuid,
+    Transaction.date,
+    Transaction.description,
+    Transaction.merchant_name,
+    Transaction.category,
+    Transaction.amount,
+    Transaction.iso_currency_code,
+    Transaction.pending,
+)
+
+def encode_cursor(date: datetime.date, transaction_id: int) -> str:
+    """
+    Encode the keyset position after a row as an opaque cursor.
+
+    Args:
+        date (datetime.date): The date of the last row returned.
+        transaction_id (int): The ID of the last row returned.
+
+    Returns:
+        str: The URL-safe cursor.
+    """
+    raw = json.dumps([date.isoformat(), transaction_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime.date, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The opaque cursor.
+
+    Returns:
+        tuple[datetime.date, int]: The date and ID of the last row of the previous page.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        date, transaction_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.date.fromisoformat(date), int(transaction_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def transaction_query(
+    user_uuid: UUID,
+    filters: TransactionFilters,
+    cursor: str | None = None
+) -> Select:
+    """
+    Build the listing query for a user's transactions, newest first.
+
+    Rows are ordered by (date, id) descending, and a cursor resumes strictly after the
+    position it encodes, so every page is an index range scan on (user_uuid, date DESC)
+    no matter how deep it is. Date filters also let Postgres prune monthly partitions.
+
+    Args:
+        user_uuid (UUID): The UUID of the user.
+        filters (TransactionFilters): The optional filters.
+        cursor (str | None): Cursor of the previous page, or None for the first page.
+
+    Returns:
+        Select: The query.
+    """
+    stmt = select(*LISTING_COLUMNS).where(Transaction.user_uuid == user_uuid)
+    if filters.account_uuid is not None:
+        stmt = stmt.where(Transaction.plaid_account_uuid == filters.account_uuid)
+    if filters.start_date is not None:
+        stmt = stmt.where(Transaction.date >= filters.start_date)
+    if filters.end_date is not None:
+        stmt = stmt.where(Transaction.date <= filters.end_date)
+    if filters.min_amount is not None:
+        stmt = stmt.where(Transaction.amount >= filters.min_amount)
+    if filters.max_amount is not None:
+        stmt = stmt.where(Transaction.amount <= filters.max_amount)
+    if filters.category is not None:
+        stmt = stmt.where(Transaction.category == filters.category)
+    if cursor is not None:
+        stmt = stmt.where(tuple_(Transaction.date, Transaction.id) < tuple_(*decode_cursor(cursor)))
+    return stmt.order_by(Transaction.date.desc(), Transaction.id.desc())
+
+def row_to_transactionout(row) -> TransactionOut:
+    """
+    Convert a listing row to a TransactionOut schema instance.
+
+    Args:
+        row: A row selected with LISTING_COLUMNS.
+
+    Returns:
+        TransactionOut: The converted transaction.
+    """
+    return TransactionOut(
+        uuid=row.uuid,
+        plaid_account_uuid=row.plaid_account_uuid,
+        date=row.date,
+        description=row.description,
+        merchant_name=row.merchant_name,
+        category=row.category,
+        amount=row.amount,
+        iso_currency_code=row.iso_currency_code,
+        pending=row.pending
+    )
+
+async def list_transactions(
+    user_uuid: UUID,
+    filters: TransactionFilters,
+    limit: int,
+    cursor: str | None,
+    db: db_dependency
+) -> TransactionPage:
+    """
+    Get one page of a user's transactions.
+
+    Args:
+        user_uuid (UUID): The UUID of the user.
+        filters (TransactionFilters): The optional filters.
+        limit (int): The maximum number of transactions on the page.
+        cursor (str | None): Cursor of the previous page, or None for the first page.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        TransactionPage: The page and the cursor of the next one.
+    """
+    rows = (await db.execute(transaction_query(user_uuid, filters, cursor).limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].date, rows[-1].id)
+    return TransactionPage(transactions=[row_to_transactionout(row) for row in rows], next_cursor=next_cursor)
@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import datetime
+from typing import Iterable
+
+from sqlalchemy import text
+
+from app.db import db_dependency, session_scope
+from app.logger import logger
+
+PARENT_TABLE = "Transactions"
+
+# Months whose partition is known to exist, so the sync path skips the catalog lookup.
+# A detach in another process leaves stale entries here; see is_missing_partition.
+_known_partitions: set[datetime.date] = set()
+# Months whose partition was detached. Its table is kept under the partition name for
+# archiving, so the month cannot get a new partition and its rows cannot be stored.
+_detached_partitions: set[datetime.date] = set()
+
+def month_start(day: datetime.date) -> datetime.date:
+    return day.replace(day=1)
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: datetime.date) -> str:
+    return f"{PARENT_TABLE}_{month.year}_{month.month:02d}"
+
+def forget_partitions():
+    """
+    Drop the cached partition months, so the next ensure_partitions checks the catalog again.
+    """
+    _known_partitions.clear()
+    _detached_partitions.clear()
+
+def is_missing_partition(error: Exception) -> bool:
+    """
+    Check if a failed insert hit a month without a partition, e.g. one detached by another
+    process after this one cached it.
+    """
+    return "no partition of relation" in str(getattr(error, "orig", error))
+
+async def _existing_tables(db: db_dependency, names: list[str]) -> list[str]:
+    return (await db.scalars(
+        text("SELECT relname FROM pg_class WHERE relname = ANY(:names) AND relkind IN ('r', 'p')"),
+        {"names": names}
+    )).all()
+
+async def _existing_partitions(db: db_dependency) -> list[str]:
+    return (await db.scalars(
+        text("""
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+            JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+            WHERE parent.relname = :parent
+        """),
+        {"parent": PARENT_TABLE}
+    )).all()
+
+async def ensure_partitions(
+    days: Iterable[datetime.date],
+    db: db_dependency
+) -> set[datetime.date]:
+    """
+    Create the monthly partitions covering the given dates if they do not exist yet, then commit.
+
+    Creation is serialized across workers with a transaction-level advisory lock. Months
+    whose partition was detached are left alone and returned, so callers can skip their rows.
+
+    Args:
+        days (Iterable[datetime.date]): Dates that must be storable.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        set[datetime.date]: The months among the dates whose partition was detached.
+    """
+    requested = {month_start(day) for day in days}
+    months = requested - _known_partitions - _detached_partitions
+    if not months:
+        return requested & _detached_partitions
+
+    await db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": f"{PARENT_TABLE}_partitions"})
+    attached = set(await _existing_partitions(db))
+    tables = set(await _existing_tables(db, [partition_name(month) for month in months]))
+
+    created = []
+    for month in sorted(months):
+        name = partition_name(month)
+        if name in tables and name not in attached:
+            _detached_partitions.add(month)
+        elif name not in attached:
+            await db.execute(text(
+                f'CREATE TABLE "{name}" PARTITION OF "{PARENT_TABLE}" '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+    await db.commit()
+
+    _known_partitions.update(months - _detached_partitions)
+    if created:
+        logger.info("Created transaction partitions: %s", ', '.join(created))
+    return requested & _detached_partitions
+
+async def ensure_partition_window(
+    db: db_dependency,
+    months_back: int = 24,
+    months_ahead: int = 3
+) -> set[datetime.date]:
+    """
+    Create partitions for a window around the current month, covering Plaid's history and upcoming months.
+
+    Args:
+        db (db_dependency): The database dependency.
+        months_back (int): Past months to cover. Plaid returns up to 24 months of history.
+        months_ahead (int): Future months to create ahead of time.
+
+    Returns:
+        set[datetime.date]: The months in the window whose partition was detached.
+    """
+    current = month_start(datetime.date.today())
+    return await ensure_partitions((add_months(current, offset) for offset in range(-months_back, months_ahead + 1)), db)
+
+async def detach_partitions_before(
+    cutoff: datetime.date,
+    db: db_dependency
+) -> list[str]:
+    """
+    Detach the monthly partitions for months before the cutoff. The detached tables are
+    kept as standalone tables so they can be archived or dropped separately. Until a table
+    is dropped, its month gets no new partition and syncs skip transactions dated in it.
+
+    Args:
+        cutoff (datetime.date): Partitions for months before this date are detached.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        list[str]: The names of the detached partitions.
+    """
+    cutoff = month_start(cutoff)
+    children = await _existing_partitions(db)
+
+    detached = []
+    for name in sorted(children):
+        year, month = name.rsplit("_", 2)[-2:]
+        partition_month = datetime.date(int(year), int(month), 1)
+        if partition_month < cutoff:
+            await db.execute(text(f'ALTER TABLE "{PARENT_TABLE}" DETACH PARTITION "{name}"'))
+            _known_partitions.discard(partition_month)
+            _detached_partitions.add(partition_month)
+            detached.append(name)
+    await db.commit()
+
+    if detached:
+        logger.info("Detached transaction partitions: %s", ', '.join(detached))
+    return detached
+
+async def _main(months_back: int, months_ahead: int, detach_before: datetime.date | None):
+    async with session_scope() as db:
+        await ensure_partition_window(db, months_back, months_ahead)
+        if detach_before:
+            await detach_partitions_before(detach_before, db)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the monthly partitions of the Transactions table.")
+    parser.add_argument("--back", type=int, default=24, help="Past months to ensure partitions for")
+    parser.add_argument("--ahead", type=int, default=3, help="Future months to create partitions for")
+    parser.add_argument("--detach-before", type=datetime.date.fromisoformat, default=None, help="Detach partitions for months before this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+    asyncio.run(_main(args.back, args.ahead, args.detach_before))
@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import select, delete, func, case, cast, literal, text, Date, Numeric
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.rollup_model import MonthlyRollup
+from app.models.transactions_model import Transaction
+from app.transactions.partitions import month_start
+from app.transactions.schemas import MonthlyTotals, CategoryTotals, DashboardSummary
+from app.worker.queue import enqueue
+from app.db import db_dependency, session_scope
+from app.logger import logger
+
+UNCATEGORIZED = "UNCATEGORIZED"
+
+RollupKey = tuple[UUID, UUID, datetime.date, str]
+
+def transaction_deltas(
+    rows: Iterable,
+    sign: int
+) -> dict[RollupKey, list]:
+    """
+    Turn transactions into rollup deltas, keyed by (user, account, month, category).
+
+    Plaid amounts are positive for money leaving the account, so positive amounts count
+    as spend and negative amounts as income.
+
+    Args:
+        rows (Iterable): Rows or dicts with user_uuid, plaid_account_uuid, date, category and amount.
+        sign (int): 1 for transactions being stored, -1 for transactions being removed.
+
+    Returns:
+        dict[RollupKey, list]: The income, spend and count deltas per bucket.
+    """
+    deltas = defaultdict(lambda: [Decimal(0), Decimal(0), 0])
+    for row in rows:
+        if not isinstance(row, dict):
+            row = row._mapping
+        key = (row["user_uuid"], row["plaid_account_uuid"], month_start(row["date"]), row["category"] or UNCATEGORIZED)
+        amount = Decimal(str(row["amount"]))
+        bucket = deltas[key]
+        if amount < 0:
+            bucket[0] -= sign * amount
+        else:
+            bucket[1] += sign * amount
+        bucket[2] += sign
+    return deltas
+
+def merge_deltas(*deltas: dict[RollupKey, list]) -> dict[RollupKey, list]:
+    merged = defaultdict(lambda: [Decimal(0), Decimal(0), 0])
+    for part in deltas:
+        for key, (income, spend, count) in part.items():
+            bucket = merged[key]
+            bucket[0] += income
+            bucket[1] += spend
+            bucket[2] += count
+    return merged
+
+async def apply_rollup_deltas(
+    deltas: dict[RollupKey, list],
+    db: db_dependency
+) -> int:
+    """
+    Add deltas to the rollups in one executemany upsert, then drop buckets left empty. Does not commit.
+
+    Buckets are written in key order so concurrent syncs lock rows in the same order.
+
+    Args:
+        deltas (dict[RollupKey, list]): The income, spend and count deltas per bucket.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        int: The number of buckets touched.
+    """
+    rows = [
+        {
+            "user_uuid": user_uuid,
+            "plaid_account_uuid": account_uuid,
+            "month": month,
+            "category": category,
+            "income": income,
+            "spend": spend,
+            "transaction_count": count,
+        }
+        for (user_uuid, account_uuid, month, category), (income, spend, count) in sorted(deltas.items(), key=lambda item: tuple(map(str, item[0])))
+        if income or spend or count
+    ]
+    if not rows:
+        return 0
+
+    stmt = insert(MonthlyRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MonthlyRollup.user_uuid, MonthlyRollup.plaid_account_uuid, MonthlyRollup.month, MonthlyRollup.category],
+        set_={
+            "income": MonthlyRollup.income + stmt.excluded.income,
+            "spend": MonthlyRollup.spend + stmt.excluded.spend,
+            "transaction_count": MonthlyRollup.transaction_count + stmt.excluded.transaction_count,
+        }
+    )
+    await db.execute(stmt, rows)
+    await db.execute(
+        delete(MonthlyRollup).where(
+            MonthlyRollup.user_uuid.in_({row["user_uuid"] for row in rows}),
+            MonthlyRollup.transaction_count <= 0
+        )
+    )
+    logger.debug("Applied rollup deltas to %s buckets", len(rows))
+    return len(rows)
+
+async def rebuild_rollups(
+    db: db_dependency,
+    user_uuid: UUID | None = None
+) -> int:
+    """
+    Recompute rollups from the Transactions table, for one user or everyone, and commit.
+
+    The rollup table is locked against concurrent delta writes until the commit. A sync
+    that is blocked on the lock applies its deltas afterwards, on top of totals that did
+    not include its uncommitted transactions, so nothing is counted twice or lost.
+
+    Args:
+        db (db_dependency): The database dependency.
+        user_uuid (UUID | None): Only rebuild this user's rollups. Defaults to all users.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    await db.execute(text(f'LOCK TABLE "{MonthlyRollup.__tablename__}" IN SHARE ROW EXCLUSIVE MODE'))
+
+    clear = delete(MonthlyRollup)
+    month = cast(func.date_trunc("month", Transaction.date), Date)
+    category = func.coalesce(Transaction.category, literal(UNCATEGORIZED))
+    totals = (
+        select(
+            Transaction.user_uuid,
+            Transaction.plaid_account_uuid,
+            month,
+            category,
+            cast(func.sum(case((Transaction.amount < 0, -Transaction.amount), else_=0)), Numeric(14, 2)),
+            cast(func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)), Numeric(14, 2)),
+            func.count(),
+        )
+        .group_by(Transaction.user_uuid, Transaction.plaid_account_uuid, month, category)
+    )
+    if user_uuid is not None:
+        clear = clear.where(MonthlyRollup.user_uuid == user_uuid)
+        totals = totals.where(Transaction.user_uuid == user_uuid)
+
+    await db.execute(clear)
+    result = await db.execute(
+        insert(MonthlyRollup).from_select(
+            ["user_uuid", "plaid_account_uuid", "month", "category", "income", "spend", "transaction_count"],
+            totals
+        )
+    )
+    await db.commit()
+
+    logger.info("Rebuilt %s monthly rollups for %s", result.rowcount, user_uuid or "all users")
+    return result.rowcount
+
+async def get_dashboard_summary(
+    user_uuid: UUID,
+    start_month: datetime.date | None,
+    end_month: datetime.date | None,
+    account_uuid: UUID | None,
+    db: db_dependency
+) -> DashboardSummary:
+    """
+    Get income, spend and net per month and per category from the rollups.
+
+    Args:
+        user_uuid (UUID): The UUID of the user.
+        start_month (datetime.date | None): First month to include.
+        end_month (datetime.date | None): Last month to include.
+        account_uuid (UUID | None): Only include this Plaid account.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        DashboardSummary: Monthly and category totals plus the overall totals.
+    """
+    conditions = [MonthlyRollup.user_uuid == user_uuid]
+    if start_month is not None:
+        conditions.append(MonthlyRollup.month >= month_start(start_month))
+    if end_month is not None:
+        conditions.append(MonthlyRollup.month <= month_start(end_month))
+    if account_uuid is not None:
+        conditions.append(MonthlyRollup.plaid_account_uuid == account_uuid)
+
+    income = func.sum(MonthlyRollup.income).label("income")
+    spend = func.sum(MonthlyRollup.spend).label("spend")
+    by_month = (await db.execute(
+        select(MonthlyRollup.month, income, spend)
+        .where(*conditions)
+        .group_by(MonthlyRollup.month)
+        .order_by(MonthlyRollup.month)
+    )).all()
+    by_category = (await db.execute(
+        select(MonthlyRollup.category, income, spend)
+        .where(*conditions)
+        .group_by(MonthlyRollup.category)
+        .order_by(spend.desc())
+    )).all()
+
+    months = [
+        MonthlyTotals(month=row.month, income=row.income, spend=row.spend, net=row.income - row.spend)
+        for row in by_month
+    ]
+    total_income = sum((row.income for row in by_month), Decimal(0))
+    total_spend = sum((row.spend for row in by_month), Decimal(0))
+    return DashboardSummary(
+        months=months,
+        categories=[CategoryTotals(category=row.category, income=row.income, spend=row.spend) for row in by_category],
+        income=total_income,
+        spend=total_spend,
+        net=total_income - total_spend
+    )
+
+async def _main(user_uuid: UUID | None, queue: bool):
+    if queue:
+        await enqueue("rebuild_rollups", {"user_uuid": str(user_uuid) if user_uuid else None})
+        return
+    async with session_scope() as db:
+        await rebuild_rollups(db, user_uuid)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the monthly transaction rollups from the Transactions table.")
+    parser.add_argument("--user", type=UUID, default=None, help="Only rebuild the rollups of this user UUID")
+    parser.add_argument("--queue", action="store_true", help="Queue the rebuild for the background workers instead of running it here")
+    args = parser.parse_args()
+    asyncio.run(_main(args.user, args.queue))
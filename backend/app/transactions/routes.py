@@ -0,0 +1,121 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from typing import Annotated
+from uuid import UUID
+import datetime
+from app.users.schemas import UserOut
+from app.transactions.schemas import TransactionFilters, TransactionPage, DashboardSummary, CashFlowAnalytics
+
+from app.transactions.crud import list_transactions, transaction_query, row_to_transactionout
+from app.transactions.rollups import get_dashboard_summary
+from app.transactions.analytics import get_cash_flow_analytics
+from app.sessions.dependencies import get_current_session
+from app.db import read_db_dependency, session_scope
+from app.logger import logger
+
+STREAM_BATCH_SIZE = 500
+
+# Transaction routes (paginated and streamed listing, dashboard aggregates.)
+router = APIRouter(
+    prefix='/transactions',
+    tags=['transactions']
+)
+
+async def stream_transactions(user: UserOut, query: Select):
+    """
+    Yield a user's transactions as NDJSON lines, reading from a server-side cursor in batches.
+
+    The session is opened here rather than injected, because request dependencies are closed
+    before a streaming body is sent.
+
+    Args:
+        user (UserOut): The user whose transactions to stream.
+        query (Select): The listing query, built before the response starts so a bad cursor is still a 400.
+    """
+    async with session_scope(read_only=True) as db:
+        result = await db.stream(query)
+        async for rows in result.partitions(STREAM_BATCH_SIZE):
+            yield "".join(row_to_transactionout(row).model_dump_json() + "\n" for row in rows)
+    logger.debug("Finished streaming transactions for user %s", user.username)
+
+@router.get("", response_model=TransactionPage)
+async def get_transactions(
+    current_user: Annotated[UserOut, Depends(get_current_session)],
+    filters: Annotated[TransactionFilters, Depends()],
+    db: read_db_dependency,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+    cursor: str | None = None,
+    stream: bool = False
+):
+    """
+    Endpoint to list the current user's transactions, newest first.
+
+    Args:
+        current_user (UserOut): The authenticated user from current session.
+        filters (TransactionFilters): Account, date range, amount range and category filters.
+        db (read_db_dependency): The read-only database dependency.
+        limit (int): The page size. Ignored when streaming.
+        cursor (str | None): The next_cursor of the previous page.
+        stream (bool): Return every matching transaction as NDJSON instead of one page.
+
+    Returns:
+        TransactionPage | StreamingResponse: One page with the next cursor, or the NDJSON stream.
+
+    Raises:
+        HTTPException: If the cursor is invalid.
+    """
+    if stream:
+        logger.debug("Streaming transactions for user %s", current_user.username)
+        # Built here, so an invalid cursor is rejected before the 200 headers are sent
+        query = transaction_query(current_user.uuid, filters, cursor)
+        return StreamingResponse(
+            stream_transactions(current_user, query),
+            media_type="application/x-ndjson"
+        )
+    return await list_transactions(current_user.uuid, filters, limit, cursor, db)
+
+@router.get("/summary", response_model=DashboardSummary)
+async def get_summary(
+    current_user: Annotated[UserOut, Depends(get_current_session)],
+    db: read_db_dependency,
+    start_month: datetime.date | None = None,
+    end_month: datetime.date | None = None,
+    account_uuid: UUID | None = None
+):
+    """
+    Endpoint to get the current user's income, spend and net per month and per category.
+
+    Served from the monthly rollups, so the cost depends on the number of months and
+    categories rather than the number of transactions.
+
+    Args:
+        current_user (UserOut): The authenticated user from current session.
+        db (read_db_dependency): The read-only database dependency.
+        start_month (date | None): First month to include. Any day of the month works.
+        end_month (date | None): Last month to include. Any day of the month works.
+        account_uuid (UUID | None): Only include this Plaid account.
+
+    Returns:
+        DashboardSummary: Monthly and category totals plus the overall totals.
+    """
+    return await get_dashboard_summary(current_user.uuid, start_month, end_month, account_uuid, db)
+
+@router.get("/analytics", response_model=CashFlowAnalytics)
+async def get_analytics(
+    current_user: Annotated[UserOut, Depends(get_current_session)],
+    db: read_db_dependency,
+    window_days: Annotated[int, Query(ge=1, le=365)] = 30
+):
+    """
+    Endpoint to get the current user's daily balance and cash flow series and category totals.
+
+    Args:
+        current_user (UserOut): The authenticated user from current session.
+        db (read_db_dependency): The read-only database dependency.
+        window_days (int): Window of the rolling average of daily net flow.
+
+    Returns:
+        CashFlowAnalytics: The daily series and category totals.
+    """
+    return await get_cash_flow_analytics(current_user.uuid, window_days, db)
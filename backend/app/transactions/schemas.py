@@ -0,0 +1,141 @@
+import datetime
+from pydantic import BaseModel
+from uuid import UUID
+
+class TransactionSyncResult(BaseModel):
+    """
+    Model summarizing one /transactions/sync run for a Plaid item.
+
+    Attributes:
+        item_uuid (UUID): The UUID of the synced Plaid item.
+        added (int): Number of new transactions stored.
+        modified (int): Number of existing transactions updated.
+        removed (int): Number of transactions deleted.
+        skipped (bool): True if another sync advanced the cursor first and this run was discarded.
+    """
+    item_uuid: UUID
+    added: int
+    modified: int
+    removed: int
+    skipped: bool = False
+
+class TransactionFilters(BaseModel):
+    """
+    Model for the optional filters of the transaction listing.
+
+    Attributes:
+        account_uuid (UUID): Only transactions of this Plaid account.
+        start_date (date): Only transactions on or after this date.
+        end_date (date): Only transactions on or before this date.
+        min_amount (float): Only transactions with at least this amount.
+        max_amount (float): Only transactions with at most this amount.
+        category (str): Only transactions in this primary category.
+    """
+    account_uuid: UUID | None = None
+    start_date: datetime.date | None = None
+    end_date: datetime.date | None = None
+    min_amount: float | None = None
+    max_amount: float | None = None
+    category: str | None = None
+
+class TransactionOut(BaseModel):
+    """
+    Model for that reveals the details of a transaction.
+    """
+    uuid: UUID
+    plaid_account_uuid: UUID
+    date: datetime.date
+    description: str | None
+    merchant_name: str | None
+    category: str | None
+    amount: float
+    iso_currency_code: str | None
+    pending: bool
+
+class TransactionPage(BaseModel):
+    """
+    Model for one page of the transaction listing.
+
+    Attributes:
+        transactions (list[TransactionOut]): The transactions on this page, newest first.
+        next_cursor (str): Opaque cursor for the next page, None on the last page.
+    """
+    transactions: list[TransactionOut]
+    next_cursor: str | None = None
+
+class MonthlyTotals(BaseModel):
+    """
+    Model for the income, spend and net of one month.
+
+    Attributes:
+        month (date): First day of the month.
+        income (float): Money received.
+        spend (float): Money spent.
+        net (float): Income minus spend.
+    """
+    month: datetime.date
+    income: float
+    spend: float
+    net: float
+
+class CategoryTotals(BaseModel):
+    """
+    Model for the income and spend of one category.
+
+    Attributes:
+        category (str): The primary personal finance category.
+        income (float): Money received.
+        spend (float): Money spent.
+    """
+    category: str
+    income: float
+    spend: float
+
+class DashboardSummary(BaseModel):
+    """
+    Model for the dashboard aggregates over a range of months.
+
+    Attributes:
+        months (list[MonthlyTotals]): Totals per month, oldest first.
+        categories (list[CategoryTotals]): Totals per category, highest spend first.
+        income (float): Total money received.
+        spend (float): Total money spent.
+        net (float): Total income minus spend.
+    """
+    months: list[MonthlyTotals]
+    categories: list[CategoryTotals]
+    income: float
+    spend: float
+    net: float
+
+class AccountBalances(BaseModel):
+    """
+    Model for one account's balance series.
+
+    Attributes:
+        account_uuid (UUID): The UUID of the Plaid account.
+        days (list[date]): The days the account has transactions on, oldest first.
+        balance (list[float]): The account's balance at the end of each of those days.
+    """
+    account_uuid: UUID
+    days: list[datetime.date]
+    balance: list[float]
+
+class CashFlowAnalytics(BaseModel):
+    """
+    Model for the dashboard's daily cash flow series over a user's full history.
+
+    Attributes:
+        days (list[date]): Every day from the first to the last transaction.
+        net_flow (list[float]): Money in minus money out on each day.
+        balance (list[float]): Combined balance of the linked accounts at the end of each day.
+        rolling_net_flow (list[float]): Trailing average of net_flow.
+        accounts (list[AccountBalances]): Balance of each linked account over its history.
+        categories (list[CategoryTotals]): Totals per category.
+    """
+    days: list[datetime.date]
+    net_flow: list[float]
+    balance: list[float]
+    rolling_net_flow: list[float]
+    accounts: list[AccountBalances]
+    categories: list[CategoryTotals]
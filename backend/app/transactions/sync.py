@@ -0,0 +1,247 @@
+import datetime
+import json
+import os
+from typing import TYPE_CHECKING
+from uuid import UUID
+from dotenv import load_dotenv
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+
+from app.models.plaid_item_model import PlaidItem
+from app.models.plaid_account_model import PlaidAccount
+from app.transactions.crud import upsert_transactions, delete_transactions
+from app.transactions.partitions import ensure_partitions, forget_partitions, is_missing_partition, month_start
+from app.transactions.rollups import transaction_deltas, merge_deltas, apply_rollup_deltas
+from app.transactions.schemas import TransactionSyncResult
+from app.plaid.gateway import PlaidGateway, plaid_gateway
+from app.db import db_dependency
+from app.logger import logger
+
+if TYPE_CHECKING:
+    from plaid import ApiException
+
+load_dotenv()
+
+TRANSACTIONS_SYNC_PAGE_SIZE = int(os.getenv("TRANSACTIONS_SYNC_PAGE_SIZE", "500"))
+MAX_PAGINATION_RESTARTS = 3
+
+def _as_dict(obj) -> dict:
+    """
+    Normalize a Plaid SDK model, or the plain dict a fake Plaid client returns, to a dict.
+    """
+    return obj.to_dict() if hasattr(obj, "to_dict") else obj
+
+def _error_code(e: "ApiException") -> str | None:
+    try:
+        return json.loads(e.body).get("error_code")
+    except (TypeError, ValueError):
+        return None
+
+def transaction_to_row(
+    txn: dict,
+    account_uuids: dict[str, UUID],
+    user_uuid: UUID
+) -> dict | None:
+    """
+    Convert a Plaid transaction into Transactions column values.
+
+    Args:
+        txn (dict): The Plaid transaction.
+        account_uuids (dict[str, UUID]): Maps Plaid account IDs of the item to PlaidAccount UUIDs.
+        user_uuid (UUID): The UUID of the user owning the item.
+
+    Returns:
+        dict | None: The row, or None if the transaction belongs to an account we did not link.
+    """
+    account_uuid = account_uuids.get(txn["account_id"])
+    if account_uuid is None:
+        return None
+
+    date = txn["date"]
+    if isinstance(date, str):
+        date = datetime.date.fromisoformat(date)
+
+    return {
+        "plaid_transaction_id": txn["transaction_id"],
+        "description": txn.get("name"),
+        "merchant_name": txn.get("merchant_name"),
+        "category": (txn.get("personal_finance_category") or {}).get("primary"),
+        "amount": txn["amount"],
+        "iso_currency_code": txn.get("iso_currency_code"),
+        "date": date,
+        "pending": bool(txn.get("pending", False)),
+        "plaid_account_uuid": account_uuid,
+        "user_uuid": user_uuid,
+    }
+
+def fold_page(changes: dict[str, tuple[str, dict]], page: dict):
+    """
+    Fold one /transactions/sync page into the changes of the pass, keyed by transaction ID.
+
+    A transaction can appear on several pages, e.g. added on one and modified or removed on
+    a later one. The last event wins, so every transaction is stored or deleted once and a
+    removal drops an earlier add or modify. A transaction added and then modified within
+    the pass stays an add, as it is new to us.
+
+    Args:
+        changes (dict[str, tuple[str, dict]]): Maps transaction IDs to their event and transaction, updated in place.
+        page (dict): The /transactions/sync response.
+    """
+    for event in ("added", "modified", "removed"):
+        for txn in page[event]:
+            txn = _as_dict(txn)
+            earlier = changes.get(txn["transaction_id"])
+            new = event == "modified" and earlier is not None and earlier[0] == "added"
+            changes[txn["transaction_id"]] = ("added" if new else event, txn)
+
+async def fetch_transaction_updates(
+    access_token: str,
+    cursor: str | None,
+    gateway: PlaidGateway = plaid_gateway
+) -> tuple[dict[str, tuple[str, dict]], str]:
+    """
+    Page through /transactions/sync from the given cursor until Plaid reports no more updates.
+
+    If Plaid reports the data changed mid-pagination, the whole pass restarts from the
+    original cursor as Plaid requires.
+
+    Args:
+        access_token (str): The Plaid access token of the item.
+        cursor (str | None): The cursor stored from the last sync, or None for a full history.
+        gateway (PlaidGateway): The Plaid gateway. Defaults to the shared one; wrap a fake client to test.
+
+    Returns:
+        tuple: The last event and transaction per transaction ID (see fold_page), and the next cursor.
+
+    Raises:
+        HTTPException: If pagination keeps being invalidated.
+    """
+    from plaid import ApiException
+    from plaid.model.transactions_sync_request import TransactionsSyncRequest
+
+    for _ in range(MAX_PAGINATION_RESTARTS):
+        changes = {}
+        next_cursor = cursor
+        try:
+            while True:
+                request = TransactionsSyncRequest(access_token=access_token, count=TRANSACTIONS_SYNC_PAGE_SIZE)
+                if next_cursor:
+                    request.cursor = next_cursor
+                res = _as_dict(await gateway.call("transactions_sync", request))
+
+                fold_page(changes, res)
+                next_cursor = res["next_cursor"]
+                if not res["has_more"]:
+                    return changes, next_cursor
+        except ApiException as e:
+            if _error_code(e) != "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION":
+                raise
+            logger.info("Transactions changed during pagination, restarting sync from stored cursor")
+
+    raise HTTPException(status_code=503, detail="Plaid transactions kept changing during sync")
+
+async def sync_item(
+    item_uuid: UUID,
+    db: db_dependency,
+    gateway: PlaidGateway = plaid_gateway
+) -> TransactionSyncResult:
+    """
+    Pull new transaction activity for a Plaid item and apply it in one database transaction.
+
+    Only activity since the stored cursor is fetched, folded to the last event per
+    transaction across pages. Added and modified transactions are
+    bulk upserted, removed ones bulk deleted, the monthly rollups adjusted by the difference,
+    and the cursor advanced in the same commit.
+    The cursor update is conditional on the cursor we started from, so when two syncs of
+    the same item race the slower one is rolled back instead of applying stale deltas.
+
+    Args:
+        item_uuid (UUID): The UUID of the Plaid item to sync.
+        db (db_dependency): The database dependency.
+        gateway (PlaidGateway): The Plaid gateway. Defaults to the shared one; wrap a fake client to test.
+
+    Returns:
+        TransactionSyncResult: Counts of applied changes.
+
+    Raises:
+        HTTPException: If the item does not exist or is inactive.
+    """
+    item = (await db.execute(
+        select(PlaidItem.plaid_access_token, PlaidItem.transactions_cursor, PlaidItem.user_uuid)
+        .where(PlaidItem.uuid == item_uuid, PlaidItem.is_active.is_(True))
+    )).one_or_none()
+    # Release the connection while waiting on Plaid
+    await db.rollback()
+    if item is None:
+        logger.warning("No active Plaid item %s to sync", item_uuid)
+        raise HTTPException(status_code=404, detail="Plaid item not found")
+
+    access_token, cursor, user_uuid = item
+    logger.debug("Syncing transactions for item %s from cursor %r", item_uuid, cursor)
+    changes, next_cursor = await fetch_transaction_updates(access_token, cursor, gateway)
+
+    account_uuids = dict((await db.execute(
+        select(PlaidAccount.plaid_account_id, PlaidAccount.uuid)
+        .where(PlaidAccount.plaid_item_uuid == item_uuid)
+    )).all())
+
+    rows, removed_ids = [], []
+    for transaction_id, (event, txn) in changes.items():
+        if event == "removed":
+            removed_ids.append(transaction_id)
+            continue
+        row = transaction_to_row(txn, account_uuids, user_uuid)
+        if row is not None:
+            rows.append(row)
+    # The date of a modified transaction can change, which would move it to another
+    # partition, so modified rows are replaced rather than updated in place. Added rows
+    # are cleared too, so a transaction Plaid sends again is not counted twice in the rollups.
+    replaced_ids = [row["plaid_transaction_id"] for row in rows]
+
+    # Retried once if a partition was detached by another process after we cached it
+    for attempt in range(2):
+        detached = await ensure_partitions((row["date"] for row in rows), db)
+        if detached:
+            logger.warning(
+                "Skipping transactions of item %s dated in detached months: %s",
+                item_uuid, ', '.join(sorted(month.isoformat() for month in detached))
+            )
+            rows = [row for row in rows if month_start(row["date"]) not in detached]
+        try:
+            deleted = await delete_transactions(removed_ids + replaced_ids, db)
+            await upsert_transactions(rows, db)
+            # rows holds each transaction once, so the rollups gain exactly what is stored
+            await apply_rollup_deltas(merge_deltas(transaction_deltas(deleted, -1), transaction_deltas(rows, 1)), db)
+            advanced = await db.execute(
+                update(PlaidItem)
+                .where(PlaidItem.uuid == item_uuid, PlaidItem.transactions_cursor.is_not_distinct_from(cursor))
+                .values(
+                    transactions_cursor=next_cursor,
+                    last_successful_sync=datetime.datetime.now(datetime.timezone.utc)
+                )
+            )
+            if advanced.rowcount == 0:
+                await db.rollback()
+                logger.info("Item %s was synced concurrently, discarding this run", item_uuid)
+                return TransactionSyncResult(item_uuid=item_uuid, added=0, modified=0, removed=0, skipped=True)
+            await db.commit()
+            break
+        except Exception as e:
+            await db.rollback()
+            if attempt == 0 and is_missing_partition(e):
+                logger.info("Transaction partition missing for item %s, checking partitions again", item_uuid)
+                forget_partitions()
+                continue
+            logger.warning("Unable to apply transaction sync for item %s due to: %s", item_uuid, e)
+            raise
+
+    added = sum(1 for row in rows if changes[row["plaid_transaction_id"]][0] == "added")
+    modified = len(rows) - added
+    logger.info("Synced item %s: %s added, %s modified, %s removed", item_uuid, added, modified, len(removed_ids))
+    return TransactionSyncResult(
+        item_uuid=item_uuid,
+        added=added,
+        modified=modified,
+        removed=len(removed_ids)
+    )
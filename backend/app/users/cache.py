@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from redis.exceptions import RedisError
+
+from app.users.schemas import UserOut
+from app.models.user_model import User
+from app.logger import logger
+from app.redis import redis_client as redis
+
+load_dotenv()
+
+USER_CACHE_L1_SIZE = int(os.getenv("USER_CACHE_L1_SIZE", "1024"))
+USER_CACHE_L1_TTL = float(os.getenv("USER_CACHE_L1_TTL_SECONDS", "30"))
+USER_CACHE_L2_TTL = int(os.getenv("USER_CACHE_L2_TTL_SECONDS", "300"))
+# How long an invalidated user cannot be cached again. Must outlast a lookup that read the
+# row before the write committed, and replica lag for lookups on read_db_dependency.
+USER_CACHE_TOMBSTONE_TTL = int(os.getenv("USER_CACHE_TOMBSTONE_TTL_SECONDS", "10"))
+USER_CACHE_PREFIX = "user_cache:"
+USER_CACHE_CHANNEL = "user_cache:invalidate"
+USER_CACHE_TOMBSTONE = "invalidated"
+
+# KEYS[1] = L2 key, ARGV[1] = payload, ARGV[2] = TTL seconds, ARGV[3] = tombstone
+# Refuses to cache a row that may predate the invalidation that left the tombstone
+_SET_UNLESS_INVALIDATED = redis.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[3] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+""")
+
+class UserCache:
+    """
+    Read-through cache for user lookups by username.
+
+    L1 is a bounded in-process LRU of UserOut objects with a short TTL. L2 is Redis,
+    shared by all workers, holding the user row with the email still encrypted so no
+    plaintext PII is written to Redis. Invalidations are broadcast over pub/sub so every
+    worker drops its L1 entry, and leave a short-lived tombstone in L2 so a lookup that
+    read the row before the write cannot cache it again.
+
+    Attributes:
+        max_size (int): Maximum number of L1 entries.
+        l1_ttl (float): Seconds an L1 entry stays valid.
+        l2_ttl (int): Seconds an L2 entry stays valid.
+        stats (dict): Hit, miss and invalidation counters.
+    """
+    def __init__(self, max_size: int, l1_ttl: float, l2_ttl: int):
+        self.max_size = max_size
+        self.l1_ttl = l1_ttl
+        self.l2_ttl = l2_ttl
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "invalidations": 0}
+        self._entries: OrderedDict[str, tuple[float, UserOut]] = OrderedDict()
+
+    def get_local(self, username: str) -> UserOut | None:
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[username]
+            return None
+        self._entries.move_to_end(username)
+        return user
+
+    def set_local(self, username: str, user: UserOut):
+        self._entries[username] = (time.monotonic() + self.l1_ttl, user)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def drop_local(self, username: str):
+        self._entries.pop(username, None)
+
+    async def get(self, username: str) -> UserOut | None:
+        """
+        Look up a user in L1, then L2, promoting L2 hits into L1.
+
+        Args:
+            username (str): The username to look up.
+
+        Returns:
+            UserOut | None: The cached user, or None on a miss.
+        """
+        user = self.get_local(username)
+        if user is not None:
+            self.stats["l1_hits"] += 1
+            return user
+
+        try:
+            payload = await redis.get(f"{USER_CACHE_PREFIX}{username}")
+        except RedisError as e:
+            logger.warning("User cache L2 read failed: %s", e)
+            payload = None
+
+        if payload is None or payload == USER_CACHE_TOMBSTONE:
+            self.stats["misses"] += 1
+            return None
+
+        data = json.loads(payload)
+        user = UserOut(
+            first_name=data["first_name"],
+            last_name=data["last_name"],
+            username=data["username"],
+            encrypted_email=data["encrypted_email"],
+            uuid=data["uuid"],
+            id=data["id"],
+            is_active=data["is_active"]
+        )
+        self.stats["l2_hits"] += 1
+        self.set_local(username, user)
+        return user
+
+    async def set(self, row: User, user: UserOut):
+        """
+        Store a freshly loaded user in both tiers, unless the user was invalidated within
+        USER_CACHE_TOMBSTONE_TTL, in which case the row may be older than the write.
+
+        Args:
+            row (User): The user row, used for the encrypted L2 payload.
+            user (UserOut): The converted user stored in L1.
+        """
+        payload = json.dumps({
+            "id": row.id,
+            "uuid": str(row.uuid),
+            "username": row.username,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "encrypted_email": row.encrypted_email,
+            "is_active": row.is_active,
+        })
+        try:
+            stored = await _SET_UNLESS_INVALIDATED(
+                keys=[f"{USER_CACHE_PREFIX}{user.username}"],
+                args=[payload, self.l2_ttl, USER_CACHE_TOMBSTONE]
+            )
+        except RedisError as e:
+            logger.warning("User cache L2 write failed: %s", e)
+            stored = True
+        if stored:
+            self.set_local(user.username, user)
+
+    async def invalidate(self, username: str):
+        """
+        Drop a user from both tiers, leaving a tombstone in L2, and tell every other worker
+        to drop it from L1.
+
+        Args:
+            username (str): The username whose entry changed.
+        """
+        self.stats["invalidations"] += 1
+        self.drop_local(username)
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.set(f"{USER_CACHE_PREFIX}{username}", USER_CACHE_TOMBSTONE, ex=USER_CACHE_TOMBSTONE_TTL)
+                pipe.publish(USER_CACHE_CHANNEL, username)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("User cache invalidation failed for %s: %s", username, e)
+
+    async def listen_for_invalidations(self):
+        """
+        Drop L1 entries named on the invalidation channel. Runs for the app lifetime.
+        L1 is cleared after a lost subscription because messages may have been missed.
+        """
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(USER_CACHE_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.drop_local(message["data"])
+            except RedisError as e:
+                logger.warning("User cache invalidation listener lost connection: %s", e)
+                self._entries.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def get_stats(self) -> dict:
+        """
+        Return the cache counters and current L1 size.
+
+        Returns:
+            dict: Hit, miss and invalidation counts plus the number of L1 entries.
+        """
+        return {**self.stats, "l1_size": len(self._entries)}
+
+user_cache = UserCache(USER_CACHE_L1_SIZE, USER_CACHE_L1_TTL, USER_CACHE_L2_TTL)
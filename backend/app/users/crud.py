@@ -1,17 +1,21 @@
 from app.users.schemas import UserCreate
 from fastapi import HTTPException
 from pydantic import EmailStr
+from sqlalchemy import select, update, or_, case
 from sqlalchemy.exc import IntegrityError
-from app.users.schemas import UserOut
+from app.users.schemas import UserOut, UserProfile
 
-from app.auth.utils import sanitize_email, password_hash, email_hash, encrypt_email, decrypt_email
+from app.auth.utils import sanitize_email, email_hash, encrypt_email, decrypt_emails
+from app.auth.hashing import hash_password
 from app.models.user_model import User
+from app.models.social_identity_model import SocialIdentity
+from app.users.cache import user_cache
 from app.db import db_dependency
 from app.logger import logger
 
 def user_to_userout(user: User) -> UserOut:
     """
-    Convert a User model instance to a UserOut schema instance.
+    Convert a User model instance to a UserOut schema instance. The email is copied encrypted, not decrypted.
 
     Args:
         user (User): The User model instance to convert.
@@ -23,13 +27,26 @@ def user_to_userout(user: User) -> UserOut:
         first_name=user.first_name, # type: ignore
         last_name=user.last_name, # type: ignore
         username=user.username, # type: ignore
-        email=user.decrypted_email,
+        encrypted_email=user.encrypted_email, # type: ignore
         uuid=user.uuid, # type: ignore
         id=user.id, # type: ignore
         is_active=user.is_active # type: ignore
     )
 
-def create_user(
+async def users_to_profiles(users: list[UserOut]) -> list[UserProfile]:
+    """
+    Project many users for a response including their emails, decrypting all emails in one batch.
+
+    Args:
+        users (list[UserOut]): The users to project.
+
+    Returns:
+        list[UserProfile]: The users with decrypted emails, in the same order.
+    """
+    emails = await decrypt_emails([user.encrypted_email for user in users])
+    return [user.profile(email) for user, email in zip(users, emails)]
+
+async def create_user(
     user: UserCreate, 
     db: db_dependency
 ):
@@ -43,7 +60,7 @@ def create_user(
     Returns:
         UserOut: The created user object.
     """
-    hashed_pw = password_hash(user.password)
+    hashed_pw = await hash_password(user.password)
     sanitized_email = sanitize_email(user.email)
     hashed_email = email_hash(sanitized_email)
     encrypted_email = encrypt_email(sanitized_email)
@@ -58,15 +75,16 @@ def create_user(
     )
 
     db.add(new_user)
-    logger.debug(f"Attempting to add user {new_user.username} to db")
+    logger.debug("Attempting to add user %s to db", new_user.username)
     try:
-        db.commit()
-        db.refresh(new_user)
-        logger.info(f"Successfully commited user {new_user.username} to db")
+        await db.commit()
+        await db.refresh(new_user)
+        logger.info("Successfully commited user %s to db", new_user.username)
+        await user_cache.invalidate(new_user.username) # type: ignore
         return user_to_userout(new_user)
     except IntegrityError as e:
-        logger.warning(f"Unable to create user due to: {e}")
-        db.rollback()
+        logger.warning("Unable to create user due to: %s", e)
+        await db.rollback()
         if "email" in str(e.orig).lower():
             logger.warning("Unable to create user due to duplicate email")
             raise HTTPException(status_code=409, detail="Email already in use")
@@ -77,11 +95,11 @@ def create_user(
             logger.warning("Unable to create user due to duplicate credentials")
             raise HTTPException(status_code=409, detail="User with given credentials already exists")
     except Exception as err:
-        db.rollback()
-        logger.warning(f"Unable to create user due to error: {err}")
+        await db.rollback()
+        logger.warning("Unable to create user due to error: %s", err)
         raise HTTPException(status_code=500, detail=f"Error: {err}")
 
-def get_user_by_id(
+async def get_user_by_id(
     user_id: int, 
     db: db_dependency
 ) -> UserOut:
@@ -98,20 +116,20 @@ def get_user_by_id(
     Raises:
         HTTPException: If no user with the given ID is found.
     """
-    logger.debug(f"searching for user of id: {user_id}")
-    user = db.query(User).filter(User.id == user_id).first()
+    logger.debug("searching for user of id: %s", user_id)
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
-        logger.warning(f"No user with id {user_id} found")
+        logger.warning("No user with id %s found", user_id)
         raise HTTPException(status_code=404, detail='no user found with that ID')
-    logger.info(f"User found")
+    logger.info("User found")
     return user_to_userout(user)
 
-def get_user_by_username(
+async def get_user_by_username(
     username: str, 
     db: db_dependency
 ) -> UserOut:
     """
-    Get a user by their username.
+    Get a user by their username, reading through the two-tier user cache.
     
     Args:
         username (str): The username of the user to retrieve.
@@ -123,15 +141,21 @@ def get_user_by_username(
     Raises:
         HTTPException: If no user with the given username is found.
     """
-    logger.debug(f"searching for user of username: {username}")
-    user = db.query(User).filter(User.username == username).first()
+    cached = await user_cache.get(username)
+    if cached is not None:
+        return cached
+
+    logger.debug("searching for user of username: %s", username)
+    user = await db.scalar(select(User).where(User.username == username))
     if not user: 
-        logger.warning(f"No user with username {username} found")
+        logger.warning("No user with username %s found", username)
         raise HTTPException(status_code=404, detail='no user found with that username')
-    logger.info(f"User found")
-    return user_to_userout(user)
+    logger.info("User found")
+    user_out = user_to_userout(user)
+    await user_cache.set(user, user_out)
+    return user_out
 
-def get_user_by_email(
+async def get_user_by_email(
     email: EmailStr, 
     db: db_dependency
 ) -> UserOut:
@@ -148,17 +172,56 @@ def get_user_by_email(
     Raises:
         HTTPException: If no user with the given email is found.
     """
-    logger.debug(f"searching for user of email: {email}")
+    logger.debug("searching for user of email: %s", email)
     sanitized_email = sanitize_email(email)
     target_hashed_email = email_hash(sanitized_email)
-    user = db.query(User).filter(User.hashed_email == target_hashed_email).first()
+    user = await db.scalar(select(User).where(User.hashed_email == target_hashed_email))
     if not user:
-        logger.warning(f"No user with email {email} found")
+        logger.warning("No user with email %s found", email)
         raise HTTPException(status_code=404, detail='no user found with that email')
-    logger.info(f"User found")
+    logger.info("User found")
     return user_to_userout(user)
     
-def get_user_by_query(
+async def resolve_identity(
+    identifier: str,
+    db: db_dependency,
+    provider: str | None = None
+) -> User | None:
+    """
+    Resolve a login identifier to its user in a single indexed query.
+
+    Without a provider the identifier is matched against the username and, if it looks
+    like an email, the hashed email, preferring the username when both match different
+    users. With a social provider it is matched against the subject ID linked to a user
+    for that provider.
+
+    Args:
+        identifier (str): The username, email, or provider subject ID.
+        db (db_dependency): The database dependency.
+        provider (str | None): The social sign in provider the subject ID belongs to.
+
+    Returns:
+        User | None: The matching user row, including the password hash, or None.
+    """
+    if provider is not None:
+        linked = select(SocialIdentity.user_uuid).where(
+            SocialIdentity.provider == provider,
+            SocialIdentity.subject == identifier
+        )
+        return await db.scalar(select(User).where(User.uuid.in_(linked)))
+
+    if "@" not in identifier:
+        return await db.scalar(select(User).where(User.username == identifier))
+
+    hashed = email_hash(sanitize_email(identifier))
+    return await db.scalar(
+        select(User)
+        .where(or_(User.username == identifier, User.hashed_email == hashed))
+        .order_by(case((User.username == identifier, 0), else_=1))
+        .limit(1)
+    )
+
+async def get_user_by_query(
     query: int | str, 
     db: db_dependency
 ) -> UserOut:
@@ -176,40 +239,43 @@ def get_user_by_query(
     Raises:
         HTTPException: If no user with the given query is found.
     """
-    user = None
-    logger.debug(f"searching for user by query: {query}")
+    logger.debug("searching for user by query: %s", query)
     if isinstance(query, int):
-        logger.debug("Searching via id")
-        try:
-            user = get_user_by_id(query, db)
-            if user: logger.info("User found via ID")
-        except HTTPException:
-            logger.debug("No user found via id")
-            pass
-    elif isinstance(query, str):
-        logger.debug("Searching via username")
-        try:
-            user = get_user_by_username(query, db)
-            if user: logger.info("User found via username")
-            else: logger.debug("no user by username")
-        except HTTPException:
-            logger.debug("Searching via email")
-            try:
-                sanitized = sanitize_email(query)
-                user = get_user_by_email(sanitized, db)
-                if user: logger.info("User found via email")
-                else: logger.info("no user found by email")
-            except HTTPException:
-                pass
+        user = await db.scalar(select(User).where(User.id == query))
+    else:
+        user = await resolve_identity(query, db)
     
     if not user:
         logger.warning("No user found")
         raise HTTPException(status_code=404, detail='User not found')
 
-    logger.info(f"returning user {user.username}")
-    return user
+    logger.info("returning user %s", user.username)
+    return user_to_userout(user)
+
+async def get_user_hashed_pw(
+    user_id: int,
+    db: db_dependency
+) -> str:
+    """
+    Get the stored password hash of a user.
+
+    Args:
+        user_id (int): The ID of the user.
+        db (db_dependency): The database dependency.
+
+    Returns:
+        str: The user's bcrypt password hash.
+
+    Raises:
+        HTTPException: If no user with the given ID is found.
+    """
+    hashed_pw = await db.scalar(select(User.hashed_password).where(User.id == user_id))
+    if not hashed_pw:
+        logger.warning("No user with id %s found", user_id)
+        raise HTTPException(status_code=404, detail='no user found with that ID')
+    return hashed_pw
 
-def update_user_pw(
+async def update_user_pw(
     query: int | str, 
     hashed_pw: str, 
     db: db_dependency
@@ -226,11 +292,11 @@ def update_user_pw(
     Returns:
         User: The updated user object.
     """
-    user = get_user_by_query(query, db)
+    user = await get_user_by_query(query, db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    user.hashed_password = hashed_pw # type: ignore
-    db.commit()
-    db.refresh(user)
+    await db.execute(update(User).where(User.id == user.id).values(hashed_password=hashed_pw))
+    await db.commit()
+    await user_cache.invalidate(user.username)
     return user
\ No newline at end of file
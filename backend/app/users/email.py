@@ -0,0 +1,53 @@
+import asyncio
+import os
+import smtplib
+from email.message import EmailMessage
+from dotenv import load_dotenv
+
+from app.logger import logger
+
+load_dotenv()
+
+SMTP_HOST = os.getenv("SMTP_HOST")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_FROM = os.getenv("SMTP_FROM", "no-reply@rfol.io")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT_SECONDS", "10"))
+PASSWORD_RESET_URL = os.getenv("PASSWORD_RESET_URL", "http://localhost:5173/reset-password")
+
+def _send(message: EmailMessage):
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as smtp:
+        smtp.starttls()
+        if SMTP_USERNAME:
+            smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+        smtp.send_message(message)
+
+async def send_reset_email(email: str, reset_token: str, username: str):
+    """
+    Email a password reset link. Without SMTP_HOST configured the email is only logged.
+
+    Args:
+        email (str): The recipient address.
+        reset_token (str): The password reset token.
+        username (str): The username, used in the greeting.
+
+    Raises:
+        smtplib.SMTPException, OSError: If the SMTP server rejects or cannot be reached, so the job is retried.
+    """
+    message = EmailMessage()
+    message["Subject"] = "Reset your rfol password"
+    message["From"] = SMTP_FROM
+    message["To"] = email
+    message.set_content(
+        f"Hi {username},\n\n"
+        f"Use the link below to reset your password. It expires in one hour.\n\n"
+        f"{PASSWORD_RESET_URL}?token={reset_token}\n\n"
+        f"If you did not request a reset, you can ignore this email.\n"
+    )
+
+    if not SMTP_HOST:
+        logger.info("SMTP_HOST not set, not sending password reset email for user: %s", username)
+        return
+    await asyncio.to_thread(_send, message)
+    logger.info("Sent password reset email for user: %s", username)
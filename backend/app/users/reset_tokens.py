@@ -0,0 +1,166 @@
+import datetime
+import json
+import os
+import secrets
+from dotenv import load_dotenv
+
+from app.redis import redis_client as redis
+
+load_dotenv()
+
+RESET_TOKEN_TTL = int(os.getenv("PASSWORD_RESET_TOKEN_TTL_SECONDS", "3600"))
+# How long a claimed token is held while its reset runs, before it is lost for good
+RESET_TOKEN_CLAIM_TTL = int(os.getenv("PASSWORD_RESET_CLAIM_TTL_SECONDS", "60"))
+
+# Every token lives at pw_reset:{token} -> JSON token data, and each user's current token
+# at pw_reset_user:{username} -> token, so issuing a new token can revoke the previous one.
+# A token being used is moved to pw_reset_claimed:{token} until the reset commits or fails.
+# Each token operation below is one Redis call; the endpoints make others besides, for
+# rate limiting and queueing the email.
+RESET_TOKEN_PREFIX = "pw_reset:"
+USER_RESET_PREFIX = "pw_reset_user:"
+CLAIMED_RESET_PREFIX = "pw_reset_claimed:"
+
+# KEYS[1] = new token key, KEYS[2] = user index key
+# ARGV[1] = token prefix, ARGV[2] = token, ARGV[3] = token data, ARGV[4] = TTL seconds
+_ISSUE_TOKEN = redis.register_script("""
+local previous = redis.call('GET', KEYS[2])
+if previous then
+    redis.call('DEL', ARGV[1] .. previous)
+end
+redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[4])
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[4])
+return previous
+""")
+
+# KEYS[1] = token key, KEYS[2] = claimed key, ARGV[1] = claim TTL seconds
+# Returns the token data and its remaining TTL in ms, so a failed reset can restore it
+_CLAIM_TOKEN = redis.register_script("""
+local data = redis.call('GET', KEYS[1])
+if not data then
+    return nil
+end
+local ttl = redis.call('PTTL', KEYS[1])
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return {data, ttl}
+""")
+
+# KEYS[1] = claimed key, ARGV[1] = user index prefix, ARGV[2] = token
+_FINALIZE_TOKEN = redis.register_script("""
+local data = redis.call('GET', KEYS[1])
+if not data then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+local index = ARGV[1] .. cjson.decode(data)['username']
+if redis.call('GET', index) == ARGV[2] then
+    redis.call('DEL', index)
+end
+return 1
+""")
+
+# KEYS[1] = claimed key, KEYS[2] = token key, ARGV[1] = user index prefix, ARGV[2] = token,
+# ARGV[3] = TTL ms to restore. A token revoked by a newer one while claimed is dropped.
+_RESTORE_TOKEN = redis.register_script("""
+local data = redis.call('GET', KEYS[1])
+if not data then
+    return 0
+end
+if redis.call('GET', ARGV[1] .. cjson.decode(data)['username']) ~= ARGV[2] then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('PEXPIRE', KEYS[2], ARGV[3])
+return 1
+""")
+
+def reset_token_key(token: str) -> str:
+    return f"{RESET_TOKEN_PREFIX}{token}"
+
+def user_reset_key(username: str) -> str:
+    return f"{USER_RESET_PREFIX}{username}"
+
+def claimed_reset_key(token: str) -> str:
+    return f"{CLAIMED_RESET_PREFIX}{token}"
+
+async def issue_reset_token(username: str, email: str) -> str:
+    """
+    Create a reset token for the user, revoking any token issued before, in one atomic script call.
+
+    Args:
+        username (str): The user the token resets.
+        email (str): The user's email, returned when the token is validated.
+
+    Returns:
+        str: The new reset token.
+    """
+    token = secrets.token_urlsafe(32)
+    data = json.dumps({
+        "username": username,
+        "email": email,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat()
+    })
+    await _ISSUE_TOKEN(
+        keys=[reset_token_key(token), user_reset_key(username)],
+        args=[RESET_TOKEN_PREFIX, token, data, RESET_TOKEN_TTL]
+    )
+    return token
+
+async def get_reset_token(token: str) -> dict | None:
+    """
+    Look up a reset token without using it.
+
+    Args:
+        token (str): The reset token.
+
+    Returns:
+        dict | None: The username, email and creation time, or None if the token is invalid or expired.
+    """
+    data = await redis.get(reset_token_key(token))
+    return json.loads(data) if data else None
+
+async def claim_reset_token(token: str) -> tuple[dict, int] | None:
+    """
+    Take a reset token for a reset, in one atomic script call. Of concurrent calls with the
+    same token only one gets the data.
+
+    The token is held for RESET_TOKEN_CLAIM_TTL until finalize_reset_token uses it up or
+    restore_reset_token puts it back.
+
+    Args:
+        token (str): The reset token.
+
+    Returns:
+        tuple[dict, int] | None: The username, email and creation time, and the remaining TTL in ms
+            to pass to restore_reset_token, or None if the token is invalid, expired or already claimed.
+    """
+    claimed = await _CLAIM_TOKEN(keys=[reset_token_key(token), claimed_reset_key(token)], args=[RESET_TOKEN_CLAIM_TTL])
+    if not claimed:
+        return None
+    data, ttl = claimed
+    return json.loads(data), int(ttl)
+
+async def finalize_reset_token(token: str):
+    """
+    Use up a claimed reset token once the new password is committed.
+
+    Args:
+        token (str): The reset token.
+    """
+    await _FINALIZE_TOKEN(keys=[claimed_reset_key(token)], args=[USER_RESET_PREFIX, token])
+
+async def restore_reset_token(token: str, ttl_ms: int):
+    """
+    Put a claimed reset token back after its reset failed, so the user can retry with it.
+    Not restored if a newer token was issued meanwhile.
+
+    Args:
+        token (str): The reset token.
+        ttl_ms (int): The remaining TTL returned by claim_reset_token.
+    """
+    await _RESTORE_TOKEN(
+        keys=[claimed_reset_key(token), reset_token_key(token)],
+        args=[USER_RESET_PREFIX, token, max(ttl_ms, 1)]
+    )
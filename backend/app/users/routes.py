@@ -1,38 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from fastapi_limiter.depends import RateLimiter
+from fastapi import APIRouter, Depends, HTTPException
 from typing import Annotated
 from pydantic import EmailStr
 
-import datetime, secrets, json
 from app.logger import logger
-from app.db import db_dependency
-from app.redis import redis_client as redis
+from app.db import db_dependency, read_db_dependency
 from app.auth.dependencies import get_current_user
-from app.auth.utils import password_hash, sanitize_pw
+from app.auth.utils import sanitize_pw, email_hash
+from app.auth.hashing import hash_password
 from app.auth.schemas import ForgotPasswordRequest, ForgotPasswordResponse, ResetPasswordRequest, PasswordUpdateResponse, ValidateResetTokenResponse
 from app.users.crud import create_user, get_user_by_email, update_user_pw, get_user_by_username
 from app.sessions.routes import check_session
-from app.users.schemas import UserCreate, UserOut
-from app.models.user_model import User
+from app.sessions.crud import revoke_user_sessions
+from app.users.reset_tokens import issue_reset_token, get_reset_token, claim_reset_token, finalize_reset_token, restore_reset_token
+from app.worker.queue import enqueue
+from app.ratelimit import RateLimit
+from app.users.schemas import UserCreate, UserOut, UserProfile
 
 router = APIRouter(
     prefix='/users',
     tags=['users']
 )
+
+create_user_limit = RateLimit("user_create", times=6, seconds=60)
+forgot_pw_limit = RateLimit("forgot_password", times=2, seconds=3600)
+forgot_pw_email_limit = RateLimit("forgot_password_email", times=2, seconds=3600)
+reset_pw_limit = RateLimit("reset_password", times=2, seconds=3600)
     
-@router.get("/me")
+@router.get("/me", response_model=UserProfile)
 async def read_users_me(
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[UserOut, Depends(get_current_user)]
 ):
     """
     Testing model. Get the currently authenticated user's details.
     
     Args:
-        current_user (User): The currently authenticated user.
+        current_user (UserOut): The currently authenticated user.
     """
-    return current_user
+    return current_user.profile()
 
-@router.post("/create", response_model=UserOut, dependencies=[Depends(RateLimiter(times=6, minutes=1))])
+@router.post("/create", response_model=UserProfile, dependencies=[Depends(create_user_limit)])
 async def create_new_user(
     user_data: UserCreate, 
     db: db_dependency
@@ -45,32 +51,30 @@ async def create_new_user(
         db (db_dependency): The database dependency.
     
     Returns:
-        UserOut: The created user object.
+        UserProfile: The created user.
     
     Raises:
         HTTPException: If the user creation fails due to validation errors or duplicate entries.
     """
-    logger.debug(f"Attempting to create user {user_data.username}")
+    logger.debug("Attempting to create user %s", user_data.username)
     if not sanitize_pw(user_data.password):
-        logger.info(f"Failed to create user {user_data.username}")
+        logger.info("Failed to create user %s", user_data.username)
         raise HTTPException(status_code=500, detail="Invalid password")
     
-    user = create_user(user_data, db)
-    logger.info(f"Successfully created user {user_data.username}")
-    return user
+    user = await create_user(user_data, db)
+    logger.info("Successfully created user %s", user_data.username)
+    return user.profile()
 
-@router.post("/forgot-password", dependencies=[Depends(RateLimiter(times=2, hours=1))])
+@router.post("/forgot-password", dependencies=[Depends(forgot_pw_limit)])
 async def forgot_password(
     req: ForgotPasswordRequest,
-    background: BackgroundTasks,
-    db: db_dependency
+    db: read_db_dependency
 ):
     """
     Handle forgot password requests by generating a reset token and sending it to the user's email.
     Args:
         req (ForgotPasswordRequest): The request containing the user's email.
-        background (BackgroundTasks): Background tasks for sending emails.
-        db (db_dependency): The database dependency.
+        db (read_db_dependency): The read-only database dependency.
     
     Returns:
         ForgotPasswordResponse: A response indicating the result of the password reset request.
@@ -79,16 +83,12 @@ async def forgot_password(
         HTTPException: If the rate limit is exceeded or if there is an error processing the request
     """
     try:
-        logger.debug(f"Password reset requested for email: {req.email}")
+        logger.debug("Password reset requested for email: %s", req.email)
 
-        pw_reset_key = f"pw_reset_rate:{req.email}"
-        attempts = await redis.get(pw_reset_key)
+        # Also limited per address, keyed on the email hash so no plaintext email is stored in Redis
+        await forgot_pw_email_limit.hit(f"email:{email_hash(req.email)}")
 
-        if attempts and int(attempts) >= 2:
-            logger.warning(f"Rate limit exceeded for password reset: {req.email}")
-            raise HTTPException(status_code=429, detail="Too many password reset attempts. Please try again later.")
-        
-        user = get_user_by_email(req.email, db)
+        user = await get_user_by_email(req.email, db)
 
         res = ForgotPasswordResponse(
             message="If an account exists with this email, you will receive a password reset link", 
@@ -96,44 +96,16 @@ async def forgot_password(
         )
 
         if not user:
-            logger.warning(f"Password requested for non-existent email: {req.email}")
-            await redis.incr(f"pw_reset_rate:{req.email}")
-            await redis.expire(f"pw_reset_rate:{req.email}", 3600)
+            logger.warning("Password requested for non-existent email: %s", req.email)
             return res
         
-        existing_token_key = f"pw_reset:{user.username}"
-        existing_token = await redis.get(existing_token_key)
-
-        if existing_token:
-            await redis.delete(f"pw_reset:{existing_token}")
-            logger.info(f"Deleted existing reset token for user")
-
-        reset_token = secrets.token_urlsafe(32)
-        token_key = f"pw_reset:{reset_token}"
-        token_data = {
-            "username": user.username,
-            "email": user.email,
-            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat()
-        }
-
-        async with redis.pipeline() as pipe:
-            pipe.setex(token_key, 3600, json.dumps(token_data))
-            pipe.setex(existing_token_key, 3600, reset_token)
-            pipe.incr(pw_reset_key)
-            pipe.expire(pw_reset_key, 3600)
-            
-            await pipe.execute()
-        
-        # Send email in background
-        # TODO
-        # background.add_task(
-        #     send_reset_email,
-        #     user.email,
-        #     reset_token,
-        #     user.username
-        # )
+        # Replaces any earlier token of the user
+        reset_token = await issue_reset_token(user.username, user.email)
+
+        # Send email from the background workers
+        await enqueue("send_reset_email", {"username": user.username, "reset_token": reset_token})
         
-        logger.info(f"Password reset token generated for user: {user.username}")
+        logger.info("Password reset token generated for user: %s", user.username)
         
         return res
     
@@ -141,7 +113,7 @@ async def forgot_password(
         raise
 
     except Exception as e:
-        logger.error(f"Error in forgot_password: {str(e)}")
+        logger.error("Error in forgot_password: %s", str(e))
         raise HTTPException(status_code=500, detail="An error occurred processing your request")
     
 @router.get("/validate-reset-token")
@@ -158,20 +130,17 @@ async def validate_reset_token(token: str):
     Raises:
         HTTPException: If the token is invalid or expired.
     """
-    token_key = f"pw_reset:{token}"
-    token_data = await redis.get(token_key)
-    
-    if not token_data:
+    data = await get_reset_token(token)
+    if not data:
         raise HTTPException(status_code=400, detail="Invalid or expired reset token")
-    
-    data = json.loads(token_data)
+
     return ValidateResetTokenResponse(
         valid=True,
         email=data["email"],
         created_at=data["created_at"]
     )
 
-@router.post("/reset-password", dependencies=[Depends(RateLimiter(times=2, hours=1))])
+@router.post("/reset-password", dependencies=[Depends(reset_pw_limit)])
 async def reset_password(
     req: ResetPasswordRequest,
     db: db_dependency
@@ -190,48 +159,30 @@ async def reset_password(
         HTTPException: If the reset token is invalid or expired, or if there is an error processing the request.
     """
     try:
-        logger.debug(f"Password reset attempt with token")
+        logger.debug("Password reset attempt with token")
 
-        token_key = f"pw_reset:{req.token}"
-        token_data = await redis.get(token_key)
-        
-        if not token_data:
+        # Claimed up front, so concurrent resets with the same token cannot both succeed
+        claimed = await claim_reset_token(req.token)
+        if not claimed:
             logger.warning("Invalid or expired reset token")
             raise HTTPException(status_code=400, detail="Invalid or expired reset token")
 
-        data = json.loads(token_data)
+        data, ttl_ms = claimed
         username = data["username"]
         
-        user = get_user_by_username(username, db)
-        if not user:
-            logger.error(f"User {username} not found")
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        hashed_password = password_hash(req.new_password)
-        update_user_pw(user.id, hashed_password, db) # type: ignore
-        
-        async with redis.pipeline() as pipe:
-            pipe.delete(token_key)
-            pipe.delete(f"user_pw_reset:{username}")
-
-            cursor = 0
-            while True:
-                cursor, keys = await redis.scan(
-                    cursor, 
-                    match="session:*", 
-                    count=100
-                )
-                for key in keys:
-                    session_username = await redis.get(key)
-                    if session_username == user.username:
-                        pipe.delete(key)
-                        logger.info(f"Invalidated session: {key}")
-                if cursor == 0:
-                    break
-            
-            await pipe.execute()
+        try:
+            user = await get_user_by_username(username, db)
+            hashed_password = await hash_password(req.new_password)
+            await update_user_pw(user.id, hashed_password, db) # type: ignore
+        except Exception:
+            # E.g. a busy hashing pool or a DB error: the password is unchanged, so the token stays usable
+            await restore_reset_token(req.token, ttl_ms)
+            raise
+        await finalize_reset_token(req.token)
+
+        await revoke_user_sessions(user.username)
         
-        logger.info(f"Password reset successful for user: {user.username}")
+        logger.info("Password reset successful for user: %s", user.username)
 
         return PasswordUpdateResponse(
             message="Password has been reset successfully. Please log in with your new password.",
@@ -241,5 +192,5 @@ async def reset_password(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in reset_password: {str(e)}")
+        logger.error("Error in reset_password: %s", str(e))
         raise HTTPException(status_code=500,detail="Failed to reset password")
\ No newline at end of file
@@ -1,7 +1,6 @@
 from uuid import UUID
-from pydantic import BaseModel, EmailStr, field_validator, model_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 from functools import cached_property
-from app.auth.utils import decrypt_email  # adjust import as needed
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -30,13 +29,48 @@ class UserInDB(BaseModel):
 
     @cached_property
     def decrypted_email(self) -> str:
+        from app.auth.utils import decrypt_email
         return decrypt_email(self.encrypted_email)
 
 class UserCreate(UserBase):
     password: str
 
-class UserOut(UserBase):
+class UserView(BaseModel):
+    """
+    A user without PII, for callers and responses that do not need the email.
+    """
     uuid: UUID
     id: int
+    username: str
+    first_name: str
+    last_name: str
     is_active: bool
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+class UserProfile(UserView):
+    """
+    A user including the decrypted email, for responses that show it.
+    """
+    email: str
+
+class UserOut(UserView):
+    """
+    The user passed around by auth dependencies and the user cache. The email stays
+    encrypted until something reads user.email, and is never part of a dump, so auth
+    checks that only need the username pay no decryption.
+    """
+    encrypted_email: str = Field(exclude=True, repr=False)
+
+    @cached_property
+    def email(self) -> str:
+        from app.auth.utils import decrypt_email
+        return decrypt_email(self.encrypted_email)
+
+    def profile(self, email: str | None = None) -> UserProfile:
+        """
+        Project the user for a response that includes the email.
+
+        Args:
+            email (str | None): The already decrypted email, e.g. from a batch decrypt.
+        """
+        return UserProfile(**self.model_dump(), email=email if email is not None else self.email)
\ No newline at end of file
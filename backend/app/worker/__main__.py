@@ -0,0 +1,172 @@
+"""
+Background job worker. Run with python -m app.worker [--queues emails plaid_sync ...].
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+
+from redis.exceptions import RedisError, ResponseError
+
+from app.worker.queue import QUEUES, CONSUMER_GROUP, QueueConfig, schedule_retry, dead_letter, promote_due_jobs
+from app.worker.jobs import JOBS
+from app.plaid.gateway import plaid_gateway
+from app.logger import logger
+from app.redis import redis_client as redis
+
+READ_BLOCK_MS = 5000
+PROMOTE_INTERVAL = 1.0
+
+class Worker:
+    """
+    Runs jobs from the queue streams through the shared consumer group.
+
+    Each queue gets as many consumer tasks as its concurrency, each handling one job at a
+    time. While a job runs its entry is re-claimed periodically as a heartbeat; entries
+    left idle past the queue's visibility timeout, e.g. by a crashed worker, are taken over
+    by another consumer. Failed jobs are retried with exponential backoff and moved to the
+    dead-letter stream after the queue's max attempts.
+
+    Attributes:
+        name (str): Worker name, prefixed to every consumer name.
+        queues (list[QueueConfig]): The queues this worker serves.
+    """
+    def __init__(self, name: str, queues: list[QueueConfig]):
+        self.name = name
+        self.queues = queues
+        self.stopping = asyncio.Event()
+
+    async def ensure_groups(self):
+        for queue in self.queues:
+            try:
+                await redis.xgroup_create(queue.stream, CONSUMER_GROUP, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    async def run(self):
+        await self.ensure_groups()
+        tasks = [
+            asyncio.create_task(self.consume(queue, f"{self.name}-{queue.name}-{slot}"))
+            for queue in self.queues
+            for slot in range(queue.concurrency)
+        ]
+        tasks.append(asyncio.create_task(self.promote_retries()))
+        logger.info("Worker %s serving %s", self.name, ', '.join(f'{q.name} x{q.concurrency}' for q in self.queues))
+        await self.stopping.wait()
+        logger.info("Worker %s stopping, waiting for running jobs", self.name)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self):
+        self.stopping.set()
+
+    async def promote_retries(self):
+        while not self.stopping.is_set():
+            try:
+                await promote_due_jobs()
+            except RedisError as e:
+                logger.warning("Promoting delayed jobs failed: %s", e)
+            await asyncio.sleep(PROMOTE_INTERVAL)
+
+    async def next_message(self, queue: QueueConfig, consumer: str):
+        """
+        Take over a job whose visibility timeout expired, or else wait for a new one.
+
+        Returns:
+            tuple | None: The entry ID, fields and delivery count, or None if nothing arrived.
+        """
+        _, claimed, _ = await redis.xautoclaim(
+            queue.stream, CONSUMER_GROUP, consumer,
+            min_idle_time=queue.visibility_timeout * 1000, start_id="0-0", count=1
+        )
+        claimed = [(message_id, fields) for message_id, fields in claimed if fields]
+        if claimed:
+            message_id, fields = claimed[0]
+            pending = await redis.xpending_range(queue.stream, CONSUMER_GROUP, min=message_id, max=message_id, count=1)
+            deliveries = pending[0]["times_delivered"] if pending else 1
+            logger.warning("Took over %s job %s after visibility timeout", fields.get('job'), message_id)
+            return message_id, fields, deliveries
+
+        entries = await redis.xreadgroup(CONSUMER_GROUP, consumer, {queue.stream: ">"}, count=1, block=READ_BLOCK_MS)
+        for _, messages in entries:
+            for message_id, fields in messages:
+                return message_id, fields, 1
+        return None
+
+    async def consume(self, queue: QueueConfig, consumer: str):
+        while not self.stopping.is_set():
+            try:
+                message = await self.next_message(queue, consumer)
+                if message is not None:
+                    await self.process(queue, consumer, *message)
+            except RedisError as e:
+                logger.warning("Consumer %s lost Redis: %s", consumer, e)
+                await asyncio.sleep(1)
+
+    async def heartbeat(self, queue: QueueConfig, consumer: str, message_id: str):
+        # Claiming our own entry resets its idle time, so it is not taken over while running.
+        # A failed claim is retried on the next beat; two more chances remain before the timeout.
+        while True:
+            await asyncio.sleep(queue.visibility_timeout / 3)
+            try:
+                await redis.xclaim(queue.stream, CONSUMER_GROUP, consumer, min_idle_time=0, message_ids=[message_id], justid=True)
+            except RedisError as e:
+                logger.warning("Heartbeat of job %s failed: %s", message_id, e)
+
+    async def process(self, queue: QueueConfig, consumer: str, message_id: str, fields: dict, deliveries: int):
+        """
+        Run one job, then acknowledge it after it succeeded, was rescheduled or was dead-lettered.
+        """
+        name = fields.get("job")
+        # Attempts that failed cleanly are counted in the entry, crashes in the delivery count
+        attempt = int(fields.get("attempt", 0)) + deliveries
+        handler = JOBS.get(name)
+        error = None
+
+        if handler is None:
+            error = f"Unknown job {name!r}"
+        elif attempt > queue.max_attempts:
+            error = "Worker stopped responding on every attempt"
+        else:
+            heartbeat = asyncio.create_task(self.heartbeat(queue, consumer, message_id))
+            try:
+                await handler(json.loads(fields["payload"]))
+                logger.debug("Finished %s job %s", name, message_id)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                # Retrieve a crash of the heartbeat here rather than losing it at cancel()
+                if heartbeat.done() and not heartbeat.cancelled() and heartbeat.exception() is not None:
+                    logger.error("Heartbeat of %s job %s stopped early: %r", name, message_id, heartbeat.exception())
+                heartbeat.cancel()
+
+        if error is not None:
+            if handler is not None and attempt < queue.max_attempts:
+                delay = queue.backoff * 2 ** (attempt - 1) * random.uniform(0.8, 1.2)
+                logger.warning("%s job %s failed on attempt %s, retrying in %.0fs: %s", name, message_id, attempt, delay, error)
+                await schedule_retry(queue, fields, attempt, delay)
+            else:
+                logger.error("%s job %s moved to dead-letter stream: %s", name, message_id, error)
+                await dead_letter(queue, message_id, {**fields, "attempt": attempt}, error)
+        await redis.xack(queue.stream, CONSUMER_GROUP, message_id)
+
+async def _main(name: str, queue_names: list[str]):
+    worker = Worker(name, [QUEUES[queue_name] for queue_name in queue_names])
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        plaid_gateway.shutdown()
+        await redis.aclose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background jobs from the Redis Stream queues.")
+    parser.add_argument("--name", default=f"{socket.gethostname()}-{os.getpid()}", help="Worker name, unique per process")
+    parser.add_argument("--queues", nargs="+", choices=list(QUEUES), default=list(QUEUES), help="Queues to serve")
+    args = parser.parse_args()
+    asyncio.run(_main(args.name, args.queues))
@@ -0,0 +1,78 @@
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.models.plaid_item_model import PlaidItem
+from app.plaid.webhooks import pending_key
+from app.transactions.rollups import rebuild_rollups
+from app.transactions.sync import sync_item
+from app.users.crud import get_user_by_username
+from app.users.email import send_reset_email
+from app.db import session_scope
+from app.logger import logger
+from app.redis import redis_client as redis
+
+# Job handlers by job name. A handler that raises is retried with backoff by the worker.
+JOBS: dict[str, Callable[[dict], Awaitable[None]]] = {}
+
+def job(name: str):
+    def register(handler: Callable[[dict], Awaitable[None]]):
+        JOBS[name] = handler
+        return handler
+    return register
+
+@job("send_reset_email")
+async def send_reset_email_job(payload: dict):
+    """
+    Email a password reset link. The address is looked up here so no plaintext email is queued.
+
+    Args:
+        payload (dict): The username and reset token.
+    """
+    async with session_scope() as db:
+        try:
+            user = await get_user_by_username(payload["username"], db)
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise
+            # The user was deleted after the reset was requested; retrying will not help
+            logger.warning("Password reset email for unknown user %s dropped", payload['username'])
+            return
+    await send_reset_email(user.email, payload["reset_token"], user.username)
+
+@job("plaid_sync")
+async def plaid_sync_job(payload: dict):
+    """
+    Run the transactions sync requested by a Plaid webhook.
+
+    Args:
+        payload (dict): The Plaid item ID and the webhook code.
+    """
+    item_id = payload["item_id"]
+    # Cleared before syncing, so webhooks arriving from now on queue another pass
+    await redis.delete(pending_key(item_id, payload["webhook_code"]))
+    async with session_scope() as db:
+        item_uuid = await db.scalar(select(PlaidItem.uuid).where(PlaidItem.plaid_item_id == item_id))
+        if item_uuid is None:
+            logger.warning("Sync requested for unknown Plaid item %s", item_id)
+            return
+        try:
+            await sync_item(item_uuid, db)
+        except HTTPException as e:
+            # The item was deactivated after the webhook; retrying will not help
+            if e.status_code != 404:
+                raise
+
+@job("rebuild_rollups")
+async def rebuild_rollups_job(payload: dict):
+    """
+    Recompute the monthly rollups.
+
+    Args:
+        payload (dict): Optionally the user_uuid to limit the rebuild to.
+    """
+    user_uuid = payload.get("user_uuid")
+    async with session_scope() as db:
+        await rebuild_rollups(db, UUID(user_uuid) if user_uuid else None)
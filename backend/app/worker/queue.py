@@ -0,0 +1,146 @@
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from dotenv import load_dotenv
+
+from app.logger import logger
+from app.redis import redis_client as redis
+
+load_dotenv()
+
+JOB_STREAM_PREFIX = "jobs:"
+DEAD_LETTER_STREAM = "jobs:dead"
+DELAYED_JOBS = "jobs:delayed"
+CONSUMER_GROUP = "workers"
+JOB_STREAM_MAXLEN = int(os.getenv("WORKER_STREAM_MAXLEN", "100000"))
+
+@dataclass(frozen=True)
+class QueueConfig:
+    """
+    Settings of one job queue. Each queue is a Redis Stream read through the workers consumer group.
+
+    Attributes:
+        name (str): The queue name. The stream is jobs:{name}.
+        concurrency (int): Jobs of this queue one worker process runs at the same time.
+        max_attempts (int): Attempts before a job is moved to the dead-letter stream.
+        visibility_timeout (int): Seconds without a heartbeat after which another worker may take a job over.
+        backoff (float): Seconds before the first retry, doubled on every further attempt.
+    """
+    name: str
+    concurrency: int
+    max_attempts: int
+    visibility_timeout: int
+    backoff: float
+
+    @property
+    def stream(self) -> str:
+        return f"{JOB_STREAM_PREFIX}{self.name}"
+
+def _queue(name: str, concurrency: int, max_attempts: int, visibility_timeout: int, backoff: float) -> QueueConfig:
+    prefix = f"WORKER_{name.upper()}_"
+    return QueueConfig(
+        name=name,
+        concurrency=int(os.getenv(f"{prefix}CONCURRENCY", str(concurrency))),
+        max_attempts=int(os.getenv(f"{prefix}MAX_ATTEMPTS", str(max_attempts))),
+        visibility_timeout=int(os.getenv(f"{prefix}VISIBILITY_TIMEOUT_SECONDS", str(visibility_timeout))),
+        backoff=float(os.getenv(f"{prefix}BACKOFF_SECONDS", str(backoff))),
+    )
+
+QUEUES = {
+    queue.name: queue for queue in (
+        _queue("emails", concurrency=8, max_attempts=5, visibility_timeout=60, backoff=10),
+        _queue("plaid_sync", concurrency=4, max_attempts=5, visibility_timeout=300, backoff=30),
+        _queue("rollups", concurrency=1, max_attempts=3, visibility_timeout=900, backoff=60),
+    )
+}
+
+# The queue each job runs on
+JOB_QUEUES = {
+    "send_reset_email": "emails",
+    "plaid_sync": "plaid_sync",
+    "rebuild_rollups": "rollups",
+}
+
+# Moves due retries from the delayed set onto their streams. Stream names come from the
+# members, so this assumes a single Redis node rather than a cluster.
+_PROMOTE_DUE = redis.register_script("""
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(due) do
+    local job = cjson.decode(member)
+    redis.call('XADD', job.stream, 'MAXLEN', '~', ARGV[3], '*',
+        'job', job.job, 'payload', job.payload, 'attempt', job.attempt)
+    redis.call('ZREM', KEYS[1], member)
+end
+return #due
+""")
+
+async def enqueue(job: str, payload: dict) -> str:
+    """
+    Queue a job for the background workers (python -m app.worker).
+
+    Args:
+        job (str): The job name, one of JOB_QUEUES.
+        payload (dict): JSON-serializable job arguments.
+
+    Returns:
+        str: The stream entry ID of the job.
+    """
+    queue = QUEUES[JOB_QUEUES[job]]
+    message_id = await redis.xadd(
+        queue.stream,
+        {"job": job, "payload": json.dumps(payload), "attempt": 0},
+        maxlen=JOB_STREAM_MAXLEN,
+        approximate=True
+    )
+    logger.debug("Queued %s job %s on %s", job, message_id, queue.name)
+    return message_id
+
+async def schedule_retry(queue: QueueConfig, fields: dict, attempt: int, delay: float):
+    """
+    Put a failed job back on its queue after a delay.
+
+    Args:
+        queue (QueueConfig): The queue the job came from.
+        fields (dict): The stream entry of the job.
+        attempt (int): The number of attempts made so far.
+        delay (float): Seconds to wait before the job becomes visible again.
+    """
+    member = json.dumps({
+        "id": uuid.uuid4().hex,
+        "stream": queue.stream,
+        "job": fields["job"],
+        "payload": fields["payload"],
+        "attempt": attempt,
+    })
+    await redis.zadd(DELAYED_JOBS, {member: time.time() + delay})
+
+async def dead_letter(queue: QueueConfig, message_id: str, fields: dict, error: str):
+    """
+    Move a job that ran out of attempts to the dead-letter stream for inspection and replay.
+
+    Args:
+        queue (QueueConfig): The queue the job came from.
+        message_id (str): The stream entry ID of the job.
+        fields (dict): The stream entry of the job.
+        error (str): The last error.
+    """
+    await redis.xadd(
+        DEAD_LETTER_STREAM,
+        {**fields, "queue": queue.name, "original_id": message_id, "error": error[:1000]},
+        maxlen=JOB_STREAM_MAXLEN,
+        approximate=True
+    )
+
+async def promote_due_jobs(batch_size: int = 100) -> int:
+    """
+    Move retries whose delay has passed back onto their streams, in one atomic script call.
+
+    Args:
+        batch_size (int): Maximum jobs to move.
+
+    Returns:
+        int: The number of jobs moved.
+    """
+    return await _PROMOTE_DUE(keys=[DELAYED_JOBS], args=[time.time(), batch_size, JOB_STREAM_MAXLEN])
@@ -0,0 +1,123 @@
+"""
+Compare the NumPy analytics in app.transactions.analytics against per-row Python loops.
+
+Transactions are synthetic and kept in memory, so only the computation is timed, not the
+database. The naive side iterates over objects shaped like ORM Transaction rows. The one-off
+cost of turning fetched columns into arrays is reported separately.
+
+Usage (from backend/):
+    python -m benchmarks.analytics --sizes 10000 100000 1000000
+"""
+import argparse
+import datetime
+import time
+from collections import defaultdict
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+
+from app.transactions.analytics import (
+    arrays_from_columns,
+    account_daily_balances,
+    daily_net_flow,
+    category_breakdown,
+    rolling_average,
+)
+
+CATEGORIES = [
+    "INCOME", "FOOD_AND_DRINK", "GENERAL_MERCHANDISE", "TRANSPORTATION", "RENT_AND_UTILITIES",
+    "ENTERTAINMENT", "TRAVEL", "LOAN_PAYMENTS", "TRANSFER_IN", "TRANSFER_OUT",
+]
+START = datetime.date(2015, 1, 1)
+
+def generate(size: int, accounts: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    days = np.sort(rng.integers(0, 3650, size)) + (START - datetime.date(1970, 1, 1)).days
+    cents = rng.integers(-200_000, 50_000, size)
+    categories = rng.integers(0, len(CATEGORIES), size)
+    account_ids = [uuid4() for _ in range(accounts)]
+    owners = rng.integers(0, accounts, size)
+    return days.tolist(), cents.tolist(), [CATEGORIES[c] for c in categories], [account_ids[a] for a in owners]
+
+def naive(transactions: list, window: int):
+    balances, running = {}, defaultdict(Decimal)
+    for txn in transactions:
+        running[txn.plaid_account_uuid] -= txn.amount
+        balances[txn.plaid_account_uuid, txn.date] = running[txn.plaid_account_uuid]
+
+    daily = defaultdict(Decimal)
+    for txn in transactions:
+        daily[txn.date] -= txn.amount
+    days, day = [], transactions[0].date
+    while day <= transactions[-1].date:
+        days.append(daily[day])
+        day += datetime.timedelta(days=1)
+
+    averages = []
+    for i in range(len(days)):
+        chunk = days[max(0, i - window + 1):i + 1]
+        averages.append(sum(chunk) / len(chunk))
+
+    breakdown = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    for txn in transactions:
+        if txn.amount > 0:
+            breakdown[txn.category][1] += txn.amount
+        else:
+            breakdown[txn.category][0] -= txn.amount
+    return balances, averages, breakdown
+
+def vectorized(arrays, window: int):
+    # The same functions get_cash_flow_analytics runs for /transactions/analytics
+    balances = account_daily_balances(arrays)
+    _, flow = daily_net_flow(arrays)
+    averages = rolling_average(flow, window)
+    breakdown = category_breakdown(arrays)
+    return balances, averages, breakdown
+
+def timed(fn, *args, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(sizes: list[int], accounts: int, window: int, repeat: int):
+    print(f"{'rows':>10} {'naive (s)':>12} {'numpy (s)':>12} {'speedup':>9} {'to arrays (s)':>14}")
+    for size in sizes:
+        columns = generate(size, accounts)
+        epoch = datetime.date(1970, 1, 1)
+        transactions = [
+            SimpleNamespace(
+                date=epoch + datetime.timedelta(days=day),
+                amount=Decimal(cents) / 100,
+                category=category,
+                plaid_account_uuid=account
+            )
+            for day, cents, category, account in zip(*columns)
+        ]
+
+        arrays = arrays_from_columns(*columns)
+
+        naive_balances, naive_averages, naive_breakdown = naive(transactions, window)
+        fast_balances, fast_averages, (labels, income, spend) = vectorized(arrays, window)
+        codes, days, cents = fast_balances
+        assert {key: int(b * 100) for key, b in naive_balances.items()} == dict(zip(zip(arrays.accounts[codes].tolist(), days.tolist()), cents.tolist()))
+        assert np.allclose([float(a) * 100 for a in naive_averages], fast_averages)
+        assert all(naive_breakdown[label] == [i / Decimal(100), s / Decimal(100)] for label, i, s in zip(labels, income.tolist(), spend.tolist()))
+
+        naive_time = timed(naive, transactions, window, repeat=repeat)
+        fast_time = timed(vectorized, arrays, window, repeat=repeat)
+        load_time = timed(arrays_from_columns, *columns, repeat=repeat)
+        print(f"{size:>10} {naive_time:>12.4f} {fast_time:>12.4f} {naive_time / fast_time:>8.1f}x {load_time:>14.4f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark vectorized transaction analytics against per-row loops.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Row counts to benchmark")
+    parser.add_argument("--accounts", type=int, default=4, help="Number of accounts the rows are spread over")
+    parser.add_argument("--window", type=int, default=30, help="Rolling average window in days")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the best is reported")
+    args = parser.parse_args()
+    main(args.sizes, args.accounts, args.window, args.repeat)
@@ -0,0 +1,190 @@
+"""
+A stand-in for the Plaid API, for load tests. Point the app at it with PLAID_HOST.
+
+Implements the endpoints the app calls, with response bodies the Plaid SDK accepts. Every
+response is derived from the access token, so any number of server workers agree on the
+data without sharing state. An optional delay simulates Plaid's network latency.
+
+Usage (from backend/):
+    python -m benchmarks.fake_plaid --port 8100 --latency-ms 150
+"""
+import argparse
+import asyncio
+import datetime
+import hashlib
+import os
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+FAKE_PLAID_LATENCY_MS = float(os.getenv("FAKE_PLAID_LATENCY_MS", "0"))
+FAKE_PLAID_ACCOUNTS = int(os.getenv("FAKE_PLAID_ACCOUNTS", "3"))
+FAKE_PLAID_TRANSACTIONS = int(os.getenv("FAKE_PLAID_TRANSACTIONS", "200"))
+FAKE_PLAID_PAGE_SIZE = 500
+
+INSTITUTION_ID = "ins_fake"
+CATEGORIES = [
+    ("INCOME", "INCOME_WAGES"),
+    ("FOOD_AND_DRINK", "FOOD_AND_DRINK_RESTAURANT"),
+    ("GENERAL_MERCHANDISE", "GENERAL_MERCHANDISE_ONLINE_MARKETPLACES"),
+    ("TRANSPORTATION", "TRANSPORTATION_GAS"),
+    ("RENT_AND_UTILITIES", "RENT_AND_UTILITIES_RENT"),
+    ("ENTERTAINMENT", "ENTERTAINMENT_MUSIC_AND_AUDIO"),
+]
+
+app = FastAPI()
+
+def _seed(*parts) -> int:
+    return int.from_bytes(hashlib.sha256(":".join(map(str, parts)).encode()).digest()[:8], "big")
+
+def _item_id(access_token: str) -> str:
+    return f"item-{hashlib.sha256(access_token.encode()).hexdigest()[:24]}"
+
+def _item(access_token: str) -> dict:
+    return {
+        "item_id": _item_id(access_token),
+        "institution_id": INSTITUTION_ID,
+        "webhook": None,
+        "error": None,
+        "available_products": ["balance"],
+        "billed_products": ["auth", "transactions"],
+        "consent_expiration_time": None,
+        "update_type": "background",
+    }
+
+def _accounts(access_token: str) -> list[dict]:
+    item_id = _item_id(access_token)
+    subtypes = [("depository", "checking"), ("depository", "savings"), ("credit", "credit card")]
+    accounts = []
+    for index in range(FAKE_PLAID_ACCOUNTS):
+        account_type, subtype = subtypes[index % len(subtypes)]
+        balance = _seed(item_id, index) % 1_000_000 / 100
+        accounts.append({
+            "account_id": f"{item_id}-acc{index}",
+            "balances": {
+                "available": balance,
+                "current": balance,
+                "limit": None,
+                "iso_currency_code": "USD",
+                "unofficial_currency_code": None,
+            },
+            "mask": f"{index:04d}",
+            "name": f"Fake {subtype} {index}",
+            "official_name": None,
+            "type": account_type,
+            "subtype": subtype,
+        })
+    return accounts
+
+def _transaction(item_id: str, index: int) -> dict:
+    seed = _seed(item_id, "txn", index)
+    day = datetime.date.today() - datetime.timedelta(days=seed % 730)
+    primary, detailed = CATEGORIES[seed % len(CATEGORIES)]
+    amount = -2500.0 if primary == "INCOME" else (seed % 20_000) / 100
+    return {
+        "transaction_id": f"{item_id}-txn{index}",
+        "account_id": f"{item_id}-acc{seed % FAKE_PLAID_ACCOUNTS}",
+        "amount": amount,
+        "iso_currency_code": "USD",
+        "unofficial_currency_code": None,
+        "date": day.isoformat(),
+        "authorized_date": None,
+        "authorized_datetime": None,
+        "datetime": None,
+        "name": f"Fake merchant {seed % 97}",
+        "merchant_name": f"Fake merchant {seed % 97}",
+        "pending": False,
+        "pending_transaction_id": None,
+        "account_owner": None,
+        "payment_channel": "online",
+        "transaction_code": None,
+        "location": {
+            "address": None, "city": None, "region": None, "postal_code": None,
+            "country": None, "lat": None, "lon": None, "store_number": None,
+        },
+        "payment_meta": {
+            "reference_number": None, "ppd_id": None, "payee": None, "by_order_of": None,
+            "payer": None, "payment_method": None, "payment_processor": None, "reason": None,
+        },
+        "personal_finance_category": {"primary": primary, "detailed": detailed, "confidence_level": "HIGH"},
+    }
+
+def _response(body: dict) -> JSONResponse:
+    return JSONResponse({**body, "request_id": uuid.uuid4().hex[:15]})
+
+@app.middleware("http")
+async def simulate_latency(request: Request, call_next):
+    if FAKE_PLAID_LATENCY_MS:
+        await asyncio.sleep(FAKE_PLAID_LATENCY_MS / 1000)
+    return await call_next(request)
+
+@app.post("/link/token/create")
+async def link_token_create():
+    expiration = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=4)
+    return _response({"link_token": f"link-fake-{uuid.uuid4()}", "expiration": expiration.isoformat()})
+
+@app.post("/item/public_token/exchange")
+async def item_public_token_exchange(request: Request):
+    access_token = f"access-fake-{(await request.json())['public_token']}"
+    return _response({"access_token": access_token, "item_id": _item_id(access_token)})
+
+@app.post("/item/get")
+async def item_get(request: Request):
+    return _response({"item": _item((await request.json())["access_token"])})
+
+@app.post("/accounts/get")
+async def accounts_get(request: Request):
+    access_token = (await request.json())["access_token"]
+    return _response({"accounts": _accounts(access_token), "item": _item(access_token)})
+
+@app.post("/institutions/get_by_id")
+async def institutions_get_by_id(request: Request):
+    institution_id = (await request.json())["institution_id"]
+    return _response({"institution": {
+        "institution_id": institution_id,
+        "name": "Fake Bank",
+        "products": ["auth", "transactions"],
+        "country_codes": ["US"],
+        "routing_numbers": [],
+        "oauth": False,
+    }})
+
+@app.post("/transactions/sync")
+async def transactions_sync(request: Request):
+    """
+    Returns all transactions of the item as added on the first sync, in pages, and nothing after.
+    """
+    body = await request.json()
+    access_token = body["access_token"]
+    item_id = _item_id(access_token)
+    start = int(body.get("cursor") or 0)
+    count = min((body.get("count") or 100), FAKE_PLAID_PAGE_SIZE)
+    end = min(start + count, FAKE_PLAID_TRANSACTIONS)
+    return _response({
+        "added": [_transaction(item_id, index) for index in range(start, end)],
+        "modified": [],
+        "removed": [],
+        "accounts": _accounts(access_token),
+        "next_cursor": str(end),
+        "has_more": end < FAKE_PLAID_TRANSACTIONS,
+        "transactions_update_status": "HISTORICAL_UPDATE_COMPLETE",
+    })
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a fake Plaid API for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=FAKE_PLAID_LATENCY_MS, help="Delay added to every response.")
+    parser.add_argument("--accounts", type=int, default=FAKE_PLAID_ACCOUNTS, help="Accounts per item.")
+    parser.add_argument("--transactions", type=int, default=FAKE_PLAID_TRANSACTIONS, help="Transactions per item.")
+    args = parser.parse_args()
+
+    # Workers import the module afresh, so pass the settings on through the environment
+    os.environ["FAKE_PLAID_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_PLAID_ACCOUNTS"] = str(args.accounts)
+    os.environ["FAKE_PLAID_TRANSACTIONS"] = str(args.transactions)
+    uvicorn.run("benchmarks.fake_plaid:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
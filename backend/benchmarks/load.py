@@ -0,0 +1,348 @@
+"""
+End-to-end load test of the API against local Postgres and Redis and a fake Plaid.
+
+Starts benchmarks.fake_plaid and the app under uvicorn with rate limiting off, seeds users
+with sessions, linked items, accounts and transactions, then drives each scenario with a
+fixed number of requests at a fixed concurrency. Throughput and latency percentiles per
+scenario are written as JSON with sorted keys, so runs on two commits can be diffed directly
+or with --compare.
+
+The schema is brought up to date with alembic upgrade head first. Every run seeds new
+users under a fresh run ID, so point DATABASE_URL at a scratch database.
+With --fake-redis the app runs inside this process on an in-memory Redis instead (needs
+the fakeredis and lupa packages), which leaves out the server but keeps the harness and
+the app on one CPU.
+
+Usage (from backend/):
+    python -m benchmarks.load --users 200 --requests 2000 --concurrency 32 --output load.json
+    python -m benchmarks.load --scenarios login session --compare load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
+
+import httpx
+import numpy as np
+
+SCENARIOS = ("signup", "login", "session", "accounts")
+PASSWORD = "LoadTest1!"
+HEALTH_TIMEOUT_SECONDS = 60
+
+@dataclass
+class LoadUser:
+    username: str
+    email: str
+    session_id: str | None = None
+
+def configure_environment(args: argparse.Namespace):
+    """
+    Settings shared by the harness and the app. Must run before any app module is imported.
+    """
+    os.environ["PLAID_HOST"] = f"http://127.0.0.1:{args.plaid_port}"
+    os.environ.setdefault("PLAID_CLIENT_ID", "fake")
+    os.environ.setdefault("PLAID_SANDBOX_ID", "fake")
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["LOG_LEVEL"] = args.log_level
+    os.environ["LOG_FILE"] = ""
+
+def start_process(args: list[str]) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", *args], env=os.environ.copy())
+
+async def wait_until_healthy(client: httpx.AsyncClient, url: str, process: subprocess.Popen | None = None):
+    deadline = time.monotonic() + HEALTH_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode} before becoming healthy")
+        try:
+            if (await client.get(url)).status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} did not become healthy within {HEALTH_TIMEOUT_SECONDS}s")
+
+async def seed_users(count: int, run_id: str) -> list[LoadUser]:
+    """
+    Insert users directly, sharing one password hash so seeding does not wait on bcrypt.
+    """
+    from app.auth.hashing import hash_password
+    from app.auth.utils import sanitize_email, email_hash, encrypt_email
+    from app.db import session_scope
+    from app.models.user_model import User
+
+    hashed_password = await hash_password(PASSWORD)
+    users = [LoadUser(username=f"load{run_id}u{i}", email=f"load{run_id}u{i}@example.com") for i in range(count)]
+    async with session_scope() as db:
+        for start in range(0, count, 1000):
+            db.add_all([
+                User(
+                    username=user.username,
+                    first_name="load",
+                    last_name="test",
+                    hashed_email=email_hash(sanitize_email(user.email)),
+                    encrypted_email=encrypt_email(sanitize_email(user.email)),
+                    hashed_password=hashed_password,
+                ) for user in users[start:start + 1000]
+            ])
+            await db.commit()
+    return users
+
+async def create_sessions(users: list[LoadUser]):
+    from app.sessions.crud import create_session_record
+
+    for user in users:
+        user.session_id = await create_session_record(user.username)
+
+async def link_items(client: httpx.AsyncClient, users: list[LoadUser], items: int, concurrency: int, run_id: str):
+    """
+    Link items through /plaid/exchange_public_token, so accounts come from the fake Plaid via the app.
+    """
+    def make_request(i: int):
+        user = users[i // items]
+        return "POST", "/plaid/exchange_public_token", {
+            "json": {"public_token": f"public-{run_id}-{i}"},
+            "headers": {"Cookie": f"session_id={user.session_id}"},
+        }
+
+    _, statuses, _ = await drive(client, make_request, len(users) * items, concurrency)
+    failed = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    if failed:
+        raise RuntimeError(f"Linking {failed} items failed: {dict(statuses)}")
+
+async def sync_items(concurrency: int) -> int:
+    """
+    Pull every item's transactions from the fake Plaid through the regular sync path.
+    """
+    from sqlalchemy import select
+    from app.db import session_scope
+    from app.models.plaid_item_model import PlaidItem
+    from app.transactions.sync import sync_item
+
+    async with session_scope() as db:
+        item_uuids = (await db.scalars(select(PlaidItem.uuid))).all()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    async def sync(item_uuid) -> int:
+        async with semaphore, session_scope() as db:
+            return (await sync_item(item_uuid, db)).added
+
+    return sum(await asyncio.gather(*(sync(item_uuid) for item_uuid in item_uuids)))
+
+def scenario_requests(name: str, users: list[LoadUser], run_id: str) -> Callable[[int], tuple]:
+    """
+    Map a request number to the (method, url, options) of one request of the scenario.
+    """
+    if name == "signup":
+        return lambda i: ("POST", "/users/create", {"json": {
+            "email": f"signup{run_id}u{i}@example.com",
+            "username": f"signup{run_id}u{i}",
+            "first_name": "load",
+            "last_name": "test",
+            "password": PASSWORD,
+        }})
+    if name == "login":
+        return lambda i: ("POST", "/auth/token/email", {"data": {
+            "username": users[i % len(users)].email,
+            "password": PASSWORD,
+        }})
+    if name == "session":
+        return lambda i: ("GET", "/session", {"headers": {"Cookie": f"session_id={users[i % len(users)].session_id}"}})
+    if name == "accounts":
+        return lambda i: ("GET", "/plaid/get_accounts", {"headers": {"Cookie": f"session_id={users[i % len(users)].session_id}"}})
+    raise ValueError(f"Unknown scenario {name}")
+
+async def drive(
+    client: httpx.AsyncClient,
+    make_request: Callable[[int], tuple],
+    count: int,
+    concurrency: int,
+    offset: int = 0
+) -> tuple[list[float], Counter, float]:
+    """
+    Send count requests from concurrency workers, each sending its next request as soon as the last one returns.
+
+    Returns:
+        tuple[list[float], Counter, float]: Latencies in seconds, responses per status code and the wall time.
+    """
+    latencies, statuses = [], Counter()
+    numbers = iter(range(offset, offset + count))
+
+    async def worker():
+        for i in numbers:
+            method, url, options = make_request(i)
+            start = time.perf_counter()
+            try:
+                status = str((await client.request(method, url, **options)).status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+def summarize(latencies: list[float], statuses: Counter, wall: float) -> dict:
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "statuses": dict(sorted(statuses.items())),
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "latency_ms": {
+            "mean": round(float(ms.mean()), 2),
+            "p50": round(float(p50), 2),
+            "p95": round(float(p95), 2),
+            "p99": round(float(p99), 2),
+            "max": round(float(ms.max()), 2),
+        },
+    }
+
+async def run_scenarios(client: httpx.AsyncClient, users: list[LoadUser], args: argparse.Namespace, run_id: str) -> dict:
+    results = {}
+    for name in args.scenarios:
+        make_request = scenario_requests(name, users, run_id)
+        if args.warmup:
+            await drive(client, make_request, args.warmup, args.concurrency)
+        latencies, statuses, wall = await drive(client, make_request, args.requests, args.concurrency, offset=args.warmup)
+        results[name] = summarize(latencies, statuses, wall)
+        print(
+            f"{name:>10}: {results[name]['throughput_rps']:>8} req/s"
+            f"  p50 {results[name]['latency_ms']['p50']:>8} ms"
+            f"  p95 {results[name]['latency_ms']['p95']:>8} ms"
+            f"  p99 {results[name]['latency_ms']['p99']:>8} ms"
+            f"  errors {results[name]['errors']}"
+        )
+    return results
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline: dict, report: dict):
+    """
+    Print the change of every scenario's throughput and latency percentiles against a baseline report.
+    """
+    print(f"\nAgainst {baseline.get('commit') or 'baseline'}:")
+    for name, result in report["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if old is None:
+            print(f"{name:>10}: not in baseline")
+            continue
+        changes = [("req/s", old["throughput_rps"], result["throughput_rps"])]
+        changes += [(key, old["latency_ms"][key], result["latency_ms"][key]) for key in ("p50", "p95", "p99")]
+        print(f"{name:>10}: " + "  ".join(
+            f"{label} {before} -> {after} ({(after - before) / before * 100:+.1f}%)" if before else f"{label} {before} -> {after}"
+            for label, before, after in changes
+        ))
+
+async def _main(args: argparse.Namespace):
+    configure_environment(args)
+    run_id = uuid.uuid4().hex[:8]
+    processes = [start_process([
+        "benchmarks.fake_plaid", "--port", str(args.plaid_port), "--latency-ms", str(args.plaid_latency_ms),
+        "--accounts", str(args.accounts), "--transactions", str(args.transactions),
+    ])]
+
+    try:
+        subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True)
+        async with httpx.AsyncClient() as probe:
+            await wait_until_healthy(probe, f"{os.environ['PLAID_HOST']}/docs", processes[0])
+
+        if args.fake_redis:
+            import fakeredis
+            from app.redis import redis_client
+            redis_client.connection_pool = fakeredis.FakeAsyncRedis(decode_responses=True).connection_pool
+
+            from app.main import app
+            lifespan = app.router.lifespan_context(app)
+            await lifespan.__aenter__()
+            transport = httpx.ASGITransport(app=app)
+        else:
+            lifespan = None
+            processes.append(start_process([
+                "uvicorn", "app.main:app", "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning",
+            ]))
+            transport = None
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            transport=transport, base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=args.timeout
+        ) as client:
+            if transport is None:
+                await wait_until_healthy(client, "/health", processes[1])
+
+            users = await seed_users(args.users, run_id)
+            await create_sessions(users)
+            await link_items(client, users, args.items, args.concurrency, run_id)
+            transactions = await sync_items(args.concurrency) if args.transactions else 0
+            print(f"Seeded {len(users)} users, {len(users) * args.items} items and {transactions} transactions")
+
+            scenarios = await run_scenarios(client, users, args, run_id)
+
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "mode": "in-process, fake redis" if args.fake_redis else f"uvicorn, {args.workers} workers",
+            "users": args.users,
+            "items_per_user": args.items,
+            "accounts_per_item": args.accounts,
+            "transactions_per_item": args.transactions,
+            "plaid_latency_ms": args.plaid_latency_ms,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": scenarios,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Wrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the API end to end.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--users", type=int, default=100, help="Users to seed.")
+    parser.add_argument("--items", type=int, default=1, help="Linked items per user.")
+    parser.add_argument("--accounts", type=int, default=3, help="Accounts per item.")
+    parser.add_argument("--transactions", type=int, default=200, help="Transactions per item.")
+    parser.add_argument("--requests", type=int, default=1000, help="Measured requests per scenario.")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per scenario sent first.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once.")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds before a request counts as failed.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--plaid-port", type=int, default=8100)
+    parser.add_argument("--plaid-latency-ms", type=float, default=0, help="Delay the fake Plaid adds to every response.")
+    parser.add_argument("--fake-redis", action="store_true", help="Run the app in this process on an in-memory Redis.")
+    parser.add_argument("--log-level", default="WARNING", help="LOG_LEVEL of the app.")
+    parser.add_argument("--output", help="Write the report to this JSON file.")
+    parser.add_argument("--compare", help="Print changes against this earlier report.")
+    args = parser.parse_args()
+
+    asyncio.run(_main(args))
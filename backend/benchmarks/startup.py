@@ -0,0 +1,109 @@
+"""
+Report the cold-start import cost of the app, per module and per top-level package.
+
+Imports the target module in fresh interpreters under python -X importtime and reports the
+median over the runs. The per-package figure is the self time of every module of that
+package, so it adds up to the total. Importing app.main runs no DDL or network calls, so
+no database is needed, only the settings app modules read at import.
+
+Usage (from backend/):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --module app.worker.jobs --top 30 --output startup.json
+    python -m benchmarks.startup --compare startup.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+def import_times(module: str) -> tuple[float, dict[str, tuple[int, int]]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        tuple[float, dict]: The wall time of the import in ms, and (self, cumulative) microseconds per imported module.
+    """
+    code = f"import time; start = time.perf_counter(); import {module}; print((time.perf_counter() - start) * 1000)"
+    env = {**os.environ, "LOG_FILE": ""}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return float(result.stdout.strip().splitlines()[-1]), modules
+
+def report(module: str, runs: int) -> dict:
+    walls, per_module = [], defaultdict(list)
+    for _ in range(runs):
+        wall, modules = import_times(module)
+        walls.append(wall)
+        for name, times in modules.items():
+            per_module[name].append(times)
+
+    modules = {
+        name: {
+            "self_ms": round(statistics.median(t[0] for t in times) / 1000, 2),
+            "cumulative_ms": round(statistics.median(t[1] for t in times) / 1000, 2),
+        } for name, times in per_module.items()
+    }
+    packages = defaultdict(float)
+    for name, times in modules.items():
+        packages[name.split(".")[0]] += times["self_ms"]
+
+    return {
+        "module": module,
+        "runs": runs,
+        "python": sys.version.split()[0],
+        "total_ms": round(statistics.median(walls), 1),
+        "packages_ms": {name: round(ms, 1) for name, ms in sorted(packages.items(), key=lambda item: -item[1])},
+        "modules": dict(sorted(modules.items(), key=lambda item: -item[1]["cumulative_ms"])),
+    }
+
+def print_report(result: dict, top: int):
+    print(f"import {result['module']}: {result['total_ms']} ms (median of {result['runs']})\n")
+    print("Packages by self time:")
+    for name, ms in list(result["packages_ms"].items())[:top]:
+        print(f"  {ms:>9.1f} ms  {name}")
+    print("\nApp modules by cumulative time:")
+    app_modules = [(name, times) for name, times in result["modules"].items() if name.split(".")[0] == "app"]
+    for name, times in app_modules[:top]:
+        print(f"  {times['cumulative_ms']:>9.1f} ms  {name}")
+
+def compare(baseline: dict, result: dict, top: int):
+    print(f"\nAgainst baseline: total {baseline['total_ms']} -> {result['total_ms']} ms")
+    names = sorted(
+        set(baseline["packages_ms"]) | set(result["packages_ms"]),
+        key=lambda name: -abs(result["packages_ms"].get(name, 0) - baseline["packages_ms"].get(name, 0))
+    )
+    for name in names[:top]:
+        before, after = baseline["packages_ms"].get(name, 0), result["packages_ms"].get(name, 0)
+        print(f"  {before:>9.1f} -> {after:>9.1f} ms  ({after - before:+.1f})  {name}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report per-module import time of the app.")
+    parser.add_argument("--module", default="app.main", help="Module to import.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to take the median over.")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print per table.")
+    parser.add_argument("--output", help="Write the full report to this JSON file.")
+    parser.add_argument("--compare", help="Print package changes against this earlier report.")
+    args = parser.parse_args()
+
+    result = report(args.module, args.runs)
+    print_report(result, args.top)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), result, args.top)
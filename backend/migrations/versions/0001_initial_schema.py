@@ -0,0 +1,140 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+The schema the app used to create with Base.metadata.create_all at startup. Databases
+created that way can be marked as migrated with: alembic stamp 0001
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "institutions",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("institution_id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("url", sa.String(), nullable=True),
+        sa.Column("primary_color", sa.String(), nullable=True),
+        sa.Column("logo", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_institutions_institution_id", "institutions", ["institution_id"], unique=True)
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("hashed_email", sa.String(), nullable=False),
+        sa.Column("encrypted_email", sa.String(), nullable=False),
+        sa.Column("first_name", sa.String(), nullable=False),
+        sa.Column("last_name", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("uuid"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_hashed_email", "users", ["hashed_email"], unique=True)
+
+    op.create_table(
+        "plaid_items",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("plaid_item_id", sa.String(), nullable=False),
+        sa.Column("plaid_access_token", sa.String(), nullable=False),
+        sa.Column("institution_id", sa.String(), nullable=False),
+        sa.Column("institution_name", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("needs_reauth", sa.Boolean(), nullable=True),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("last_successful_sync", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("transactions_cursor", sa.String(), nullable=True),
+        sa.Column("user_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_uuid"], ["users.uuid"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("uuid"),
+        sa.UniqueConstraint("plaid_item_id"),
+    )
+
+    op.create_table(
+        "plaid_accounts",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("plaid_account_id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("official_name", sa.String(), nullable=True),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("subtype", sa.String(), nullable=True),
+        sa.Column("mask", sa.String(), nullable=True),
+        sa.Column("last_balance", sa.Float(), nullable=True),
+        sa.Column("last_sync", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("plaid_item_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(["plaid_item_uuid"], ["plaid_items.uuid"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("uuid"),
+        sa.UniqueConstraint("plaid_account_id"),
+    )
+
+    # Monthly partitions are created on demand by app/transactions/partitions.py
+    op.create_table(
+        "Transactions",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("plaid_transaction_id", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("merchant_name", sa.String(), nullable=True),
+        sa.Column("category", sa.String(), nullable=True),
+        sa.Column("amount", sa.Numeric(14, 2), nullable=False),
+        sa.Column("iso_currency_code", sa.String(), nullable=True),
+        sa.Column("pending", sa.Boolean(), nullable=False),
+        sa.Column("plaid_account_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(["plaid_account_uuid"], ["plaid_accounts.uuid"]),
+        sa.ForeignKeyConstraint(["user_uuid"], ["users.uuid"]),
+        sa.PrimaryKeyConstraint("id", "date"),
+        sa.UniqueConstraint("plaid_transaction_id", "date", name="uq_transactions_plaid_transaction_id_date"),
+        postgresql_partition_by="RANGE (date)",
+    )
+    op.create_index("ix_transactions_user_uuid_date", "Transactions", ["user_uuid", sa.text("date DESC")])
+    op.create_index("ix_transactions_plaid_account_uuid_date", "Transactions", ["plaid_account_uuid", "date"])
+
+    op.create_table(
+        "monthly_rollups",
+        sa.Column("user_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("plaid_account_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("income", sa.Numeric(14, 2), nullable=False),
+        sa.Column("spend", sa.Numeric(14, 2), nullable=False),
+        sa.Column("transaction_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_uuid"], ["users.uuid"]),
+        sa.ForeignKeyConstraint(["plaid_account_uuid"], ["plaid_accounts.uuid"]),
+        sa.PrimaryKeyConstraint("user_uuid", "plaid_account_uuid", "month", "category"),
+    )
+
+def downgrade():
+    op.drop_table("monthly_rollups")
+    op.drop_table("Transactions")
+    op.drop_table("plaid_accounts")
+    op.drop_table("plaid_items")
+    op.drop_index("ix_users_hashed_email", table_name="users")
+    op.drop_index("ix_users_username", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
+    op.drop_index("ix_institutions_institution_id", table_name="institutions")
+    op.drop_table("institutions")
@@ -0,0 +1,31 @@
+"""social identities
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "social_identities",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("provider", sa.String(), nullable=False),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("user_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_uuid"], ["users.uuid"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("provider", "subject", name="uq_social_identities_provider_subject"),
+    )
+    op.create_index("ix_social_identities_user_uuid", "social_identities", ["user_uuid"])
+
+def downgrade():
+    op.drop_index("ix_social_identities_user_uuid", table_name="social_identities")
+    op.drop_table("social_identities")
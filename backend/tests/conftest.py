@@ -0,0 +1,11 @@
+import os
+
+# The app reads its settings at import time. Nothing here connects to Postgres or Redis.
+os.environ.setdefault("DATABASE_URL", "postgresql://postgres@localhost/postgres")
+os.environ.setdefault("LOG_FILE", "")
+
+import pytest
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
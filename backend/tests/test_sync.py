@@ -0,0 +1,198 @@
+import datetime
+import json
+import uuid
+
+import pytest
+from plaid import ApiException
+
+from app.plaid.gateway import PlaidGateway
+from app.transactions import sync
+from app.transactions.rollups import transaction_deltas, merge_deltas
+
+pytestmark = pytest.mark.anyio
+
+ITEM_UUID = uuid.uuid4()
+USER_UUID = uuid.uuid4()
+ACCOUNT_UUID = uuid.uuid4()
+ACCOUNT_ID = "acc-1"
+
+def txn(transaction_id: str, amount: float = 10.0, date: str = "2025-03-14", category: str = "FOOD_AND_DRINK") -> dict:
+    return {
+        "transaction_id": transaction_id,
+        "account_id": ACCOUNT_ID,
+        "name": f"Purchase {transaction_id}",
+        "amount": amount,
+        "iso_currency_code": "USD",
+        "date": date,
+        "pending": False,
+        "personal_finance_category": {"primary": category},
+    }
+
+def page(next_cursor: str, has_more: bool = False, added=(), modified=(), removed=()) -> dict:
+    return {
+        "added": list(added),
+        "modified": list(modified),
+        "removed": [{"transaction_id": transaction_id} for transaction_id in removed],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+def mutation_during_pagination() -> ApiException:
+    e = ApiException(status=400, reason="Bad Request")
+    e.body = json.dumps({"error_code": "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"})
+    return e
+
+class FakePlaid:
+    """
+    Plaid client answering /transactions/sync with scripted pages, or raising scripted errors.
+    """
+    def __init__(self, responses: list):
+        self.responses = list(responses)
+        self.cursors = []
+
+    def transactions_sync(self, request):
+        self.cursors.append(request.get("cursor"))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+class FakeResult:
+    def __init__(self, rows=None, rowcount: int = 0):
+        self.rows = rows or []
+        self.rowcount = rowcount
+
+    def one_or_none(self):
+        return self.rows[0] if self.rows else None
+
+    def all(self):
+        return self.rows
+
+class FakeSession:
+    """
+    Session holding transactions and rollups in memory, with commit and rollback.
+
+    Answers the item lookup, the account lookup and the cursor update of sync_item in
+    that order. The cursor update matches when advanced is True.
+    """
+    def __init__(self, cursor: str | None = None, transactions=(), advanced: bool = True):
+        self.cursor = cursor
+        self.advanced = advanced
+        self.commits = 0
+        self.committed = {row["plaid_transaction_id"]: row for row in transactions}
+        self.committed_rollups = dict(transaction_deltas(self.committed.values(), 1))
+        self._restore()
+        self.results = [
+            FakeResult([("access-token", cursor, USER_UUID)]),
+            FakeResult([(ACCOUNT_ID, ACCOUNT_UUID)]),
+        ]
+
+    async def execute(self, stmt):
+        if self.results:
+            return self.results.pop(0)
+        return FakeResult(rowcount=1 if self.advanced else 0)
+
+    async def commit(self):
+        self.commits += 1
+        self.committed = dict(self.transactions)
+        self.committed_rollups = dict(self.rollups)
+
+    async def rollback(self):
+        self._restore()
+
+    def _restore(self):
+        self.transactions = dict(self.committed)
+        self.rollups = dict(self.committed_rollups)
+
+    def expected_rollups(self) -> dict:
+        """
+        The rollups the committed transactions add up to.
+        """
+        return dict(transaction_deltas(self.committed.values(), 1))
+
+@pytest.fixture(autouse=True)
+def in_memory_storage(monkeypatch):
+    async def ensure_partitions(dates, db):
+        list(dates)
+        return set()
+
+    async def delete_transactions(plaid_transaction_ids, db):
+        return [db.transactions.pop(i) for i in plaid_transaction_ids if i in db.transactions]
+
+    async def upsert_transactions(rows, db):
+        for row in rows:
+            db.transactions[row["plaid_transaction_id"]] = row
+        return len(rows)
+
+    async def apply_rollup_deltas(deltas, db):
+        merged = merge_deltas(db.rollups, deltas)
+        db.rollups = {key: value for key, value in merged.items() if value[2] != 0}
+        return len(deltas)
+
+    monkeypatch.setattr(sync, "ensure_partitions", ensure_partitions)
+    monkeypatch.setattr(sync, "delete_transactions", delete_transactions)
+    monkeypatch.setattr(sync, "upsert_transactions", upsert_transactions)
+    monkeypatch.setattr(sync, "apply_rollup_deltas", apply_rollup_deltas)
+
+async def run_sync(db: FakeSession, responses: list):
+    plaid = FakePlaid(responses)
+    gateway = PlaidGateway(plaid_client=plaid, max_concurrency=1)
+    try:
+        return await sync.sync_item(ITEM_UUID, db, gateway), plaid
+    finally:
+        gateway.shutdown()
+
+def stored_row(transaction_id: str, amount: float, date: str = "2025-03-14") -> dict:
+    return sync.transaction_to_row(txn(transaction_id, amount, date), {ACCOUNT_ID: ACCOUNT_UUID}, USER_UUID)
+
+async def test_add_then_modify_across_pages_is_stored_once():
+    db = FakeSession(cursor="c0", transactions=[stored_row("t0", 5.0)])
+    result, plaid = await run_sync(db, [
+        page("c1", has_more=True, added=[txn("t1", 10.0)]),
+        page("c2", modified=[txn("t1", 12.0), txn("t0", 7.0, date="2025-04-02")]),
+    ])
+
+    assert (result.added, result.modified, result.removed, result.skipped) == (1, 1, 0, False)
+    assert plaid.cursors == ["c0", "c1"]
+    assert db.commits == 1
+    assert db.committed["t1"]["amount"] == 12.0
+    assert db.committed["t0"]["date"] == datetime.date(2025, 4, 2)
+    assert db.committed_rollups == db.expected_rollups()
+
+async def test_add_then_remove_across_pages_is_not_stored():
+    db = FakeSession()
+    result, _ = await run_sync(db, [
+        page("c1", has_more=True, added=[txn("t1"), txn("t2", 20.0)]),
+        page("c2", removed=["t1"]),
+    ])
+
+    assert (result.added, result.modified, result.removed) == (1, 0, 1)
+    assert set(db.committed) == {"t2"}
+    assert db.committed_rollups == db.expected_rollups()
+
+async def test_mutation_during_pagination_restarts_from_stored_cursor():
+    db = FakeSession(cursor="c0")
+    result, plaid = await run_sync(db, [
+        page("c1", has_more=True, added=[txn("stale")]),
+        mutation_during_pagination(),
+        page("c1b", has_more=True, added=[txn("t1")]),
+        page("c2", added=[txn("t2", 20.0)]),
+    ])
+
+    assert plaid.cursors == ["c0", "c1", "c0", "c1b"]
+    assert result.added == 2
+    assert set(db.committed) == {"t1", "t2"}
+    assert db.committed_rollups == db.expected_rollups()
+
+async def test_stale_cursor_discards_the_run():
+    existing = stored_row("t0", 5.0)
+    db = FakeSession(cursor="c0", transactions=[existing], advanced=False)
+    result, _ = await run_sync(db, [
+        page("c1", added=[txn("t1")], modified=[txn("t0", 9.0)], removed=[]),
+    ])
+
+    assert result.skipped is True
+    assert (result.added, result.modified, result.removed) == (0, 0, 0)
+    assert db.commits == 0
+    assert db.transactions == {"t0": existing}
+    assert db.rollups == dict(transaction_deltas([existing], 1))